@@ -6,7 +6,7 @@ import time
 import pandas as pd
 import json
 import os
-import subprocess
+import asyncio
 import threading
 from app.models.dispatch import (
     Course, CourseGroupe, Chauffeur, ChauffeurAffectation,
@@ -14,6 +14,8 @@ from app.models.dispatch import (
 )
 from app.db.postgres import PostgresDataSource
 from app.core.logger import setup_logger
+from app.core.milp_backend import MILP_BACKENDS
+from app.core.solver_progress import parse_progress_line
 
 router = APIRouter(prefix="/dispatch", tags=["dispatch"])
 logger = setup_logger(__name__)
@@ -21,6 +23,9 @@ logger = setup_logger(__name__)
 # Stockage des tâches en cours et terminées (similaire à l'implémentation Flask)
 tasks = {}
 
+# Taille des blocs lus sur la sortie du script (les lignes peuvent être bien plus longues)
+READ_CHUNK = 64 * 1024
+
 @router.get("/courses", response_model=List[Course])
 async def get_courses(
     time_window: TimeWindowParams = Depends(),
@@ -240,9 +245,24 @@ async def start_dispatch(
     date_begin: Optional[str] = None,
     date_end: Optional[str] = None,
     milp_timeout: int = 300,
+    solver: Optional[str] = Query(None, description="Solveur MILP : cbc | highs (défaut : MILP_SOLVER)"),
+    solver_threads: Optional[int] = Query(None, ge=0, description="Threads du solveur (0 = tous les cœurs)"),
+    solver_gap: Optional[float] = Query(None, ge=0, description="Écart relatif d'optimalité pour arrêter le solveur"),
+    solver_gap_abs: Optional[float] = Query(None, ge=0, description="Écart absolu entre solution et borne pour arrêter le solveur"),
+    solver_stall: Optional[float] = Query(None, ge=0, description="Secondes sans amélioration avant d'arrêter le solveur"),
+    time_budget: Optional[float] = Query(None, ge=0, description="Budget de temps global du dispatch en secondes"),
+    mode: str = Query("full", description="full | preview (aperçu rapide par relaxation LP, sans sauvegarde)"),
     ds: PostgresDataSource = Depends()
 ):
     """Endpoint pour lancer l'exécution du script test_dispatch.py"""
+    if mode not in ("full", "preview"):
+        raise HTTPException(status_code=400, detail=f"Mode inconnu : {mode} (attendu : full, preview)")
+    if solver is not None and solver.lower() not in MILP_BACKENDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Solveur inconnu : {solver} (attendu : {', '.join(MILP_BACKENDS)})"
+        )
+
     # Générer un ID unique pour cette tâche
     task_id = str(uuid.uuid4())
 
@@ -253,11 +273,21 @@ async def start_dispatch(
         "start_time": time.time(),
         "date_begin": date_begin,
         "date_end": date_end,
-        "milp_timeout": milp_timeout
+        "milp_timeout": milp_timeout,
+        "solver": solver,
+        "solver_threads": solver_threads,
+        "solver_gap": solver_gap,
+        "solver_gap_abs": solver_gap_abs,
+        "solver_stall": solver_stall,
+        "time_budget": time_budget,
+        "mode": mode
     }
 
     # Lancer l'exécution en arrière-plan
-    background_tasks.add_task(run_dispatch_script, task_id, date_begin, date_end, milp_timeout)
+    background_tasks.add_task(
+        run_dispatch_script, task_id, date_begin, date_end, milp_timeout, solver, solver_threads, solver_gap,
+        solver_gap_abs, solver_stall, time_budget, mode
+    )
 
     return {
         "task_id": task_id,
@@ -278,9 +308,12 @@ async def check_status(
         "task_id": task_id,
         "status": task["status"],
         "elapsed_time": (time.time() - task["start_time"])/60,
+        "progress": task.get("progress", {}),
         "output": task.get("output", ""),
         "error": task.get("error", "")
     }
+    if "preview" in task:
+        response["preview"] = task["preview"]
 
     return response
 
@@ -312,8 +345,16 @@ async def get_results_supabase(
         # Extraire les informations importantes de la sortie du solveur
         output = task_data.get("output", "")
         solver_info = {}
+        results = task_data.get("results") or {}
+        if isinstance(results, str):
+            results = json.loads(results)
+        progress = results.get("progress") or {}
         
-        if output:
+        if progress.get("solver"):
+            # Progression structurée publiée par le solveur (dernier état connu)
+            solver_info.update({k: progress["solver"].get(k) for k in ("incumbent", "bound", "gap", "nodes")})
+            solver_info["model"] = progress.get("model")
+        elif output:
             # Extraire le coût total si présent
             import re
             cost_match = re.search(r"Solution heuristique obtenue avec coût total approximatif : ([\d.]+)", output)
@@ -395,8 +436,21 @@ async def get_results(
         logger.error(f"Erreur lors de la lecture des résultats: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-async def run_dispatch_script(task_id: str, date_begin: Optional[str] = None, date_end: Optional[str] = None, milp_timeout: int = 300):
+async def run_dispatch_script(
+    task_id: str,
+    date_begin: Optional[str] = None,
+    date_end: Optional[str] = None,
+    milp_timeout: int = 300,
+    solver: Optional[str] = None,
+    solver_threads: Optional[int] = None,
+    solver_gap: Optional[float] = None,
+    solver_gap_abs: Optional[float] = None,
+    solver_stall: Optional[float] = None,
+    time_budget: Optional[float] = None,
+    mode: str = "full"
+):
     """Exécute le script test_dispatch.py en arrière-plan"""
+    process = None
     try:
         # Mise à jour du statut
         tasks[task_id]["status"] = "running"
@@ -409,26 +463,53 @@ async def run_dispatch_script(task_id: str, date_begin: Optional[str] = None, da
             cmd.extend(["--date_begin", date_begin])
         if date_end:
             cmd.extend(["--date_end", date_end])
-        cmd.extend(["--milp_timeout", str(milp_timeout)])
-
-        # Exécuter le script et capturer sa sortie
+        cmd.extend(["--milp_timeout", str(milp_timeout), "--progress"])
+        if solver:
+            cmd.extend(["--solver", solver])
+        if solver_threads is not None:
+            cmd.extend(["--solver_threads", str(solver_threads)])
+        if solver_gap is not None:
+            cmd.extend(["--solver_gap", str(solver_gap)])
+        if solver_gap_abs is not None:
+            cmd.extend(["--solver_gap_abs", str(solver_gap_abs)])
+        if solver_stall is not None:
+            cmd.extend(["--solver_stall", str(solver_stall)])
+        if time_budget is not None:
+            cmd.extend(["--time_budget", str(time_budget)])
+        if mode != "full":
+            cmd.extend(["--mode", mode])
+
+        # Exécuter le script : la sortie est lue en direct pour suivre la progression
         start_time = time.time()
-        process = subprocess.run(cmd, capture_output=True, text=True)
+        tasks[task_id]["progress"] = {}
+        process = await asyncio.create_subprocess_exec(
+            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        stdout_lines, stderr = await asyncio.gather(
+            read_progress(process.stdout, tasks[task_id]["progress"]),
+            process.stderr.read()
+        )
+        await process.wait()
         elapsed_time = time.time() - start_time
+        stdout = "".join(stdout_lines)
+        stderr = stderr.decode(errors="replace")
 
         # Mettre à jour le statut en fonction de la sortie
         if process.returncode == 0:
             tasks[task_id]["status"] = "completed"
-            tasks[task_id]["output"] = process.stdout
+            tasks[task_id]["output"] = stdout
             tasks[task_id]["elapsed_time"] = elapsed_time/60
+            if mode == "preview":
+                # résumé de l'aperçu (borne LP, écart d'arrondi, taille de flotte), publié avec l'étape finale
+                tasks[task_id]["preview"] = tasks[task_id]["progress"].get("stage_info")
         else:
             tasks[task_id]["status"] = "error"
-            tasks[task_id]["error"] = process.stderr
+            tasks[task_id]["error"] = stderr
 
         # Sauvegarder dans Supabase
         await save_task_to_supabase(
             task_id, tasks[task_id]["status"], tasks[task_id]["start_time"], 
-            elapsed_time, None, process.stdout, process.stderr
+            elapsed_time, None, stdout, stderr, json.dumps({"progress": tasks[task_id]["progress"]})
         )
 
     except Exception as e:
@@ -438,6 +519,56 @@ async def run_dispatch_script(task_id: str, date_begin: Optional[str] = None, da
             task_id, "error", tasks[task_id]["start_time"], 
             time.time() - tasks[task_id]["start_time"], None, None, str(e)
         )
+    finally:
+        # erreur de lecture ou tâche annulée : le script ne doit pas survivre à la tâche
+        if process is not None and process.returncode is None:
+            process.kill()
+            await process.wait()
+
+async def read_progress(stream: asyncio.StreamReader, progress: dict) -> List[str]:
+    """
+    Lit la sortie du script ligne à ligne : les événements de progression
+    mettent à jour ``progress`` (étape, taille du modèle, solution courante,
+    borne, écart, nœuds), les autres lignes sont renvoyées.
+
+    La sortie est lue par blocs et découpée sur les retours à la ligne :
+    une ligne plus longue que la limite du ``StreamReader`` (requêtes ou
+    lignes de résultats affichées par le script) ne fait pas échouer la
+    lecture.
+    """
+    lignes = []
+
+    def traiter(brute: bytes) -> None:
+        ligne = brute.decode(errors="replace")
+        evenement = parse_progress_line(ligne)
+        if evenement is None:
+            lignes.append(ligne)
+            return
+        genre = evenement.pop("type", None)
+        if genre == "stage":
+            progress["stage"] = evenement.pop("stage")
+            progress["stage_info"] = evenement
+        elif genre == "model":
+            progress["model"] = evenement
+        elif genre == "solver":
+            progress["solver"] = evenement
+        progress["updated"] = evenement.get("t")
+
+    debut = []  # morceaux de la ligne en cours
+    while True:
+        bloc = await stream.read(READ_CHUNK)
+        if not bloc:
+            break
+        *completes, suite = bloc.split(b"\n")
+        if completes:
+            completes[0] = b"".join(debut) + completes[0]
+            debut = []
+            for brute in completes:
+                traiter(brute + b"\n")
+        debut.append(suite)
+    if any(debut):
+        traiter(b"".join(debut))
+    return lignes
 
 async def save_task_to_supabase(task_id, status, start_time, elapsed_time, result_file, output, error, results=None):
     """Sauvegarde les informations de la tâche dans Supabase"""
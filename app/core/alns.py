@@ -0,0 +1,416 @@
+import logging
+import math
+import random
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.complement import committed_values, penalty
+from app.core.dispatch_instance import DispatchInstance
+from app.core.milp_matrix import assignment_columns
+
+logger = logging.getLogger(__name__)
+
+# Recherche adaptative à grand voisinage (ALNS) sur les colonnes du modèle
+# MILP (mêmes missions solo / combo, mêmes règles de capacité) : à chaque
+# itération un opérateur de destruction retire les missions de quelques
+# groupes, un opérateur de réparation les réaffecte ; la nouvelle solution
+# est acceptée selon un critère de recuit simulé et les poids des opérateurs
+# s'adaptent à leurs succès. Chaque mouvement est évalué par son delta de
+# coût (trajets + pénalité par place manquante), sans recalcul complet.
+
+_EPS = 1e-9
+# scores : nouvelle meilleure solution, amélioration, solution moins bonne acceptée
+_SCORES = (33.0, 9.0, 13.0)
+
+
+class AlnsSearch:
+    """
+    Moteur ALNS pour l'affectation groupes → chauffeurs.
+
+    L'état est la multiplicité de chaque colonne (mission solo ``(g, c)`` ou
+    combo ``(g1, g2, c)``) ; coût, couverture des groupes et planning des
+    chauffeurs sont tenus à jour à chaque ajout ou retrait de mission. Les
+    affectations ``fixes`` (format ``extract_assignments``) restent en place
+    et occupent le planning de leurs chauffeurs.
+    """
+
+    DESTRUCTIONS = ('aleatoire', 'temporelle', 'spatiale', 'pire_cout')
+    REPARATIONS = ('gloutonne', 'gloutonne_bruitee', 'regret_2', 'regret_3')
+
+    def __init__(
+        self,
+        inst: DispatchInstance,
+        solo_cost,
+        combo_cost: Dict[Tuple, float],
+        fixes: Optional[Dict[Any, List[Dict[str, Any]]]] = None,
+        seed: int = 0,
+        degre: Tuple[float, float] = (0.02, 0.12),
+        segment: int = 100,
+        reaction: float = 0.1,
+    ):
+        self.inst = inst
+        self.rng = random.Random(seed)
+        self.np_rng = np.random.default_rng(seed)
+        self.degre = degre
+        self.segment = segment
+        self.reaction = reaction
+
+        m = assignment_columns(inst, solo_cost, combo_cost)
+        self.x_keys, self.y_keys = m['x_keys'], m['y_keys']
+        nx = len(self.x_keys)
+        self.cost = m['cost']
+        self.driver = m['driver']
+        self.debut = m['debut']
+        self.fin = self.debut + self.cost
+        self.upper = m['upper'].astype(int)
+        self.g1 = np.concatenate([m['rows'][0], m['rows'][1]]).astype(int)
+        self.g2 = np.concatenate([np.full(nx, -1), m['rows'][2]]).astype(int)
+        self.places = np.concatenate([m['vals'][0], m['vals'][1]])
+        self.penalite = penalty(self.cost)
+        self.colonnes = [[] for _ in range(inst.nb_groupes)]
+        for k in range(len(self.cost)):
+            self.colonnes[self.g1[k]].append(k)
+            if self.g2[k] >= 0:
+                self.colonnes[self.g2[k]].append(k)
+        self.colonnes = [np.array(c, dtype=int) for c in self.colonnes]
+        # données des colonnes de chaque groupe, contiguës (évaluation des insertions)
+        self.candidats = [
+            (c, self.cost[c], self.places[c], self.g1[c], self.g2[c], self.driver[c], self.upper[c],
+             inst.max_missions[self.driver[c]])
+            for c in self.colonnes
+        ]
+        self.sans_bruit = np.ones(len(self.cost))
+        self.bruit = self.sans_bruit
+
+        # état courant
+        self.v = np.zeros(len(self.cost), dtype=int)
+        self.fixe = np.zeros(len(self.cost), dtype=int)
+        # places manquantes par groupe ; la dernière case (toujours 0) sert aux solos (g2 = -1)
+        self.manque = np.append(inst.ng.astype(float), 0.0)
+        self.missions = np.zeros(inst.nb_chauffeurs, dtype=int)
+        self.planning: List[List[int]] = [[] for _ in range(inst.nb_chauffeurs)]
+        self.bloque: List[List[Tuple[float, float]]] = [[] for _ in range(inst.nb_chauffeurs)]
+        self.total = self.penalite * float(self.manque.sum())
+        self.journal: Optional[List[Tuple[int, int]]] = None
+        self.fixes = fixes or {}
+        self._fixer(solo_cost, combo_cost)
+
+        self.poids = {op: 1.0 for op in self.DESTRUCTIONS + self.REPARATIONS}
+        self.utilisations = {op: 0 for op in self.poids}
+
+    # ------------------------------------------------------------------
+    # État et deltas
+    # ------------------------------------------------------------------
+    def _fixer(self, solo_cost, combo_cost: Dict[Tuple, float]) -> None:
+        """Affectations fixes : colonnes bornées inférieurement, ou intervalles bloqués hors modèle."""
+        x, y = committed_values(self.fixes, self.y_keys)
+        index = {k: i for i, k in enumerate(self.x_keys + self.y_keys)}
+        cidx, gidx = self.inst.driver_index, self.inst.group_index
+        for cle, valeur in list(x.items()) + list(y.items()):
+            if cle in index:
+                k = index[cle]
+                for _ in range(int(valeur)):
+                    self._appliquer(k, 1)
+                self.fixe[k] += int(valeur)
+            elif cle[-1] in cidx and all(g in gidx for g in cle[:-1]):
+                # hors modèle (règles de capacité) : le chauffeur reste occupé, la couverture est comptée
+                j = cidx[cle[-1]]
+                duree = solo_cost[cle] if len(cle) == 2 and cle in solo_cost else combo_cost.get(cle)
+                if duree is None:
+                    logger.warning(f"ALNS : affectation fixe {cle} sans coût connu, ignorée")
+                    continue
+                s = min(self.inst.t_min[gidx[g]] for g in cle[:-1])
+                for _ in range(int(valeur)):
+                    self.bloque[j].append((s, s + duree))
+                    self.missions[j] += 1
+                part = self.inst.n[j] * (1.0 if len(cle) == 2 else 0.5) * valeur
+                for g in cle[:-1]:
+                    i = gidx[g]
+                    self.total -= self.penalite * (max(self.manque[i], 0) - max(self.manque[i] - part, 0))
+                    self.manque[i] -= part
+
+    def _delta(self, k: int, signe: int) -> float:
+        """Variation de l'objectif si une unité de la colonne ``k`` est ajoutée (+1) ou retirée (-1)."""
+        delta = signe * self.cost[k]
+        p = signe * self.places[k]
+        for i in (self.g1[k], self.g2[k]):
+            if i >= 0:
+                delta += self.penalite * (max(self.manque[i] - p, 0.0) - max(self.manque[i], 0.0))
+        return delta
+
+    def _appliquer(self, k: int, signe: int) -> None:
+        self.total += self._delta(k, signe)
+        j = self.driver[k]
+        self.v[k] += signe
+        self.missions[j] += signe
+        self.manque[self.g1[k]] -= signe * self.places[k]
+        if self.g2[k] >= 0:
+            self.manque[self.g2[k]] -= signe * self.places[k]
+        if signe > 0:
+            self.planning[j].append(k)
+        else:
+            self.planning[j].remove(k)
+        if self.journal is not None:
+            self.journal.append((k, signe))
+
+    def _annuler(self, journal: List[Tuple[int, int]]) -> None:
+        sauvegarde, self.journal = self.journal, None
+        for k, signe in reversed(journal):
+            self._appliquer(k, -signe)
+        self.journal = sauvegarde
+
+    def _libre(self, k: int) -> bool:
+        """Le chauffeur de ``k`` peut-il prendre une mission de plus sur cet intervalle ?"""
+        j = self.driver[k]
+        if self.missions[j] >= self.inst.max_missions[j] or self.v[k] >= self.upper[k]:
+            return False
+        # compte prudent : toutes les missions qui recoupent l'intervalle
+        s, f = self.debut[k], self.fin[k]
+        occupees = sum(1 for a in self.planning[j] if self.debut[a] < f and s < self.fin[a])
+        occupees += sum(1 for a, b in self.bloque[j] if a < f and s < b)
+        return occupees < self.inst.size[j]
+
+    def cout_trajets(self) -> float:
+        return float(self.cost @ self.v)
+
+    # ------------------------------------------------------------------
+    # Destruction
+    # ------------------------------------------------------------------
+    def _groupes_actifs(self) -> np.ndarray:
+        libres = np.flatnonzero(self.v > self.fixe)
+        g2 = self.g2[libres]
+        return np.unique(np.concatenate([self.g1[libres], g2[g2 >= 0]]))
+
+    def _libres(self, groupes) -> np.ndarray:
+        """Colonnes des ``groupes`` ayant des unités non fixes."""
+        if not len(groupes):
+            return np.zeros(0, dtype=int)
+        masque = np.zeros(len(self.cost), dtype=bool)
+        masque[np.concatenate([self.colonnes[i] for i in groupes])] = True
+        return np.flatnonzero(masque & (self.v > self.fixe))
+
+    def _retirer(self, groupes) -> None:
+        for k in self._libres(groupes):
+            for _ in range(self.v[k] - self.fixe[k]):
+                self._appliquer(k, -1)
+
+    def _proches(self, actifs: np.ndarray, q: int, distance: np.ndarray) -> np.ndarray:
+        return actifs[np.argsort(distance, kind='stable')[:q]]
+
+    def _detruire(self, operateur: str) -> None:
+        """Retire les missions non fixes de ``q`` groupes (fraction ``degre`` des groupes servis, au moins 4)."""
+        actifs = self._groupes_actifs()
+        if actifs.size == 0:
+            return
+        q = min(actifs.size, max(4, int(actifs.size * self.rng.uniform(*self.degre))))
+        inst = self.inst
+        if operateur == 'aleatoire':
+            choisis = self.rng.sample(list(actifs), q)
+        elif operateur == 'temporelle':
+            s = actifs[self.rng.randrange(actifs.size)]
+            choisis = self._proches(actifs, q, np.abs(inst.t_min[actifs] - inst.t_min[s]))
+        elif operateur == 'spatiale':
+            s = actifs[self.rng.randrange(actifs.size)]
+            dlat = inst.lat_pickup[actifs] - inst.lat_pickup[s]
+            echelle = math.cos(math.radians(inst.lat_pickup[s])) if np.isfinite(inst.lat_pickup[s]) else 1.0
+            dlng = (inst.lng_pickup[actifs] - inst.lng_pickup[s]) * echelle
+            distance = np.hypot(dlat, dlng)
+            if np.isnan(distance).all():
+                # sans coordonnées, la proximité temporelle en tient lieu
+                distance = np.abs(inst.t_min[actifs] - inst.t_min[s])
+            choisis = self._proches(actifs, q, np.nan_to_num(distance, nan=np.inf))
+        else:
+            # pire coût par place, choix biaisé (y^p) pour garder de la diversité
+            libres = np.flatnonzero(self.v > self.fixe)
+            part = self.cost[libres] * (self.v - self.fixe)[libres] * np.where(self.g2[libres] >= 0, 0.5, 1.0)
+            par_groupe = np.bincount(self.g1[libres], weights=part, minlength=inst.nb_groupes)
+            combos = self.g2[libres] >= 0
+            par_groupe += np.bincount(self.g2[libres][combos], weights=part[combos], minlength=inst.nb_groupes)
+            scores = par_groupe[actifs] / np.maximum(inst.ng[actifs], 1)
+            restants = list(actifs[np.argsort(-scores, kind='stable')])
+            choisis = []
+            while len(choisis) < q:
+                choisis.append(restants.pop(int(self.rng.random() ** 3 * len(restants))))
+        self._retirer(choisis)
+
+    # ------------------------------------------------------------------
+    # Réparation
+    # ------------------------------------------------------------------
+    def _ratio(self, k: int) -> float:
+        """Coût par place utile de la colonne ``k`` dans l'état courant."""
+        utiles = min(self.places[k], max(self.manque[self.g1[k]], 0.0))
+        if self.g2[k] >= 0:
+            utiles += min(self.places[k], max(self.manque[self.g2[k]], 0.0))
+        return self.cost[k] / utiles if utiles > _EPS else math.inf
+
+    def _meilleures(self, i: int, nb: int) -> List[Tuple[float, int]]:
+        """Les ``nb`` insertions réalisables les moins chères par place utile pour le groupe ``i``."""
+        cols, cout, places, g1, g2, j, upper, max_missions = self.candidats[i]
+        if cols.size == 0:
+            return []
+        manque = np.maximum(self.manque, 0.0)
+        utiles = np.minimum(places, manque[g1]) + np.minimum(places, manque[g2])
+        ouvertes = (utiles > _EPS) & (self.v[cols] < upper) & (self.missions[j] < max_missions)
+        cols = cols[ouvertes]
+        ratio = cout[ouvertes] / utiles[ouvertes] * self.bruit[cols]
+        resultat = []
+        for r in np.argsort(ratio, kind='stable'):
+            if self._libre(cols[r]):
+                resultat.append((float(ratio[r]), int(cols[r])))
+                if len(resultat) >= nb:
+                    break
+        return resultat
+
+    def _reparer(self, operateur: str) -> None:
+        """
+        Réinsère des missions tant qu'un groupe manque de places : la moins
+        chère par place utile (gloutonne, éventuellement bruitée de ±20 %)
+        ou celle du groupe au plus fort regret entre ses ``k`` meilleures.
+        """
+        nb = int(operateur.rsplit('_', 1)[1]) if operateur.startswith('regret') else 1
+        self.bruit = self.np_rng.uniform(0.8, 1.2, len(self.cost)) if operateur.endswith('bruitee') else self.sans_bruit
+        ouverts = set(np.flatnonzero(self.manque > _EPS).tolist())
+        cache: Dict[int, List[Tuple[float, int]]] = {}
+        while ouverts:
+            for i in ouverts:
+                if i not in cache:
+                    cache[i] = self._meilleures(i, nb)
+            candidats = [i for i in ouverts if cache[i]]
+            if not candidats:
+                break
+            if nb == 1:
+                i = min(candidats, key=lambda g: cache[g][0][0])
+            else:
+                # regret : écart entre la meilleure insertion et les suivantes (absentes = pénalité)
+                def regret(g):
+                    options = cache[g]
+                    meilleure = options[0][0]
+                    autres = [r for r, _ in options[1:]] + [self.penalite] * (nb - len(options))
+                    return (sum(r - meilleure for r in autres), -meilleure)
+                i = max(candidats, key=regret)
+            ratio, k = cache[i][0]
+            if not self._libre(k) or abs(self._ratio(k) * self.bruit[k] - ratio) > _EPS:
+                # option périmée (chauffeur pris, places utiles changées) : réévaluation paresseuse
+                del cache[i]
+                continue
+            self._appliquer(k, 1)
+            for g in (self.g1[k], self.g2[k]):
+                cache.pop(g, None)
+            ouverts = {g for g in ouverts if self.manque[g] > _EPS}
+
+    def _nettoyer(self, groupes) -> None:
+        """Retire les missions devenues superflues (couverture assurée sans elles), les plus chères d'abord."""
+        cols = self._libres(list(groupes))
+        for k in cols[np.argsort(-self.cost[cols], kind='stable')]:
+            while self.v[k] > self.fixe[k] and self._delta(k, -1) < -_EPS:
+                self._appliquer(k, -1)
+
+    # ------------------------------------------------------------------
+    # Boucle principale
+    # ------------------------------------------------------------------
+    def _choisir(self, operateurs) -> str:
+        return self.rng.choices(operateurs, weights=[self.poids[o] for o in operateurs])[0]
+
+    def run(self, time_limit: float, max_iterations: int = 20000) -> np.ndarray:
+        """
+        Construction gloutonne puis ALNS jusqu'à ``time_limit`` secondes ou
+        ``max_iterations`` itérations.
+
+        Returns:
+            multiplicités de la meilleure solution trouvée
+        """
+        debut = time.perf_counter()
+        self._reparer('gloutonne')
+        self._nettoyer(range(self.inst.nb_groupes))
+        meilleur, meilleur_total = self.v.copy(), self.total
+        initial = self.total
+        # température : une solution 0,2 % plus chère (en trajets) acceptée une fois sur deux au départ
+        t0 = max(0.002 * self.cout_trajets(), 1.0) / math.log(2)
+        scores = {op: 0.0 for op in self.poids}
+        iterations = 0
+        while iterations < max_iterations:
+            ecoule = time.perf_counter() - debut
+            if ecoule >= time_limit:
+                break
+            iterations += 1
+            avancement = max(ecoule / time_limit if time_limit > 0 else 1.0, iterations / max_iterations)
+            temperature = t0 * 1e-3 ** avancement
+
+            destruction, reparation = self._choisir(self.DESTRUCTIONS), self._choisir(self.REPARATIONS)
+            self.utilisations[destruction] += 1
+            self.utilisations[reparation] += 1
+            avant = self.total
+            self.journal = []
+            self._detruire(destruction)
+            touches = {self.g1[k] for k, _ in self.journal} | {self.g2[k] for k, _ in self.journal if self.g2[k] >= 0}
+            self._reparer(reparation)
+            self._nettoyer(touches)
+            journal, self.journal = self.journal, None
+
+            delta = self.total - avant
+            score = 0.0
+            if self.total < meilleur_total - _EPS:
+                meilleur, meilleur_total = self.v.copy(), self.total
+                score = _SCORES[0]
+            elif delta < -_EPS:
+                score = _SCORES[1]
+            elif delta > _EPS and self.rng.random() < math.exp(-delta / max(temperature, _EPS)):
+                score = _SCORES[2]
+            elif delta > _EPS:
+                self._annuler(journal)
+            scores[destruction] += score
+            scores[reparation] += score
+
+            if iterations % self.segment == 0:
+                for op in self.poids:
+                    if self.utilisations[op]:
+                        self.poids[op] = (
+                            (1 - self.reaction) * self.poids[op]
+                            + self.reaction * scores[op] / self.utilisations[op]
+                        )
+                        self.poids[op] = max(self.poids[op], 0.05)
+                    scores[op], self.utilisations[op] = 0.0, 0
+
+        duree = time.perf_counter() - debut
+        logger.info(
+            f"ALNS : {iterations} itérations en {duree:.2f}s ({iterations / max(duree, _EPS):.0f}/s), "
+            f"objectif {initial:.0f} → {meilleur_total:.0f}, "
+            f"poids {', '.join(f'{op}={p:.2f}' for op, p in self.poids.items())}"
+        )
+        self._restaurer(meilleur)
+        return meilleur
+
+    def _restaurer(self, valeurs: np.ndarray) -> None:
+        """Replace l'état sur ``valeurs`` (retraits d'abord, pour libérer les plannings)."""
+        ecart = valeurs - self.v
+        for k in np.flatnonzero(ecart < 0):
+            for _ in range(-ecart[k]):
+                self._appliquer(k, -1)
+        for k in np.flatnonzero(ecart > 0):
+            for _ in range(ecart[k]):
+                self._appliquer(k, 1)
+
+    def assignments(self) -> Dict[Any, List[Dict[str, Any]]]:
+        """Affectations fixes inchangées puis missions ajoutées (format ``extract_assignments``)."""
+        assign = {gid: list(a) for gid, a in self.fixes.items() if a}
+        nx = len(self.x_keys)
+        session = int(time.time())
+        numero = 0
+        for k in np.flatnonzero(self.v > self.fixe):
+            for _ in range(int(self.v[k] - self.fixe[k])):
+                if k < nx:
+                    gid, cid = self.x_keys[k]
+                    assign.setdefault(gid, []).append(
+                        {"chauffeur": cid, "trajet": "simple", "combo_id": None, "combiné_avec": []}
+                    )
+                    continue
+                g1, g2, cid = self.y_keys[k - nx]
+                numero += 1
+                combo_id = f"combo_{session}_alns_{numero}"
+                for gid, autre in ((g1, g2), (g2, g1)):
+                    assign.setdefault(gid, []).append(
+                        {"chauffeur": cid, "trajet": "combiné", "combo_id": combo_id, "combiné_avec": [autre]}
+                    )
+        return assign
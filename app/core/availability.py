@@ -0,0 +1,149 @@
+import heapq
+import logging
+from datetime import date, datetime, time as dtime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _to_timestamp(value: Any, fin: bool = False) -> Optional[float]:
+    """
+    Convertit une borne de disponibilité en secondes epoch.
+
+    Une date sans heure couvre la journée entière (00:00 en début de
+    fenêtre, 23:59:59 en fin de fenêtre). Les datetimes naïfs sont lus en UTC.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if not isinstance(value, datetime) and isinstance(value, date):
+        value = datetime.combine(value, dtime.max if fin else dtime.min)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _debut(value: Any) -> float:
+    t = _to_timestamp(value)
+    return float('-inf') if t is None else t
+
+
+def _fin(value: Any) -> float:
+    t = _to_timestamp(value, fin=True)
+    return float('inf') if t is None else t
+
+
+def merge_driver_availabilities(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Fusionne les lignes ``dispoChauffeur`` d'un même chauffeur.
+
+    La jointure de ``prepare_chauffeurs`` renvoie une ligne par
+    disponibilité ; on ne garde qu'une ligne par ``id`` avec :
+
+    - ``disponibilites`` : liste triée des fenêtres (début, fin), les
+      fenêtres qui se chevauchent étant fusionnées ;
+    - ``availability_date`` / ``availability_date_end`` : bornes extrêmes,
+      pour les traitements qui n'utilisent qu'une fenêtre.
+    """
+    par_id: Dict[Any, Dict[str, Any]] = {}
+    fenetres: Dict[Any, List[Tuple[Any, Any]]] = {}
+    for row in rows:
+        cid = row['id']
+        if cid not in par_id:
+            par_id[cid] = dict(row)
+            fenetres[cid] = []
+        debut, fin = row.get('availability_date'), row.get('availability_date_end')
+        if debut is not None or fin is not None:
+            fenetres[cid].append((debut, fin))
+
+    for cid, chauffeur in par_id.items():
+        fusion: List[Tuple[Any, Any]] = []
+        for debut, fin in sorted(fenetres[cid], key=lambda w: _debut(w[0])):
+            if fusion and _debut(debut) <= _fin(fusion[-1][1]):
+                if _fin(fin) > _fin(fusion[-1][1]):
+                    fusion[-1] = (fusion[-1][0], fin)
+            else:
+                fusion.append((debut, fin))
+        chauffeur['disponibilites'] = fusion
+        if fusion:
+            chauffeur['availability_date'] = fusion[0][0]
+            chauffeur['availability_date_end'] = fusion[-1][1]
+
+    if len(par_id) < len(rows):
+        logger.info(f"{len(rows)} disponibilités fusionnées en {len(par_id)} chauffeurs")
+    return list(par_id.values())
+
+
+class AvailabilityIndex:
+    """
+    Index des fenêtres de disponibilité des chauffeurs.
+
+    Les fenêtres sont triées par début ; ``mask`` balaie les heures de prise
+    en charge dans l'ordre en maintenant un tas des fenêtres ouvertes
+    (trié par fin), soit O((W + G) log W) au lieu de tester chaque paire
+    (groupe, chauffeur, fenêtre).
+
+    Un chauffeur sans fenêtre est toujours disponible ; un groupe sans
+    heure de prise en charge accepte tous les chauffeurs.
+    """
+
+    def __init__(self, chauffeurs: List[Dict[str, Any]]):
+        self.nb_chauffeurs = len(chauffeurs)
+        self.toujours_dispo = np.zeros(self.nb_chauffeurs, dtype=bool)
+        fenetres: List[Tuple[float, float, int]] = []
+        for j, c in enumerate(chauffeurs):
+            dispos = c.get('disponibilites')
+            if dispos is None and (c.get('availability_date') is not None or c.get('availability_date_end') is not None):
+                dispos = [(c.get('availability_date'), c.get('availability_date_end'))]
+            if not dispos:
+                self.toujours_dispo[j] = True
+                continue
+            for debut, fin in dispos:
+                fenetres.append((_debut(debut), _fin(fin), j))
+        fenetres.sort()
+        self.fenetres = fenetres
+
+    def mask(self, instants: List[Optional[float]]) -> np.ndarray:
+        """
+        Matrice booléenne (len(instants) × C) : ``True`` si le chauffeur est
+        disponible à l'instant donné (secondes epoch, ``None`` = inconnu).
+        """
+        result = np.zeros((len(instants), self.nb_chauffeurs), dtype=bool)
+        result[:, self.toujours_dispo] = True
+
+        connus = sorted((t, i) for i, t in enumerate(instants) if t is not None)
+        for i, t in enumerate(instants):
+            if t is None:
+                result[i, :] = True
+
+        ouvertes: List[Tuple[float, int]] = []   # tas (fin, chauffeur)
+        actifs: Dict[int, int] = {}               # chauffeur → nb de fenêtres ouvertes
+        k = 0
+        for t, i in connus:
+            while k < len(self.fenetres) and self.fenetres[k][0] <= t:
+                _, fin, j = self.fenetres[k]
+                heapq.heappush(ouvertes, (fin, j))
+                actifs[j] = actifs.get(j, 0) + 1
+                k += 1
+            while ouvertes and ouvertes[0][0] < t:
+                _, j = heapq.heappop(ouvertes)
+                actifs[j] -= 1
+                if not actifs[j]:
+                    del actifs[j]
+            if actifs:
+                result[i, list(actifs)] = True
+        return result
+
+
+def availability_mask(groupes: List[Dict[str, Any]], chauffeurs: List[Dict[str, Any]]) -> np.ndarray:
+    """Masque G×C des paires (groupe, chauffeur) compatibles avec les disponibilités."""
+    index = AvailabilityIndex(chauffeurs)
+    instants = [_to_timestamp(g.get('date_heure_prise_en_charge')) for g in groupes]
+    mask = index.mask(instants)
+    exclues = mask.size - int(mask.sum())
+    if exclues:
+        logger.info(f"{exclues} paires groupe/chauffeur exclues (chauffeur indisponible)")
+    return mask
@@ -0,0 +1,38 @@
+from typing import Any, Dict, List
+
+import numpy as np
+
+from app.core.config import settings
+
+# Règles de capacité (paramètres dans Settings) : un grand véhicule
+# (au moins GRAND_VEHICULE_PLACES_MIN places) n'est pas affecté à un petit
+# groupe. Les fonctions acceptent des scalaires ou des tableaux NumPy.
+
+
+def solo_allowed(ng, n):
+    """Trajet solo autorisé pour un groupe de ``ng`` personnes et un véhicule de ``n`` places."""
+    return (ng > settings.PETIT_GROUPE_SOLO_MAX) | (n < settings.GRAND_VEHICULE_PLACES_MIN)
+
+
+def combo_allowed(ng1, ng2, n):
+    """Trajet combiné autorisé pour deux groupes de ``ng1`` et ``ng2`` personnes."""
+    return (
+        (ng1 > settings.PETIT_GROUPE_COMBO_MAX) & (ng2 > settings.PETIT_GROUPE_COMBO_MAX)
+    ) | (n < settings.GRAND_VEHICULE_PLACES_MIN)
+
+
+def capacity_mask(groupes: List[Dict[str, Any]], chauffeurs: List[Dict[str, Any]]) -> np.ndarray:
+    """Masque G×C des trajets solo autorisés par les règles de capacité."""
+    ng = np.array([g['ng'] for g in groupes], dtype=float)
+    n = np.array([c['n'] for c in chauffeurs], dtype=float)
+    return solo_allowed(ng[:, None], n[None, :])
+
+
+def filter_combo_costs(combo_cost: Dict, groupes: List[Dict[str, Any]], chauffeurs: List[Dict[str, Any]]) -> Dict:
+    """Retire les combos interdits par les règles de capacité."""
+    ng = {g['id']: g['ng'] for g in groupes}
+    n = {c['id']: c['n'] for c in chauffeurs}
+    return {
+        (g1, g2, c): cost for (g1, g2, c), cost in combo_cost.items()
+        if combo_allowed(ng[g1], ng[g2], n[c])
+    }
@@ -0,0 +1,81 @@
+import logging
+from bisect import bisect_left
+from typing import Any, Dict, Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def iter_combo_candidates(
+    groupes: List[Dict[str, Any]],
+    chauffeurs: List[Dict[str, Any]],
+    tolerance_min: float = 45
+) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any], List[Dict[str, Any]]]]:
+    """
+    Génère paresseusement les candidats aux trajets combinés.
+
+    Les groupes sont triés par ``t_min`` puis parcourus avec une fenêtre
+    glissante : seules les paires dont l'écart de prise en charge est
+    inférieur ou égal à ``tolerance_min`` sont produites. Pour chaque paire,
+    on renvoie les chauffeurs dont la capacité couvre ``ng1 + ng2``
+    (recherche dichotomique sur les capacités triées).
+
+    Yields:
+        (g1, g2, chauffeurs_eligibles) avec ``g1['id'] < g2['id']``, comme
+        les clés de ``combo_cost``.
+    """
+    ordonnes = sorted((g for g in groupes if g.get('t_min') is not None), key=lambda g: g['t_min'])
+    par_capacite = sorted(chauffeurs, key=lambda c: c['n'])
+    capacites = [c['n'] for c in par_capacite]
+    cap_max = capacites[-1] if capacites else 0
+
+    for i, ga in enumerate(ordonnes):
+        for gb in ordonnes[i + 1:]:
+            if gb['t_min'] - ga['t_min'] > tolerance_min:
+                break
+            besoin = ga['ng'] + gb['ng']
+            if besoin > cap_max:
+                continue
+            eligibles = par_capacite[bisect_left(capacites, besoin):]
+            if ga['id'] < gb['id']:
+                yield ga, gb, eligibles
+            elif gb['id'] < ga['id']:
+                yield gb, ga, eligibles
+
+
+def prune_combo_costs(
+    combo_cost: Dict[Tuple[Any, Any, Any], float],
+    solo_cost,
+    max_detour_ratio: float = None
+) -> Tuple[Dict[Tuple[Any, Any, Any], float], Dict[str, int]]:
+    """
+    Retire les combos qui ne peuvent pas améliorer la solution avant la
+    construction du modèle :
+
+    - dominés : la tournée combinée coûte au moins autant que les deux
+      trajets solo du même chauffeur ;
+    - détour excessif : la tournée dépasse ``max_detour_ratio`` fois le plus
+      long des deux trajets solo (les passagers subiraient un trop grand
+      détour).
+
+    Returns:
+        (combo_cost filtré, statistiques {'initial', 'domines', 'detour', 'restants'})
+    """
+    kept = {}
+    stats = {'initial': len(combo_cost), 'domines': 0, 'detour': 0}
+    for (g1, g2, c), cost in combo_cost.items():
+        if (g1, c) not in solo_cost or (g2, c) not in solo_cost:
+            kept[(g1, g2, c)] = cost
+            continue
+        s1, s2 = solo_cost[(g1, c)], solo_cost[(g2, c)]
+        if cost >= s1 + s2:
+            stats['domines'] += 1
+        elif max_detour_ratio and cost > max_detour_ratio * max(s1, s2):
+            stats['detour'] += 1
+        else:
+            kept[(g1, g2, c)] = cost
+    stats['restants'] = len(kept)
+    logger.info(
+        f"Élagage des combos : {stats['initial']} → {stats['restants']} "
+        f"({stats['domines']} dominés, {stats['detour']} détours excessifs)"
+    )
+    return kept, stats
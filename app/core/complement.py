@@ -0,0 +1,122 @@
+import logging
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pulp
+
+from app.core.dispatch_instance import DispatchInstance
+from app.core.milp_matrix import MilpMatrix, column_groups
+
+logger = logging.getLogger(__name__)
+
+# Seconde passe sur les groupes non couverts : le modèle principal est repris
+# tel quel, les affectations déjà retenues y sont fixées (les plannings des
+# chauffeurs restent cohérents) et la couverture des groupes non couverts
+# devient souple (variable d'écart pénalisée par place manquante). Un groupe
+# en partie couvert par les affectations fixées est traité de même : sa ligne
+# de couverture stricte rendrait le modèle infaisable.
+
+
+def committed_values(assign: Dict[Any, List[Dict[str, Any]]], y_keys) -> Tuple[Dict[Tuple, int], Dict[Tuple, int]]:
+    """
+    Affectations retenues (format ``extract_assignments``) en valeurs des
+    variables ``x`` (``(g, c)``) et ``y`` (``(g1, g2, c)``, dans l'ordre des
+    clés du modèle).
+    """
+    y_keys = set(y_keys)
+    x, y, combos = {}, {}, set()
+    for gid, affectations in assign.items():
+        for a in affectations:
+            if a.get('trajet') == 'simple':
+                x[(gid, a['chauffeur'])] = x.get((gid, a['chauffeur']), 0) + 1
+            elif a.get('combo_id') not in combos and a.get('combiné_avec'):
+                combos.add(a.get('combo_id'))
+                cle = (gid, a['combiné_avec'][0], a['chauffeur'])
+                if cle not in y_keys:
+                    cle = (cle[1], cle[0], cle[2])
+                y[cle] = y.get(cle, 0) + 1
+    return x, y
+
+
+def penalty(cost: np.ndarray) -> float:
+    """Pénalité d'une place non couverte : plus chère que toute mission."""
+    return float(cost.max(initial=0.0)) + 1.0
+
+
+def complement_matrix(
+    modele: MilpMatrix, inst: DispatchInstance, assign: Dict[Any, List[Dict[str, Any]]], non_couverts: List[Any]
+) -> np.ndarray:
+    """
+    Prépare le modèle matriciel principal pour la seconde passe (en place).
+
+    Les colonnes retenues sont fixées (borne inférieure), les colonnes qui
+    ne touchent aucun groupe non couvert sont bloquées à leur valeur et une
+    colonne d'écart continue, pénalisée par place, est ajoutée à la ligne
+    de couverture de chaque groupe non couvert (les lignes de couverture
+    sont les premières, dans l'ordre des groupes). Les groupes que les
+    colonnes retenues couvrent en partie s'ajoutent à ``non_couverts``.
+
+    Returns:
+        solution de départ réalisable (affectations retenues, écarts)
+    """
+    x, y = committed_values(assign, modele.y_keys)
+    depart = modele.values_from(x, y)
+    na = len(modele.x_keys) + len(modele.y_keys)
+    g1, g2, places = column_groups(modele, inst)
+    retenues = depart[:na]
+    couvert = np.bincount(g1, weights=places * retenues, minlength=inst.nb_groupes)
+    combos = g2 >= 0
+    couvert += np.bincount(g2[combos], weights=(places * retenues)[combos], minlength=inst.nb_groupes)
+    nc = np.union1d(
+        np.array([inst.group_index[g] for g in non_couverts], dtype=int),
+        np.flatnonzero(couvert < inst.ng - 1e-9)
+    )
+    ouvertes = np.isin(g1, nc) | np.isin(g2, nc)
+
+    modele.lower[:na] = retenues
+    modele.upper[:na] = np.where(ouvertes, np.maximum(modele.upper[:na], retenues), retenues)
+
+    manque = np.maximum(inst.ng[nc] - couvert[nc], 0)
+    modele.add_columns(nc, penalty(modele.cost), inst.ng[nc])
+    logger.info(
+        f"Seconde passe : {int(retenues.sum())} affectations fixées, "
+        f"{int(ouvertes.sum())} colonnes libres pour {len(nc)} groupes"
+    )
+    return np.concatenate([depart, manque])
+
+
+def complement_pulp(
+    prob: pulp.LpProblem, x: Dict[Tuple, Any], y: Dict[Tuple, Any], inst: DispatchInstance,
+    assign: Dict[Any, List[Dict[str, Any]]], non_couverts: List[Any]
+) -> None:
+    """
+    Même préparation que ``complement_matrix`` sur le problème PuLP de
+    ``solve_MILP`` (contraintes de couverture nommées ``couverture_<i>``) ;
+    les valeurs de départ sont posées par ``setInitialValue``.
+    """
+    vx, vy = committed_values(assign, y.keys())
+    couvert = {g: 0.0 for g in inst.group_ids}
+    for (g, c), valeur in vx.items():
+        couvert[g] += valeur * inst.n[inst.driver_index[c]]
+    for (g1, g2, c), valeur in vy.items():
+        for g in (g1, g2):
+            couvert[g] += valeur * 0.5 * inst.n[inst.driver_index[c]]
+    nc = set(non_couverts) | {g for i, g in enumerate(inst.group_ids) if couvert[g] < inst.ng[i] - 1e-9}
+    for variables, retenues in ((x, vx), (y, vy)):
+        for k, v in variables.items():
+            valeur = retenues.get(k, 0)
+            v.lowBound = valeur
+            if not nc.intersection(k[:-1]):
+                v.upBound = valeur
+            v.setInitialValue(valeur)
+
+    couts = np.array([coef for coef in prob.objective.values()], dtype=float)
+    ecarts = []
+    for g in sorted(nc, key=inst.group_index.get):
+        i = inst.group_index[g]
+        ecart = pulp.LpVariable(f"manque_{g}", 0, int(inst.ng[i]))
+        ecart.setInitialValue(max(float(inst.ng[i]) - couvert[g], 0.0))
+        prob.constraints[f"couverture_{i}"].addInPlace(ecart)
+        ecarts.append(ecart)
+    prob.setObjective(prob.objective + penalty(couts) * pulp.lpSum(ecarts))
+    logger.info(f"Seconde passe : {sum(vx.values()) + sum(vy.values())} affectations fixées pour {len(nc)} groupes")
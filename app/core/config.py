@@ -77,6 +77,37 @@ class Settings(BaseSettings):
     HOTES_LOCAL_FILENAME: str = "BD_MX-25.xlsx"
         
     DUREE_GROUPE : int = 60  # coefficient d'ajustement ou Durée d'un groupe en minutes
+    COMBO_TOLERANCE_MIN : int = 45  # écart maximal (minutes) entre deux prises en charge pour un trajet combiné
+    COST_CACHE_ENABLED : bool = False  # cache des distances chauffeur/adresses (table coutTrajetCache, cf. app/db/migrations + LRU en mémoire) ; en haversine le calcul direct reste plus rapide
+    COST_CACHE_SIZE : int = 200000  # nombre maximal de distances gardées dans le LRU en mémoire
+    COST_WORKERS : int = int(os.getenv("COST_WORKERS", "1"))  # processus pour le calcul des coûts combinés (1 = séquentiel)
+    COMBO_PRUNING_ENABLED : bool = True  # retirer les combos dominés avant la construction du modèle
+    COMBO_MAX_DETOUR_RATIO : float = 1.6  # combo retiré si sa tournée dépasse ce ratio du plus long trajet solo, entre 1 et 2 (0 = désactivé)
+    CANDIDATE_K : int = 0  # chauffeurs candidats les plus proches gardés par groupe (0 = tous, élagage désactivé)
+    CANDIDATE_RADIUS_KM : float = 60.0  # distance maximale chauffeur → prise en charge pour un candidat (0 = sans limite)
+    MILP_SOLVER : str = os.getenv("MILP_SOLVER", "cbc")  # backend MILP : cbc | highs (cf. milp_backend)
+    MILP_THREADS : int = int(os.getenv("MILP_THREADS", "0"))  # threads du solveur MILP (0 = tous les cœurs)
+    MILP_GAP_REL : float = 0.0  # écart relatif d'optimalité pour arrêter le solveur (0 = défaut du solveur)
+    MILP_GAP_ABS : float = 0.0  # écart absolu (minutes de trajet) entre solution et borne pour arrêter le solveur (0 = désactivé)
+    MILP_STALL_TIME_S : float = 0.0  # arrêter le solveur après ce nombre de secondes sans meilleure solution (0 = désactivé)
+    DISPATCH_TIME_BUDGET_S : float = 0.0  # budget de temps global d'un dispatch, réparti entre les étapes (0 = milp_time_limit par résolution)
+    BUDGET_PART_MILP : float = 0.65  # part du budget réservée à la résolution principale
+    BUDGET_PART_COMPLEMENTAIRE : float = 0.25  # part du budget réservée à la résolution des groupes non couverts
+    BUDGET_PART_HEURISTIQUE : float = 0.1  # part du budget réservée aux heuristiques de repli
+    MILP_WARM_START : bool = True  # solution heuristique (heuristic_solution) passée au solveur comme point de départ
+    ALNS_TIME_LIMIT_S : float = 5.0  # durée maximale d'une recherche ALNS (heuristic_solution, cf. alns)
+    ALNS_MAX_ITERATIONS : int = 20000  # nombre maximal d'itérations destruction / réparation de l'ALNS
+    ALNS_WARM_START_S_PER_GROUP : float = 0.01  # durée de l'ALNS par groupe quand elle ne sert que de point de départ au MILP (plafonnée par ALNS_TIME_LIMIT_S)
+    DECOMPOSITION_ENABLED : bool = False  # résoudre séparément les blocs de groupes indépendants (cf. decomposition)
+    DECOMPOSITION_WORKERS : int = int(os.getenv("DECOMPOSITION_WORKERS", "1"))  # processus pour résoudre les blocs (1 = séquentiel)
+    MILP_BUILDER : str = os.getenv("MILP_BUILDER", "pulp")  # construction du modèle MILP : pulp (expressions PuLP) | matrix (matrice creuse passée au solveur) | flow (réseau espace-temps, cf. flow_model) | lazy (coupes de non-chevauchement à la demande, cf. lazy_overlap)
+    MILP_SYMMETRY_BREAKING : bool = False  # ordonner les nombres de missions des chauffeurs identiques (cf. symmetry)
+    ROLLING_HORIZON_ENABLED : bool = False  # résoudre l'événement par tranches successives (cf. rolling_horizon)
+    HORIZON_SLICE_MIN : int = 360  # durée d'une tranche de l'horizon glissant (minutes)
+    HORIZON_OVERLAP_MIN : int = 60  # recouvrement entre deux tranches, résolu à nouveau avec la suivante (minutes)
+    GRAND_VEHICULE_PLACES_MIN : int = 5  # un véhicule d'au moins 5 places est un grand véhicule (cf. capacity_rules)
+    PETIT_GROUPE_SOLO_MAX : int = 4  # pas de grand véhicule en solo pour un groupe d'au plus 4 personnes
+    PETIT_GROUPE_COMBO_MAX : int = 3  # pas de grand véhicule pour un combo dont un groupe compte au plus 3 personnes
     DESTINATION_DANS_GROUPAGE : str = "oui"  # oui/non ajouter Destination dans le groupage
     TIMEZONE : str = 'Europe/Paris'  # Fuseau horaire par défaut
     PAYS_ORGANISATEUR : str = "France"
@@ -0,0 +1,219 @@
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.db.postgres import PostgresDataSource
+
+logger = logging.getLogger(__name__)
+
+# La table coutTrajetCache et son trigger d'invalidation sont créés par la
+# migration app/db/migrations/001_cout_trajet_cache.sql
+
+SELECT_QUERY = """
+    SELECT hash_origine, hash_arrivee, distance_km,
+           lat_origine, lng_origine, lat_arrivee, lng_arrivee
+    FROM coutTrajetCache
+    WHERE hash_origine = ANY(%(origines)s) AND hash_arrivee = ANY(%(arrivees)s)
+"""
+
+UPSERT_QUERY = """
+    INSERT INTO coutTrajetCache (
+        hash_origine, hash_arrivee, distance_km,
+        lat_origine, lng_origine, lat_arrivee, lng_arrivee
+    )
+    SELECT * FROM unnest(
+        %(hash_origine)s::text[], %(hash_arrivee)s::text[], %(distance_km)s::float[],
+        %(lat_origine)s::float[], %(lng_origine)s::float[],
+        %(lat_arrivee)s::float[], %(lng_arrivee)s::float[]
+    )
+    ON CONFLICT (hash_origine, hash_arrivee) DO UPDATE
+    SET distance_km = EXCLUDED.distance_km,
+        lat_origine = EXCLUDED.lat_origine,
+        lng_origine = EXCLUDED.lng_origine,
+        lat_arrivee = EXCLUDED.lat_arrivee,
+        lng_arrivee = EXCLUDED.lng_arrivee,
+        date_created = NOW()
+"""
+
+
+class _PairTable:
+    """
+    LRU des distances sous forme de tableaux : chaque adresse reçoit un
+    identifiant entier, une paire est la clé ``id_origine << 32 | id_arrivee``
+    et les recherches se font par ``np.searchsorted`` sur les clés triées.
+    Seuls les hashs d'adresses passent par un dictionnaire Python.
+    """
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.keys = np.empty(0, dtype=np.int64)
+        self.coords = np.empty((0, 4))
+        self.dist = np.empty(0)
+        self.used = np.empty(0, dtype=np.int64)
+        self.clock = 0
+
+    def address_ids(self, hashes: Sequence[Optional[str]]) -> np.ndarray:
+        """Identifiants des adresses (-1 pour une adresse sans hash)."""
+        ids = self.ids
+        return np.array([ids.setdefault(h, len(ids)) if h else -1 for h in hashes], dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def lookup(self, keys: np.ndarray, coords: np.ndarray) -> np.ndarray:
+        """Distances des paires ``keys`` (NaN si absentes ou si les coordonnées ont changé)."""
+        self.clock += 1
+        result = np.full(len(keys), np.nan)
+        if not len(self.keys) or not len(keys):
+            return result
+        pos = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        trouve = (self.keys[pos] == keys) & (self.coords[pos] == coords).all(axis=1)
+        result[trouve] = self.dist[pos[trouve]]
+        self.used[pos[trouve]] = self.clock
+        return result
+
+    def store(self, keys: np.ndarray, coords: np.ndarray, dist: np.ndarray, maxsize: int) -> None:
+        """Mémorise (ou remplace) des distances, puis évince les moins récemment utilisées."""
+        self.clock += 1
+        keys, premier = np.unique(keys, return_index=True)
+        coords, dist = coords[premier], dist[premier]
+        if len(self.keys):
+            pos = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+            connu = self.keys[pos] == keys
+            self.coords[pos[connu]] = coords[connu]
+            self.dist[pos[connu]] = dist[connu]
+            self.used[pos[connu]] = self.clock
+            nouveau = ~connu
+            keys, coords, dist = keys[nouveau], coords[nouveau], dist[nouveau]
+        if len(keys):
+            self.keys = np.concatenate([self.keys, keys])
+            self.coords = np.concatenate([self.coords, coords])
+            self.dist = np.concatenate([self.dist, dist])
+            self.used = np.concatenate([self.used, np.full(len(keys), self.clock, dtype=np.int64)])
+        if len(self.keys) <= maxsize:
+            garde = np.argsort(self.keys)
+        else:
+            recents = np.argpartition(-self.used, maxsize - 1)[:maxsize]
+            garde = recents[np.argsort(self.keys[recents])]
+        self.keys, self.coords = self.keys[garde], self.coords[garde]
+        self.dist, self.used = self.dist[garde], self.used[garde]
+
+
+# LRU partagé par tous les dispatchs du même processus
+_TABLE = _PairTable()
+
+
+def _coords_key(*coords) -> np.ndarray:
+    """Coordonnées normalisées, pour détecter une adresse regéocodée."""
+    return np.round(np.column_stack([np.asarray(c, dtype=float) for c in coords]), 6)
+
+
+def _pair_keys(id_o: np.ndarray, id_a: np.ndarray) -> np.ndarray:
+    return (id_o << 32) | id_a
+
+
+class LegCostCache:
+    """
+    Cache des distances (km arrondis) entre deux adresses, indexé par
+    ``(hash_origine, hash_arrivee)`` :
+
+    - ``(chauffeur.hash_adresse, hash_lieu_prise_en_charge)`` pour l'aller
+    - ``(hash_destination, chauffeur.hash_adresse)`` pour le retour
+
+    Un LRU en mémoire sert les lectures ; la table ``coutTrajetCache`` le
+    persiste entre les exécutions. Chaque entrée garde les coordonnées
+    utilisées : si ``adresseGps`` a changé (trigger côté base ou écart
+    constaté en mémoire), l'entrée est ignorée et recalculée.
+    """
+
+    def __init__(self, ds: Optional[PostgresDataSource] = None, maxsize: int = 200_000):
+        self.ds = ds
+        self.maxsize = maxsize
+        self._pending: List[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = []
+        self.hits = 0
+        self.misses = 0
+
+    async def preload(self, origines: Sequence[str], arrivees: Sequence[str]) -> None:
+        """Charge dans le LRU les distances connues en base pour ces adresses."""
+        origines = sorted({h for h in origines if h})
+        arrivees = sorted({h for h in arrivees if h})
+        if self.ds is None or not origines or not arrivees:
+            return
+        try:
+            rows = await self.ds.fetch_all(SELECT_QUERY, {"origines": origines, "arrivees": arrivees})
+        except Exception:
+            # Connexion en autocommit=False : sans rollback, la transaction en
+            # échec bloquerait les requêtes suivantes du dispatch
+            if self.ds.conn is not None:
+                await self.ds.conn.rollback()
+            raise
+        if rows:
+            keys = _pair_keys(
+                _TABLE.address_ids([row['hash_origine'] for row in rows]),
+                _TABLE.address_ids([row['hash_arrivee'] for row in rows]),
+            )
+            coords = _coords_key(*(
+                [row[col] for row in rows] for col in ('lat_origine', 'lng_origine', 'lat_arrivee', 'lng_arrivee')
+            ))
+            _TABLE.store(keys, coords, np.array([row['distance_km'] for row in rows], dtype=float), self.maxsize)
+        logger.info(f"Cache des trajets : {len(rows)} distances chargées depuis la base")
+
+    def leg_matrix(
+        self,
+        hash_origines: Sequence[Optional[str]], lat_o: np.ndarray, lng_o: np.ndarray,
+        hash_arrivees: Sequence[Optional[str]], lat_a: np.ndarray, lng_a: np.ndarray,
+        compute
+    ) -> np.ndarray:
+        """
+        Matrice O×A des distances arrondies. Les paires absentes du cache
+        (ou dont les coordonnées ont changé) sont calculées en une passe par
+        ``compute(lat_o, lng_o, lat_a, lng_a)`` puis mémorisées.
+        """
+        nb_o, nb_a = len(hash_origines), len(hash_arrivees)
+        id_o = np.repeat(_TABLE.address_ids(hash_origines), nb_a)
+        id_a = np.tile(_TABLE.address_ids(hash_arrivees), nb_o)
+        ii, jj = np.repeat(np.arange(nb_o), nb_a), np.tile(np.arange(nb_a), nb_o)
+        coords = _coords_key(lat_o[ii], lng_o[ii], lat_a[jj], lng_a[jj])
+        connu = (id_o >= 0) & (id_a >= 0)
+        keys = _pair_keys(id_o, id_a)
+
+        result = np.full(nb_o * nb_a, np.nan)
+        result[connu] = _TABLE.lookup(keys[connu], coords[connu])
+        manquants = np.flatnonzero(np.isnan(result))
+        self.hits += result.size - len(manquants)
+        self.misses += len(manquants)
+        if len(manquants):
+            mi, mj = ii[manquants], jj[manquants]
+            calcul = np.round(compute(lat_o[mi], lng_o[mi], lat_a[mj], lng_a[mj]))
+            result[manquants] = calcul
+            nouveaux = manquants[connu[manquants] & ~np.isnan(calcul)]
+            if len(nouveaux):
+                _TABLE.store(keys[nouveaux], coords[nouveaux], result[nouveaux], self.maxsize)
+                self._pending.append((
+                    np.asarray(hash_origines, dtype=object)[ii[nouveaux]],
+                    np.asarray(hash_arrivees, dtype=object)[jj[nouveaux]],
+                    keys[nouveaux], coords[nouveaux], result[nouveaux],
+                ))
+        return result.reshape(nb_o, nb_a)
+
+    async def flush(self) -> None:
+        """Persiste en base les distances calculées pendant ce dispatch."""
+        logger.info(f"Cache des trajets : {self.hits} hits, {self.misses} calculs")
+        if self.ds is None or not self._pending:
+            return
+        hash_o, hash_a, keys, coords, dist = (np.concatenate(col) for col in zip(*self._pending))
+        # Une paire calculée deux fois (éviction entre deux matrices) n'est envoyée
+        # qu'une fois, avec son dernier calcul
+        _, dernier = np.unique(keys[::-1], return_index=True)
+        dernier = len(keys) - 1 - dernier
+        await self.ds.execute_transaction([(UPSERT_QUERY, {
+            "hash_origine": hash_o[dernier].tolist(),
+            "hash_arrivee": hash_a[dernier].tolist(),
+            "distance_km": dist[dernier].tolist(),
+            "lat_origine": coords[dernier, 0].tolist(),
+            "lng_origine": coords[dernier, 1].tolist(),
+            "lat_arrivee": coords[dernier, 2].tolist(),
+            "lng_arrivee": coords[dernier, 3].tolist(),
+        })])
+        self._pending.clear()
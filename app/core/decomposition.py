@@ -0,0 +1,238 @@
+import copy
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pulp
+
+from app.core.dispatch_instance import DispatchInstance
+from app.core.milp_backend import LpStatusFeasible, has_solution, status_name
+
+logger = logging.getLogger(__name__)
+
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, a: int) -> int:
+        while self.parent[a] != a:
+            self.parent[a] = self.parent[self.parent[a]]
+            a = self.parent[a]
+        return a
+
+    def union(self, a: int, b: int) -> None:
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+
+def _clusters(taches: List[Tuple[float, float, Tuple[int, ...]]]) -> List[List[Tuple[float, float, Tuple[int, ...]]]]:
+    """Composantes connexes du graphe d'intervalles des missions d'un chauffeur."""
+    clusters, fin_courante = [], None
+    for tache in sorted(taches):
+        if fin_courante is None or tache[0] >= fin_courante:
+            clusters.append([])
+            fin_courante = tache[1]
+        clusters[-1].append(tache)
+        fin_courante = max(fin_courante, tache[1])
+    return clusters
+
+
+def _missions_max(cluster) -> int:
+    """Nombre maximal de missions disjointes d'un cluster (tri par fin)."""
+    nb, fin = 0, None
+    for s, f, _ in sorted(cluster, key=lambda t: t[1]):
+        if fin is None or s >= fin:
+            nb += 1
+            fin = f
+    return nb
+
+
+def _repartir(budget: int, besoins: Dict[int, int]) -> Dict[int, int]:
+    """Partage ``budget`` missions entre blocs, au prorata des besoins (plus forts restes)."""
+    total = sum(besoins.values())
+    parts = {b: budget * n / total for b, n in besoins.items()}
+    alloue = {b: int(p) for b, p in parts.items()}
+    for b in sorted(parts, key=lambda b: alloue[b] - parts[b])[:budget - sum(alloue.values())]:
+        alloue[b] += 1
+    return alloue
+
+
+def interaction_blocks(
+    inst: DispatchInstance,
+    solo_cost,
+    combo_cost: Dict[Tuple[Any, Any, Any], float]
+) -> List[Dict[str, Any]]:
+    """
+    Découpe le problème en blocs de groupes indépendants.
+
+    Deux groupes sont liés s'ils partagent un combo, ou si deux de leurs
+    missions pour un même chauffeur appartiennent à la même composante du
+    graphe d'intervalles de ce chauffeur (contraintes de non-chevauchement
+    communes). Les blocs sont les composantes connexes de ce graphe.
+
+    Seule la limite de missions d'un chauffeur relie encore des blocs
+    différents : chaque bloc reçoit une réservation sur ce budget. Elle est
+    exacte quand les besoins des blocs (missions disjointes possibles)
+    tiennent dans le budget ; sinon le budget est partagé au prorata et les
+    blocs concernés sont marqués ``partage`` : leurs optimums ne donnent plus
+    l'optimum global.
+
+    Returns:
+        Liste de ``{'groupes': [ids], 'chauffeurs': {id: missions réservées},
+        'variables': nombre de variables, 'partage': bool}``, par taille
+        décroissante.
+    """
+    gidx, cidx = inst.group_index, inst.driver_index
+    uf = _UnionFind(inst.nb_groupes)
+    taches: List[List[Tuple[float, float, Tuple[int, ...]]]] = [[] for _ in range(inst.nb_chauffeurs)]
+    for (gid, cid) in solo_cost:
+        if gid in gidx and cid in cidx:
+            i, j = gidx[gid], cidx[cid]
+            s = float(inst.t_min[i])
+            taches[j].append((s, s + solo_cost[(gid, cid)], (i,)))
+    for (g1, g2, c), cost in combo_cost.items():
+        if g1 in gidx and g2 in gidx and c in cidx:
+            i1, i2, j = gidx[g1], gidx[g2], cidx[c]
+            uf.union(i1, i2)
+            s = float(min(inst.t_min[i1], inst.t_min[i2]))
+            taches[j].append((s, s + cost, (i1, i2)))
+
+    clusters_par_chauffeur = [_clusters(t) for t in taches]
+    for clusters in clusters_par_chauffeur:
+        for cluster in clusters:
+            premier = cluster[0][2][0]
+            for _, _, groupes in cluster:
+                for i in groupes:
+                    uf.union(premier, i)
+
+    racines = [uf.find(i) for i in range(inst.nb_groupes)]
+    numero = {r: b for b, r in enumerate(dict.fromkeys(racines))}
+    blocs = [{'groupes': [], 'chauffeurs': {}, 'variables': 0, 'partage': False} for _ in numero]
+    for i, r in enumerate(racines):
+        blocs[numero[r]]['groupes'].append(inst.group_ids[i])
+
+    reservations = 0
+    for j, clusters in enumerate(clusters_par_chauffeur):
+        besoins: Dict[int, int] = {}
+        for cluster in clusters:
+            b = numero[racines[cluster[0][2][0]]]
+            besoins[b] = besoins.get(b, 0) + int(inst.size[j]) * _missions_max(cluster)
+            blocs[b]['variables'] += len(cluster)
+        budget = int(inst.max_missions[j])
+        if sum(min(n, budget) for n in besoins.values()) > budget:
+            besoins = _repartir(budget, besoins)
+            reservations += 1
+            for b in besoins:
+                blocs[b]['partage'] = True
+        for b, n in besoins.items():
+            if n > 0:
+                blocs[b]['chauffeurs'][inst.driver_ids[j]] = min(n, budget)
+
+    blocs.sort(key=lambda b: -b['variables'])
+    logger.info(
+        f"Décomposition : {len(blocs)} blocs indépendants (plus grand : {blocs[0]['variables'] if blocs else 0} "
+        f"variables), {reservations} chauffeurs partagés par réservation"
+    )
+    return blocs
+
+
+# =============================================================================
+# Résolution des blocs
+# =============================================================================
+
+def _solve_block(solve_fn: Callable, args: tuple, kwargs: dict) -> Tuple[int, Dict, Dict]:
+    """Résout un bloc (dans un worker) et renvoie des valeurs numériques picklables."""
+    _, status, x, y = solve_fn(*args, **kwargs)
+    return (
+        status,
+        {k: pulp.value(v) or 0 for k, v in x.items()},
+        {k: pulp.value(v) or 0 for k, v in y.items()},
+    )
+
+
+def _merge_status(statuts: List[int]) -> int:
+    if all(s == pulp.LpStatusOptimal for s in statuts):
+        return pulp.LpStatusOptimal
+    if any(s == pulp.LpStatusInfeasible for s in statuts):
+        return pulp.LpStatusInfeasible
+    if all(has_solution(s) for s in statuts):
+        return LpStatusFeasible
+    return pulp.LpStatusNotSolved
+
+
+def solve_blocks(
+    blocs: List[Dict[str, Any]],
+    inst: DispatchInstance,
+    solo_cost,
+    combo_cost: Dict[Tuple[Any, Any, Any], float],
+    time_limit: float,
+    solve_fn: Callable,
+    backend=None,
+    warm_start: Optional[Dict[Any, List[Dict[str, Any]]]] = None,
+    workers: int = 1
+) -> Tuple[int, Dict, Dict]:
+    """
+    Résout chaque bloc avec ``solve_fn`` (``solve_MILP``), en parallèle sur
+    ``workers`` processus, et fusionne les solutions.
+
+    Chaque bloc ne voit que ses groupes, ses chauffeurs (avec leur
+    réservation ``max_missions``) et ses coûts. Le temps est réparti au
+    prorata des variables, en tenant compte des blocs résolus en parallèle ;
+    les threads du solveur sont partagés entre les workers.
+
+    Returns:
+        (statut fusionné, x, y) avec des valeurs numériques, directement
+        utilisables par ``extract_assignments``.
+    """
+    total = sum(b['variables'] for b in blocs) or 1
+    workers = max(1, min(workers, len(blocs)))
+    if backend is not None and workers > 1:
+        # même backend (écarts, stagnation), threads partagés entre les workers
+        backend = copy.copy(backend)
+        backend.threads = max(1, backend.threads // workers)
+
+    # coûts répartis par bloc en une passe (les chauffeurs sans réservation sont écartés)
+    bloc_de = {gid: b for b, bloc in enumerate(blocs) for gid in bloc['groupes']}
+    solos: List[Dict] = [{} for _ in blocs]
+    combos: List[Dict] = [{} for _ in blocs]
+    for k in solo_cost:
+        b = bloc_de.get(k[0])
+        if b is not None and k[1] in blocs[b]['chauffeurs']:
+            solos[b][k] = solo_cost[k]
+    for k, v in combo_cost.items():
+        b = bloc_de.get(k[0])
+        if b is not None and k[2] in blocs[b]['chauffeurs']:
+            combos[b][k] = v
+
+    taches = []
+    for bloc, solo, combo in zip(blocs, solos, combos):
+        groupes = [inst.groupe(gid) for gid in bloc['groupes']]
+        chauffeurs = [{**inst.chauffeur(cid), 'max_missions': n} for cid, n in bloc['chauffeurs'].items()]
+        gids, cids = bloc['groupes'], bloc['chauffeurs']
+        depart = None
+        if warm_start:
+            depart = {gid: [a for a in warm_start.get(gid, []) if a['chauffeur'] in cids] for gid in gids}
+        limite = min(time_limit, max(1.0, time_limit * workers * bloc['variables'] / total))
+        taches.append((
+            (groupes, chauffeurs, solo, combo, limite),
+            {'backend': backend, 'warm_start': depart}
+        ))
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            resultats = list(pool.map(_solve_block, [solve_fn] * len(taches), *zip(*taches)))
+    else:
+        resultats = [_solve_block(solve_fn, args, kwargs) for args, kwargs in taches]
+
+    x, y = {}, {}
+    for _, xb, yb in resultats:
+        x.update(xb)
+        y.update(yb)
+    status = _merge_status([r[0] for r in resultats])
+    if status == pulp.LpStatusOptimal and any(b.get('partage') for b in blocs):
+        # budget de missions partagé au prorata : chaque bloc est optimal pour sa part seulement
+        status = LpStatusFeasible
+    logger.info(f"{len(blocs)} blocs résolus sur {workers} processus - statut {status_name(status)}")
+    return status, x, y
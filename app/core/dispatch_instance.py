@@ -0,0 +1,86 @@
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _column(rows: List[Dict[str, Any]], key: str, default: Any = np.nan) -> np.ndarray:
+    return np.array([default if row.get(key) is None else row.get(key) for row in rows], dtype=float)
+
+
+class DispatchInstance:
+    """
+    Représentation compacte d'un problème de dispatch.
+
+    Les groupes et les chauffeurs reçoivent un indice entier (ordre des
+    listes d'origine) ; les attributs utilisés par le solveur sont stockés
+    en colonnes NumPy et les correspondances id ↔ indice sont des dicts,
+    ce qui remplace les ``next(g for g in groupes if g['id'] == ...)``
+    des boucles imbriquées par des accès O(1).
+
+    Les lignes d'origine restent accessibles (``groupe(id)``,
+    ``chauffeur(id)``) pour les rapports et la sauvegarde.
+    """
+
+    def __init__(self, groupes: List[Dict[str, Any]], chauffeurs: List[Dict[str, Any]]):
+        self.groupes = groupes
+        self.chauffeurs = chauffeurs
+
+        # Groupes
+        self.group_ids = [g['id'] for g in groupes]
+        self.group_index = {gid: i for i, gid in enumerate(self.group_ids)}
+        self.t_min = _column(groupes, 't_min')
+        self.ng = _column(groupes, 'ng', 0).astype(int)
+        self.duree = _column(groupes, 'duree_trajet_min')
+        self.lat_pickup = _column(groupes, 'lat_pickup')
+        self.lng_pickup = _column(groupes, 'long_pickup')
+        self.lat_dest = _column(groupes, 'dest_lat')
+        self.lng_dest = _column(groupes, 'dest_lng')
+
+        # Chauffeurs (ou classes de chauffeurs, cf. driver_classes)
+        self.driver_ids = [c['id'] for c in chauffeurs]
+        self.driver_index = {cid: j for j, cid in enumerate(self.driver_ids)}
+        self.n = _column(chauffeurs, 'n', 0).astype(int)
+        self.size = _column(chauffeurs, 'size', 1).astype(int)
+        # missions autorisées : 4 par chauffeur, ou une réservation posée par la décomposition
+        self.max_missions = _column(chauffeurs, 'max_missions', np.nan)
+        self.max_missions = np.where(np.isnan(self.max_missions), 4 * self.size, self.max_missions).astype(int)
+        self.lat_chauff = _column(chauffeurs, 'lat_chauff')
+        self.lng_chauff = _column(chauffeurs, 'long_chauff')
+
+    @property
+    def nb_groupes(self) -> int:
+        return len(self.group_ids)
+
+    @property
+    def nb_chauffeurs(self) -> int:
+        return len(self.driver_ids)
+
+    def groupe(self, gid) -> Dict[str, Any]:
+        return self.groupes[self.group_index[gid]]
+
+    def chauffeur(self, cid) -> Optional[Dict[str, Any]]:
+        j = self.driver_index.get(cid)
+        return None if j is None else self.chauffeurs[j]
+
+    def ng_of(self, gid) -> int:
+        return int(self.ng[self.group_index[gid]])
+
+    def t_min_of(self, gid) -> float:
+        return float(self.t_min[self.group_index[gid]])
+
+    def capacity_of(self, cid) -> int:
+        return int(self.n[self.driver_index[cid]])
+
+    def size_of(self, cid) -> int:
+        return int(self.size[self.driver_index[cid]])
+
+    def subset(self, groupes: List[Dict[str, Any]]) -> "DispatchInstance":
+        """Instance restreinte à un sous-ensemble de groupes (mêmes chauffeurs)."""
+        return DispatchInstance(groupes, self.chauffeurs)
+
+    def covered_capacity(self, assign: Dict[Any, List[Dict[str, Any]]], gid) -> int:
+        """Places fournies à un groupe par ses affectations."""
+        return sum(self.capacity_of(a['chauffeur']) for a in assign.get(gid, []))
@@ -18,8 +18,30 @@ from app.core.utils import generate_address_hash, save_and_upload_to_drive
 from decimal import Decimal  # Ensure this import exists at the top of the file
 import json
 from app.core.chauffeur_processor import ChauffeurProcessor
-from app.core.course_groupe_processor import CourseGroupeProcessor  
+from app.core.course_groupe_processor import CourseGroupeProcessor
 from app.core.config import settings
+from app.core.cost_matrix import compute_solo_cost_matrix, compute_combo_costs
+from app.core.cost_cache import LegCostCache
+from app.core.parallel_costs import compute_combo_costs_parallel
+from app.core.combo_candidates import iter_combo_candidates, prune_combo_costs
+from app.core.capacity_rules import capacity_mask, combo_allowed, filter_combo_costs, solo_allowed
+from app.core.driver_classes import build_driver_classes, expand_class_assignments
+from app.core.dispatch_instance import DispatchInstance
+from app.core.availability import availability_mask, merge_driver_availabilities
+from app.core.driver_candidates import nearest_driver_mask
+from app.core.overlap_cliques import overlap_cliques
+from app.core.milp_matrix import MilpMatrix, build_milp_matrix
+from app.core.flow_model import build_flow_matrix
+from app.core.lazy_overlap import resolve_lazy_overlap
+from app.core.complement import committed_values, complement_matrix, complement_pulp
+from app.core.symmetry import identical_drivers, log_symmetry, order_start, symmetry_pairs, symmetry_rows
+from app.core.lp_preview import solve_lp_preview
+from app.core.alns import AlnsSearch
+from app.core.solver_progress import publish_model, publish_stage
+from app.core.stop_criteria import TimeBudget
+from app.core.milp_backend import LpStatusFeasible, MilpBackend, get_backend, has_solution, problem_status, status_name
+from app.core.decomposition import interaction_blocks, solve_blocks
+from app.core.rolling_horizon import solve_rolling_horizon
 from app.core.geocoding import geocoding_service
 
 
@@ -57,10 +79,6 @@ async def geocode_address(address: str, postal_code: str = None) -> Tuple[float,
         logger.error(f"Échec du géocodage pour {address}: {e}")
         raise ValueError(f"Impossible de géocoder l'adresse: {address}")
 
-def is_finite_coordinate(*coords):
-    """Vérifie que toutes les coordonnées sont définies."""
-    return all(pd.notnull(c) for c in coords)
-
 def haversine(lat1, lon1, lat2, lon2):
     """Calcule la distance en kilomètres entre deux points géographiques."""
     R = 6371.0
@@ -71,46 +89,6 @@ def haversine(lat1, lon1, lat2, lon2):
     c = 2 * math.asin(math.sqrt(a))
     return R * c
 
-def travel_time_single(chauffeur, groupe):
-    """Calcule le temps de trajet ou échoue explicitement"""
-    try:
-        if not is_finite_coordinate(chauffeur['lat_chauff'], chauffeur['long_chauff'],
-                                    groupe['lat_pickup'], groupe['long_pickup'],
-                                    groupe['dest_lat'], groupe['dest_lng']):
-            raise ValueError("Coordonnées invalides")
-        t1 = round(geodesic((chauffeur['lat_chauff'], chauffeur['long_chauff']),
-                            (groupe['lat_pickup'], groupe['long_pickup'])).kilometers)
-        t2 = round(groupe['duree_trajet_min'])
-        t3 = round(geodesic((groupe['dest_lat'], groupe['dest_lng']),
-                            (chauffeur['lat_chauff'], chauffeur['long_chauff'])).kilometers)
-        return t1 + t2 + t3
-    except Exception as e:
-        logger.error(f"Erreur de calcul pour {groupe['id']}: {e}")
-        raise
-
-def combined_route_cost(chauffeur, g1, g2):
-    if abs(g1['t_min'] - g2['t_min']) > 45:
-        return None
-    D = (chauffeur['lat_chauff'], chauffeur['long_chauff'])
-    C1 = (g1['lat_pickup'], g1['long_pickup'])
-    C2 = (g2['lat_pickup'], g2['long_pickup'])
-    A1 = (g1['dest_lat'], g1['dest_lng'])
-    A2 = (g2['dest_lat'], g2['dest_lng'])
-    Tsolo1 = travel_time_single(chauffeur, g1)
-    Tsolo2 = travel_time_single(chauffeur, g2)
-    def t(p, q): return round(geodesic(p, q).kilometers)
-    routes = [
-        (t(D,C1), t(C1,C2), t(C2,A1), t(A1,A2), t(A2,D)),
-        (t(D,C1), t(C1,C2), t(C2,A2), t(A2,A1), t(A1,D)),
-        (t(D,C2), t(C2,C1), t(C1,A1), t(A1,A2), t(A2,D)),
-        (t(D,C2), t(C2,C1), t(C1,A2), t(A2,A1), t(A1,D)),
-    ]
-    feasible = []
-    for route in routes:
-        # on suppose admissible
-        feasible.append(sum(route))
-    return min(feasible) if feasible else None
-
 # =============================================================================
 # Lecture et préparation des données (version PostgresDataSource)
 # =============================================================================
@@ -129,7 +107,9 @@ async def prepare_demandes(ds: PostgresDataSource, date_begin: Optional[str] = N
             ag_dest.longitude as dest_lng,
             c.date_heure_prise_en_charge,
             EXTRACT(EPOCH FROM (c.date_heure_prise_en_charge - NOW()))/60 as t_min,
-            cc.duree_trajet_min
+            cc.duree_trajet_min,
+            c.hash_lieu_prise_en_charge,
+            c.hash_destination
         FROM courseGroupe c
         JOIN adresseGps ag_pickup ON c.hash_lieu_prise_en_charge = ag_pickup.hash_address
         JOIN adresseGps ag_dest ON c.hash_destination = ag_dest.hash_address
@@ -295,7 +275,8 @@ async def prepare_chauffeurs(
                   'availability_date', 'availability_date_end', 'hash_adresse']
         rows = [dict(zip(columns, row)) for row in rows]
     
-    return rows
+    # Une ligne par disponibilité : on regroupe les fenêtres par chauffeur
+    return merge_driver_availabilities(rows)
 # async def prepare_chauffeurs(ds: PostgresDataSource, date_begin: Optional[str] = None, date_end: Optional[str] = None):
 #     """Récupère et prépare les chauffeurs disponibles pour une période donnée"""
 #     query = """
@@ -345,112 +326,213 @@ async def prepare_chauffeurs(
 # =============================================================================
 # Fonction pour construire et résoudre le modèle MILP
 # =============================================================================
-def solve_MILP(groupes, chauffeurs, solo_cost, combo_cost, time_limit):
+def solve_MILP(groupes, chauffeurs, solo_cost, combo_cost, time_limit, instance=None, backend: Optional[MilpBackend]=None, warm_start=None):
     
-    """Résolution du problème MILP avec logs."""
+    """
+    Résolution du problème MILP avec logs (backend : cf. milp_backend, défaut selon la configuration).
+    ``warm_start`` : affectations (format ``heuristic_solution``) passées au solveur comme solution de départ.
+    """
     logger.info(f"Début de la résolution MILP avec une limite de temps de {time_limit} secondes")
     logger.info(f"Nombre de groupes : {len(groupes)}, Nombre de chauffeurs : {len(chauffeurs)}")
     
     try:    
-        group_ids = {g['id'] for g in groupes}
+        inst = instance if instance is not None else DispatchInstance(groupes, chauffeurs)
+        if backend is None:
+            backend = get_backend(
+                settings.MILP_SOLVER, settings.MILP_THREADS, settings.MILP_GAP_REL,
+                settings.MILP_GAP_ABS, settings.MILP_STALL_TIME_S
+            )
+        logger.info(f"Solveur MILP : {backend}")
+        gidx, cidx = inst.group_index, inst.driver_index
+        # solution de départ : valeurs des variables solo et combo
+        depart = committed_values(warm_start, combo_cost.keys()) if warm_start else None
+        debut = time.perf_counter()
+        # chauffeurs identiques : une seule de leurs permutations est conservée
+        classes = identical_drivers(inst, solo_cost, combo_cost) if settings.MILP_SYMMETRY_BREAKING else []
+        if classes:
+            log_symmetry(inst, classes)
+            if depart is not None:
+                depart = order_start(*depart, inst, classes)
+        if settings.MILP_BUILDER == "lazy":
+            # modèle relâché, cliques de non-chevauchement ajoutées à la demande
+            modele = build_milp_matrix(inst, solo_cost, combo_cost, cliques=False)
+            lignes, coefs = symmetry_rows(modele, inst, classes)
+            modele.add_rows(lignes, [0] * len(lignes), coefs)
+            status, values = resolve_lazy_overlap(
+                modele, inst, time_limit, backend, None if depart is None else modele.values_from(*depart)
+            )
+            logger.info(f"Modèle à coupes paresseuses résolu en {time.perf_counter() - debut:.2f}s")
+            x, y = modele.split_values(values)
+            return modele, status, x, y
+        if settings.MILP_BUILDER in ("matrix", "flow"):
+            # matrice creuse passée directement au solveur, sans expressions PuLP
+            # (flow : formulation en réseau espace-temps, cf. flow_model)
+            construire = build_flow_matrix if settings.MILP_BUILDER == "flow" else build_milp_matrix
+            modele = construire(inst, solo_cost, combo_cost)
+            lignes, coefs = symmetry_rows(modele, inst, classes)
+            modele.add_rows(lignes, [0] * len(lignes), coefs)
+            logger.info(f"Modèle matriciel construit en {time.perf_counter() - debut:.2f}s")
+            publish_model(modele.nb_cols, modele.nb_rows, groupes=inst.nb_groupes)
+            status, values = backend.solve_matrix(
+                modele, time_limit, None if depart is None else modele.values_from(*depart)
+            )
+            x, y = modele.split_values(values)
+            return modele, status, x, y
+        # taille > 1 : classe de chauffeurs équivalents, variables entières (cf. driver_classes)
+        def var(name, j):
+            if inst.size[j] > 1:
+                return pulp.LpVariable(name,0,int(inst.size[j]),pulp.LpInteger)
+            return pulp.LpVariable(name,0,1,pulp.LpBinary)
         prob = pulp.LpProblem("Affectation", pulp.LpMinimize)
         x,y = {},{}
-        # solo
-        for g in groupes:
-            for c in chauffeurs:
-                if (g['id'],c['id']) in solo_cost:
-                    x[(g['id'],c['id'])] = pulp.LpVariable(f"x_{g['id']}_{c['id']}",0,1,pulp.LpBinary)
+        # variables indexées par groupe et par chauffeur (indices entiers de l'instance)
+        x_by_group=[[] for _ in range(inst.nb_groupes)]
+        y_by_group=[[] for _ in range(inst.nb_groupes)]
+        tasks_by_driver=[[] for _ in range(inst.nb_chauffeurs)]
+        # solo (règles de capacité appliquées avant la création des variables)
+        for i,gid in enumerate(inst.group_ids):
+            for j,cid in enumerate(inst.driver_ids):
+                if (gid,cid) in solo_cost and solo_allowed(inst.ng[i],inst.n[j]):
+                    v = x[(gid,cid)] = var(f"x_{gid}_{cid}",j)
+                    x_by_group[i].append((j,v))
+                    s=inst.t_min[i];f=s+solo_cost[(gid,cid)]
+                    tasks_by_driver[j].append((s,f,v))
         # combo filtré
         for (g1,g2,c),cost in combo_cost.items():
-            if g1 in group_ids and g2 in group_ids:
-                y[(g1,g2,c)] = pulp.LpVariable(f"y_{g1}_{g2}_{c}",0,1,pulp.LpBinary)
+            if g1 in gidx and g2 in gidx and c in cidx:
+                i1,i2,j=gidx[g1],gidx[g2],cidx[c]
+                if not combo_allowed(inst.ng[i1],inst.ng[i2],inst.n[j]):
+                    continue
+                v = y[(g1,g2,c)] = var(f"y_{g1}_{g2}_{c}",j)
+                y_by_group[i1].append((j,v)); y_by_group[i2].append((j,v))
+                s=min(inst.t_min[i1],inst.t_min[i2]);f=s+cost
+                tasks_by_driver[j].append((s,f,v))
         # objectif
         prob += pulp.lpSum([solo_cost[k]*v for k,v in x.items()]+[combo_cost[k]*v for k,v in y.items()])
         # couverture
-        cap={c['id']:c['n'] for c in chauffeurs}
-        for g in groupes:
-            soloCap = pulp.lpSum(c['n']*x[(g['id'],c['id'])] for c in chauffeurs if (g['id'],c['id']) in x)
-            comboCap = pulp.lpSum(0.5*cap[k[2]]*v for k,v in y.items() if g['id'] in k[:2])
-            prob += soloCap+comboCap>=g['ng']
+        for i in range(inst.nb_groupes):
+            soloCap = pulp.lpSum(int(inst.n[j])*v for j,v in x_by_group[i])
+            comboCap = pulp.lpSum(0.5*inst.n[j]*v for j,v in y_by_group[i])
+            prob += soloCap+comboCap>=int(inst.ng[i]), f"couverture_{i}"
         # non-chevauchement + max4
-        for c in chauffeurs:
-            tasks=[]
-            for g in groupes:
-                if (g['id'],c['id']) in x:
-                    s=g['t_min'];f=s+solo_cost[(g['id'],c['id'])]
-                    tasks.append((s,f,x[(g['id'],c['id'])]))
-            for (g1,g2,cc),v in y.items():
-                if cc==c['id']:
-                    gA=next(g for g in groupes if g['id']==g1)
-                    gB=next(g for g in groupes if g['id']==g2)
-                    s=min(gA['t_min'],gB['t_min']);f=s+combo_cost[(g1,g2,cc)]
-                    tasks.append((s,f,v))
-            for i in range(len(tasks)):
-                for j in range(i+1,len(tasks)):
-                    if tasks[i][0]<tasks[j][1] and tasks[j][0]<tasks[i][1]:
-                        prob += tasks[i][2]+tasks[j][2]<=1
-            prob += pulp.lpSum(t[2] for t in tasks)<=4
-        # capacité faible
-        for g in groupes:
-            if g['ng']<=4:
-                for c in chauffeurs:
-                    if c['n']>4 and (g['id'],c['id']) in x:
-                        prob += x[(g['id'],c['id'])]==0
-        # combo faible
-        for (g1,g2,c),v in y.items():
-            gA=next(g for g in groupes if g['id']==g1)
-            gB=next(g for g in groupes if g['id']==g2)
-            if (gA['ng']<=3 or gB['ng']<=3) and next(ch for ch in chauffeurs if ch['id']==c)['n']>4:
-                prob += v==0
-        solver = pulp.PULP_CBC_CMD(timeLimit=time_limit,msg=False)
-        status=prob.solve(solver)
-        return prob,status,x,y
+        for j in range(inst.nb_chauffeurs):
+            tasks=tasks_by_driver[j]
+            size=int(inst.size[j])
+            # une contrainte par clique maximale de missions qui se chevauchent
+            # (au plus `size` missions simultanées pour une classe, 1 sinon)
+            for clique in overlap_cliques([(t[0],t[1]) for t in tasks], min_size=size+1):
+                prob += pulp.lpSum(tasks[k][2] for k in clique)<=size
+            prob += pulp.lpSum(t[2] for t in tasks)<=int(inst.max_missions[j])
+        # ordre des chauffeurs identiques : missions(j) >= missions(j')
+        for a,b in symmetry_pairs(classes):
+            prob += pulp.lpSum(t[2] for t in tasks_by_driver[a])>=pulp.lpSum(t[2] for t in tasks_by_driver[b]), f"symetrie_{a}"
+        logger.info(f"Modèle PuLP construit en {time.perf_counter() - debut:.2f}s")
+        publish_model(prob.numVariables(), prob.numConstraints(), groupes=inst.nb_groupes)
+        if depart is not None:
+            for k,v in x.items():
+                v.setInitialValue(depart[0].get(k,0))
+            for k,v in y.items():
+                v.setInitialValue(depart[1].get(k,0))
+        prob.solve(backend.pulp_solver(time_limit, warm_start=depart is not None))
+        return prob,problem_status(prob),x,y
     
     except Exception as e:
         logger.error(f"Erreur lors de la résolution MILP : {e}")
         raise
 
+def solve_MILP_decompose(groupes, chauffeurs, solo_cost, combo_cost, time_limit, instance=None, backend: Optional[MilpBackend]=None, warm_start=None):
+    """
+    ``solve_MILP`` appliqué bloc par bloc (composantes indépendantes, cf.
+    decomposition), en parallèle sur ``DECOMPOSITION_WORKERS`` processus.
+    Même retour que ``solve_MILP`` (sans objet modèle).
+    """
+    inst = instance if instance is not None else DispatchInstance(groupes, chauffeurs)
+    blocs = interaction_blocks(inst, solo_cost, combo_cost)
+    if len(blocs) <= 1:
+        return solve_MILP(groupes, chauffeurs, solo_cost, combo_cost, time_limit, instance=inst, backend=backend, warm_start=warm_start)
+    status, x, y = solve_blocks(
+        blocs, inst, solo_cost, combo_cost, time_limit, solve_MILP,
+        backend=backend, warm_start=warm_start, workers=settings.DECOMPOSITION_WORKERS
+    )
+    return None, status, x, y
+
+def solve_MILP_rolling(groupes, chauffeurs, solo_cost, combo_cost, time_limit, instance=None, backend: Optional[MilpBackend]=None, warm_start=None):
+    """
+    Horizon glissant (cf. rolling_horizon) : tranches de ``HORIZON_SLICE_MIN``
+    minutes recouvertes de ``HORIZON_OVERLAP_MIN``, chacune résolue par
+    ``solve_MILP_decompose`` ou ``solve_MILP``. Même retour que ``solve_MILP``.
+    """
+    inst = instance if instance is not None else DispatchInstance(groupes, chauffeurs)
+    resoudre = solve_MILP_decompose if settings.DECOMPOSITION_ENABLED else solve_MILP
+    if not inst.nb_groupes or inst.t_min.max() - inst.t_min.min() < settings.HORIZON_SLICE_MIN:
+        return resoudre(groupes, chauffeurs, solo_cost, combo_cost, time_limit, instance=inst, backend=backend, warm_start=warm_start)
+    status, x, y = solve_rolling_horizon(
+        inst, solo_cost, combo_cost, time_limit, resoudre,
+        settings.HORIZON_SLICE_MIN, settings.HORIZON_OVERLAP_MIN, backend=backend, warm_start=warm_start
+    )
+    return None, status, x, y
+
+def solve_MILP_complement(prob, x, y, groupes, chauffeurs, solo_cost, combo_cost, assign, non_couverts, time_limit, instance=None, backend: Optional[MilpBackend]=None):
+    """
+    Seconde passe sur les groupes non couverts, sur le modèle de la passe
+    principale (cf. complement) : affectations de ``assign`` fixées,
+    couverture des ``non_couverts`` pénalisée plutôt qu'imposée. Sans modèle
+    unique (décomposition, horizon glissant), le modèle matriciel de toute
+    l'instance est construit une fois.
+
+    Returns:
+        (modèle, statut, x, y) : la solution contient toutes les affectations,
+        retenues et nouvelles (même format que ``solve_MILP``).
+    """
+    inst = instance if instance is not None else DispatchInstance(groupes, chauffeurs)
+    if backend is None:
+        backend = get_backend(
+            settings.MILP_SOLVER, settings.MILP_THREADS, settings.MILP_GAP_REL,
+            settings.MILP_GAP_ABS, settings.MILP_STALL_TIME_S
+        )
+    ids = [g['id'] for g in non_couverts]
+    logger.info(f"Seconde passe sur le modèle principal : {len(ids)} groupes non couverts, limite {time_limit:.0f}s")
+    if prob is None:
+        prob = build_milp_matrix(inst, solo_cost, combo_cost)
+    if isinstance(prob, MilpMatrix):
+        depart = complement_matrix(prob, inst, assign, ids)
+        publish_model(prob.nb_cols, prob.nb_rows, groupes=len(ids), complementaire=True)
+        if getattr(prob, 'cliques', True):
+            status, values = backend.solve_matrix(prob, time_limit, depart)
+        else:
+            status, values = resolve_lazy_overlap(prob, inst, time_limit, backend, depart)
+        x, y = prob.split_values(values)
+        return prob, status, x, y
+    complement_pulp(prob, x, y, inst, assign, ids)
+    publish_model(prob.numVariables(), prob.numConstraints(), groupes=len(ids), complementaire=True)
+    prob.solve(backend.pulp_solver(time_limit, warm_start=True))
+    return prob, problem_status(prob), x, y
+
 # =============================================================================
 # Méthode heuristique par recuit simulé
 # =============================================================================
-def heuristic_solution(groupes, chauffeurs, solo_cost, combo_cost, existing=None):
+def heuristic_solution(groupes, chauffeurs, solo_cost, combo_cost, existing=None, time_limit=None):
     """
-    Recuit simulé pour générer une solution admissible.
-    Pour simplifier, ici on construit initialement des affectations solo (en respectant non-chevauchement et max 4 missions)
-    puis on applique un recuit sur l'ensemble des groupes (ou uniquement sur ceux non couverts si existing_assignments est fourni).
+    Solution heuristique par recherche adaptative à grand voisinage (cf. alns) :
+    construction gloutonne puis destructions / réparations (solo et combos)
+    acceptées par recuit simulé, dans la limite de ``time_limit`` secondes
+    (``ALNS_TIME_LIMIT_S`` par défaut).
+    Les affectations ``existing`` sont conservées ; la recherche complète les groupes sous-couverts.
     """
     
-    logger.info("Début de la solution heuristique par recuit simulé")
+    logger.info("Début de la solution heuristique (ALNS)")
     logger.info(f"Nombre de groupes à traiter : {len(groupes)}")
     logger.info(f"Nombre de chauffeurs disponibles : {len(chauffeurs)}")
     try:
-        if existing is None:
-            assign={}
-            to_proc=groupes
-        else:
-            assign={**existing}
-            to_proc=[g for g in groupes if g['id'] not in assign or not assign[g['id']]]
-        sched={c['id']:[] for c in chauffeurs}
-        cnt={c['id']:0 for c in chauffeurs}
-        for g in sorted(to_proc, key=lambda g:g['t_min']):
-            remaining=g['ng']
-            # tri chauffeurs efficients
-            for c in sorted(chauffeurs, key=lambda c:-c['n']):
-                if remaining<=0: break
-                if cnt[c['id']]>=4: continue
-                if g['ng']<=4 and c['n']>4: continue
-                if (g['id'],c['id']) not in solo_cost: continue
-                st=g['t_min'];fi=st+solo_cost[(g['id'],c['id'])]
-                if any(not(fi<=s or st>=f) for s,f in sched[c['id']]): continue
-                # affecter
-                assign.setdefault(g['id'],[]).append({"chauffeur":c['id'],"trajet":"simple"})
-                sched[c['id']].append((st,fi))
-                cnt[c['id']]+=1
-                remaining -= c['n']
-        return assign
+        recherche = AlnsSearch(DispatchInstance(groupes, chauffeurs), solo_cost, combo_cost, fixes=existing)
+        recherche.run(
+            settings.ALNS_TIME_LIMIT_S if time_limit is None else time_limit,
+            settings.ALNS_MAX_ITERATIONS
+        )
+        return recherche.assignments()
 
     except Exception as e:
-        logger.error(f"Erreur lors de l'exécution du recuit simulé : {e}")
+        logger.error(f"Erreur lors de la recherche ALNS : {e}")
         raise
 
 
@@ -461,26 +543,30 @@ def extract_assignments(groupes, chauffeurs, x, y):
     # Générer un timestamp unique pour cette session
     session_timestamp = int(time.time())
     
-    # Affectations solo
-    for g in groupes:
-        for c in chauffeurs:
-            if (g['id'], c['id']) in x and pulp.value(x[(g['id'], c['id'])]) > 0.5:
-                assignments.setdefault(g['id'], []).append({
-                    "chauffeur": c['id'],
-                    "trajet": "simple",
-                    "combo_id": None,
-                    "combiné_avec": []
-                })
+    # Nombre de chauffeurs affectés par variable (> 1 pour une classe de chauffeurs)
+    def count(var):
+        return int(round(pulp.value(var) or 0))
+
+    # Affectations solo (x est indexé par (groupe, chauffeur), parcours direct)
+    solo_assignments = 0
+    for (g_id, c_id), var in x.items():
+        n_affectes = count(var)
+        solo_assignments += n_affectes
+        for _ in range(n_affectes):
+            assignments.setdefault(g_id, []).append({
+                "chauffeur": c_id,
+                "trajet": "simple",
+                "combo_id": None,
+                "combiné_avec": []
+            })
     
     # Log solo assignments
-    solo_assignments = sum(1 for g in groupes for c in chauffeurs 
-                          if (g['id'], c['id']) in x and pulp.value(x[(g['id'], c['id'])]) > 0.5)
     logger.info(f"Solo assignments found: {solo_assignments}")
 
     # Affectations combinées
     combo_counter = 1  # Un compteur pour créer des identifiants uniques
     for (g1_id, g2_id, c_id), var in y.items():
-        if pulp.value(var) > 0.5:
+        for _ in range(count(var)):
             # Créer un ID unique avec timestamp
             combo_id = f"combo_{session_timestamp}_{combo_counter}"
             combo_counter += 1
@@ -502,8 +588,7 @@ def extract_assignments(groupes, chauffeurs, x, y):
             })
     
     # Log combo assignments
-    combo_assignments = sum(1 for (g1_id, g2_id, c_id), var in y.items() 
-                           if pulp.value(var) > 0.5)
+    combo_assignments = sum(count(var) for var in y.values())
     logger.info(f"Combo assignments found: {combo_assignments}")
     
     return assignments
@@ -531,19 +616,89 @@ def groupes_non_couverts(assignments, groupes):
 # Intégration dans le flux principal
 # =============================================================================
 
+def build_combo_costs(solo_cost, groupes, chauffeurs):
+    """
+    Coûts des trajets combinés à partir de la matrice solo (séquentiel ou
+    multi-processus selon ``COST_WORKERS``), puis élagage des combos inutiles.
+    """
+    logger.debug("Calcul des coûts combinés...")
+    combo_cost = {}
+    if settings.COST_WORKERS > 1:
+        combo_cost = compute_combo_costs_parallel(
+            solo_cost, groupes, chauffeurs, settings.COMBO_TOLERANCE_MIN, settings.COST_WORKERS
+        )
+    else:
+        for g1, g2, eligibles in iter_combo_candidates(groupes, chauffeurs, settings.COMBO_TOLERANCE_MIN):
+            combo_cost.update(compute_combo_costs(solo_cost, g1, g2, eligibles))
+
+    logger.info(f"→ {len(solo_cost)} coûts solo et {len(combo_cost)} coûts combinés calculés")
+
+    combo_cost = filter_combo_costs(combo_cost, groupes, chauffeurs)
+
+    if settings.COMBO_PRUNING_ENABLED:
+        combo_cost, pruning_stats = prune_combo_costs(combo_cost, solo_cost, settings.COMBO_MAX_DETOUR_RATIO)
+        logger.info(f"→ {pruning_stats['initial'] - pruning_stats['restants']} variables combo retirées du modèle")
+    return combo_cost
+
+
 async def solve_dispatch_problem(
     ds: PostgresDataSource, 
     date_begin: Optional[str] = None,
     date_end: Optional[str] = None,
     milp_time_limit: int = 300,  # Paramètre configurable pour le timeout MILP
-    use_salle_address: bool = False
+    use_salle_address: bool = False,
+    solver: Optional[str] = None,  # cbc | highs (défaut : MILP_SOLVER)
+    solver_threads: Optional[int] = None,  # 0 = tous les cœurs (défaut : MILP_THREADS)
+    solver_gap: Optional[float] = None,  # écart relatif d'arrêt (défaut : MILP_GAP_REL)
+    solver_gap_abs: Optional[float] = None,  # écart absolu d'arrêt (défaut : MILP_GAP_ABS)
+    solver_stall: Optional[float] = None,  # secondes sans amélioration avant arrêt (défaut : MILP_STALL_TIME_S)
+    time_budget: Optional[float] = None,  # budget de temps global en secondes (défaut : DISPATCH_TIME_BUDGET_S)
+    mode: str = "full"  # full | preview (relaxation LP arrondie, sans sauvegarde ni rapports)
 ) -> Dict[str, List[Dict[str, Any]]]:
     """
     Résout le problème de dispatch en utilisant d'abord MILP, puis recuit simulé si nécessaire.
+
+    ``mode="preview"`` : aperçu rapide (faisabilité, taille de flotte) par
+    relaxation continue arrondie (cf. lp_preview). Rien n'est écrit en
+    base ni envoyé sur Drive ; le résumé (borne LP, écart d'arrondi,
+    groupes non couverts) est journalisé et publié avec l'étape finale.
+
+    Sans budget global, chaque résolution dispose de ``milp_time_limit``
+    secondes. Avec un budget, la résolution principale, la résolution
+    complémentaire et les heuristiques se le partagent (cf.
+    stop_criteria.TimeBudget), ``milp_time_limit`` restant le plafond d'une
+    résolution.
     """
     start_time = time.perf_counter()
     logger.info("=== DÉBUT DU DISPATCH ===")
     logger.info(f"Paramètres - Date début: {date_begin}, Date fin: {date_end}, Timeout MILP: {milp_time_limit}s")
+    backend = get_backend(
+        solver or settings.MILP_SOLVER,
+        settings.MILP_THREADS if solver_threads is None else solver_threads,
+        settings.MILP_GAP_REL if solver_gap is None else solver_gap,
+        settings.MILP_GAP_ABS if solver_gap_abs is None else solver_gap_abs,
+        settings.MILP_STALL_TIME_S if solver_stall is None else solver_stall
+    )
+    time_budget = settings.DISPATCH_TIME_BUDGET_S if time_budget is None else time_budget
+    budget = None
+    if time_budget and time_budget > 0:
+        budget = TimeBudget(time_budget, {
+            "milp": settings.BUDGET_PART_MILP,
+            "complementaire": settings.BUDGET_PART_COMPLEMENTAIRE,
+            "heuristique": settings.BUDGET_PART_HEURISTIQUE,
+        })
+        logger.info(f"Budget de temps global : {time_budget}s")
+
+    def limite(etape):
+        return budget.allot(etape, milp_time_limit) if budget is not None else milp_time_limit
+
+    def limite_heuristique():
+        # recherche ALNS : prise sur le budget, plafonnée par ALNS_TIME_LIMIT_S
+        return min(limite("heuristique"), settings.ALNS_TIME_LIMIT_S)
+
+    def limite_depart(nb_groupes):
+        # simple point de départ du MILP : recherche courte, proportionnelle à l'instance
+        return min(limite_heuristique(), settings.ALNS_WARM_START_S_PER_GROUP * nb_groupes)
     
     # Configurer l'export
     FOLDER_ID = os.getenv('GOOGLE_DRIVE_FOLDER_ID')
@@ -554,6 +709,7 @@ async def solve_dispatch_problem(
     try:
         # 1. Récupération des données
         logger.info("Étape 1/4: Récupération des données...")
+        publish_stage("donnees")
         groupes = await prepare_demandes(ds, date_begin, date_end)
         if not groupes:
             logger.info("Aucun groupe de courses valide à dispatcher. Dispatch non lancé.")
@@ -566,70 +722,130 @@ async def solve_dispatch_problem(
             return {}
         logger.info(f"→ {len(chauffeurs)} chauffeurs disponibles récupérés")
 
+        # Avec l'adresse de la salle, les chauffeurs ne diffèrent que par leur capacité :
+        # le modèle travaille sur des classes d'équivalence, réexpansées avant la sauvegarde
+        chauffeurs_concrets = chauffeurs
+        if use_salle_address:
+            chauffeurs = build_driver_classes(chauffeurs)
+
         # 2. Calcul des coûts
         logger.info("Étape 2/4: Calcul des coûts...")
-        solo_cost = {}
-        combo_cost = {}
-        
-        logger.debug("Calcul des coûts solo...")
-        for g in groupes:
-            if 'duree_trajet_min' not in g: continue
-            for c in chauffeurs:
-                try:
-                    solo_cost[(g['id'],c['id'])] = travel_time_single(c,g)
-                except Exception as e:
-                    logger.warning(f"Erreur calcul coût solo groupe {g['id']} chauffeur {c['id']}: {str(e)}")
-        
-        logger.debug("Calcul des coûts combinés...")
-        for g1 in groupes:
-            if 't_min' not in g1: continue
-            for g2 in groupes:
-                if g1['id']>=g2['id'] or 't_min' not in g2: continue
-                if abs(g1['t_min']-g2['t_min'])<=45:
-                    for c in chauffeurs:
-                        if c['n']>=(g1['ng']+g2['ng']):
-                            cost = combined_route_cost(c,g1,g2)
-                            if cost is not None:
-                                combo_cost[(g1['id'],g2['id'],c['id'])]=cost
-
-        logger.info(f"→ {len(solo_cost)} coûts solo et {len(combo_cost)} coûts combinés calculés")
+        publish_stage("couts", groupes=len(groupes), chauffeurs=len(chauffeurs))
+
+        logger.debug("Calcul des coûts solo (matrice vectorisée)...")
+        cost_cache = None
+        if settings.COST_CACHE_ENABLED:
+            cost_cache = LegCostCache(ds, settings.COST_CACHE_SIZE)
+            try:
+                await cost_cache.preload(
+                    [c.get('hash_adresse') for c in chauffeurs] + [g.get('hash_destination') for g in groupes],
+                    [g.get('hash_lieu_prise_en_charge') for g in groupes] + [c.get('hash_adresse') for c in chauffeurs]
+                )
+            except Exception as e:
+                logger.warning(f"Cache des trajets indisponible, calcul complet: {str(e)}")
+        # Les paires hors des fenêtres de disponibilité n'ont ni coût ni variable
+        masque_dispo = availability_mask(groupes, chauffeurs)
+        masque = masque_dispo
+        # Seuls les k chauffeurs les plus proches de chaque groupe sont candidats
+        # (sans objet depuis la salle : tous les chauffeurs partent du même point)
+        candidats_restreints = settings.CANDIDATE_K > 0 and not use_salle_address
+        if candidats_restreints:
+            masque = nearest_driver_mask(groupes, chauffeurs, settings.CANDIDATE_K,
+                                         settings.CANDIDATE_RADIUS_KM, masque_dispo)
+        solo_cost = compute_solo_cost_matrix(groupes, chauffeurs, cost_cache, masque)
+        # l'aperçu n'écrit rien en base, pas même le cache des trajets
+        if cost_cache is not None and mode != "preview":
+            try:
+                await cost_cache.flush()
+            except Exception as e:
+                logger.warning(f"Échec de la sauvegarde du cache des trajets: {str(e)}")
+
+        combo_cost = build_combo_costs(solo_cost, groupes, chauffeurs)
+        # Règles de capacité : les paires interdites n'entrent pas dans le modèle
+        # (après les combos, qui réutilisent aller/retour de toutes les paires)
+        solo_cost.restrict(capacity_mask(groupes, chauffeurs))
+
+        if mode == "preview":
+            logger.info("Étape 3/3: Aperçu par relaxation continue...")
+            publish_stage("apercu", solveur=backend.name)
+            modele, valeurs, resume = solve_lp_preview(
+                DispatchInstance(groupes, chauffeurs), solo_cost, combo_cost, backend, limite("milp")
+            )
+            x, y = modele.split_values(valeurs)
+            assign = extract_assignments(groupes, chauffeurs, x, y)
+            if use_salle_address:
+                assign = expand_class_assignments(assign, chauffeurs, groupes, solo_cost, combo_cost)
+            resume['chauffeurs'] = len({a['chauffeur'] for g in assign for a in assign[g]})
+            duration = time.perf_counter() - start_time
+            logger.info(f"=== APERÇU TERMINÉ en {duration:.2f} secondes - {resume['chauffeurs']} chauffeurs ===")
+            publish_stage("termine", duree=round(duration, 1), mode=mode, **resume)
+            return assign
 
         # 3. Résolution MILP
         logger.info("Étape 3/4: Résolution MILP...")
-        logger.info(f"Lancement solveur MILP (timeout={milp_time_limit}s)")
-        prob, status, x, y = solve_MILP(groupes, chauffeurs, solo_cost, combo_cost, milp_time_limit)
+        instance = DispatchInstance(groupes, chauffeurs)
+        if settings.ROLLING_HORIZON_ENABLED:
+            resoudre = solve_MILP_rolling
+        else:
+            resoudre = solve_MILP_decompose if settings.DECOMPOSITION_ENABLED else solve_MILP
+        # La solution heuristique sert de point de départ : le solveur démarre avec une borne supérieure
+        depart = heuristic_solution(groupes, chauffeurs, solo_cost, combo_cost, time_limit=limite_depart(len(groupes))) if settings.MILP_WARM_START else None
+        # limite prise après le point de départ : le temps de l'ALNS est décompté du budget
+        limite_milp = limite("milp")
+        publish_stage("milp", solveur=backend.name, limite=round(limite_milp, 1))
+        logger.info(f"Lancement solveur MILP (timeout={limite_milp:.0f}s)")
+        prob, status, x, y = resoudre(groupes, chauffeurs, solo_cost, combo_cost, limite_milp, instance=instance, backend=backend, warm_start=depart)
+        if candidats_restreints and status == pulp.LpStatusInfeasible:
+            # Fallback : les voisinages k-NN ne suffisent pas à couvrir tous les groupes
+            logger.warning("Modèle infaisable avec les candidats k-NN - élargissement à tous les chauffeurs disponibles")
+            candidats_restreints = False
+            solo_cost = compute_solo_cost_matrix(groupes, chauffeurs, cost_cache, masque_dispo)
+            combo_cost = build_combo_costs(solo_cost, groupes, chauffeurs)
+            solo_cost.restrict(capacity_mask(groupes, chauffeurs))
+            depart = heuristic_solution(groupes, chauffeurs, solo_cost, combo_cost, time_limit=limite_depart(len(groupes))) if settings.MILP_WARM_START else None
+            prob, status, x, y = resoudre(groupes, chauffeurs, solo_cost, combo_cost, limite("milp"), instance=instance, backend=backend, warm_start=depart)
         assign = extract_assignments(groupes, chauffeurs, x, y)
         
-        if pulp.LpStatus[status] != "Optimal":
-            logger.warning(f"Statut MILP non optimal: {pulp.LpStatus[status]} - Application heuristique")
-            assign = heuristic_solution(groupes, chauffeurs, solo_cost, combo_cost, assign)
-
-        # Gestion des groupes non couverts
-        nc = [g for g in groupes if g['id'] not in assign or not assign[g['id']]]
+        if status == LpStatusFeasible:
+            logger.info("Solution MILP réalisable, optimalité non prouvée (arrêt anticipé)")
+        if not has_solution(status):
+            logger.warning(f"Statut MILP non optimal: {status_name(status)} - Application heuristique")
+            assign = heuristic_solution(groupes, chauffeurs, solo_cost, combo_cost, assign, limite_heuristique())
+
+        # Gestion des groupes non couverts, en tout ou en partie
+        nc = [g for g in groupes if instance.covered_capacity(assign, g['id']) < g['ng']]
         if nc:
-            logger.warning(f"{len(nc)} groupes non couverts - Tentative résolution complémentaire")
-            prob2, s2, x2, y2 = solve_MILP(nc, chauffeurs, solo_cost, combo_cost, milp_time_limit)
-            sub = extract_assignments(nc, chauffeurs, x2, y2)
-            if pulp.LpStatus[s2] != "Optimal":
-                logger.warning("Résolution complémentaire non optimale - Application heuristique")
-                sub = heuristic_solution(nc, chauffeurs, solo_cost, combo_cost, assign)
-            for g in nc:
-                assign.setdefault(g['id'],[]).extend(sub.get(g['id'],[]))
+            logger.warning(f"{len(nc)} groupes non ou partiellement couverts - Tentative résolution complémentaire")
+            publish_stage("complementaire", groupes=len(nc))
+            # Le modèle principal est repris : affectations fixées, plannings des chauffeurs respectés
+            prob2, s2, x2, y2 = solve_MILP_complement(
+                prob, x, y, groupes, chauffeurs, solo_cost, combo_cost, assign, nc,
+                limite("complementaire"), instance=instance, backend=backend
+            )
+            if has_solution(s2):
+                assign = extract_assignments(groupes, chauffeurs, x2, y2)
+            else:
+                logger.warning(f"Résolution complémentaire {status_name(s2)} - Application heuristique")
+                assign = heuristic_solution(groupes, chauffeurs, solo_cost, combo_cost, assign, limite_heuristique())
 
         # 4. Fallback glouton
         logger.info("Étape 4/4: Vérification couverture complète...")
+        publish_stage("couverture")
         for g in groupes:
-            covered = sum(next(c for c in chauffeurs if c['id']==a['chauffeur'])['n'] for a in assign.get(g['id'],[]))
+            covered = instance.covered_capacity(assign, g['id'])
             if covered < g['ng']:
                 rem = g['ng'] - covered
                 logger.warning(f"Groupe {g['id']} sous-couvert ({covered}/{g['ng']}) - Application fallback glouton")
                 for c in sorted(chauffeurs, key=lambda c:-c['n']):
                     if rem <= 0: break
-                    if (g['id'],c['id']) in solo_cost and not(g['ng']<=4 and c['n']>4):
-                        assign[g['id']].append({"chauffeur":c['id'],"trajet":"simple"})
+                    if (g['id'],c['id']) in solo_cost and solo_allowed(g['ng'],c['n']):
+                        assign.setdefault(g['id'],[]).append({"chauffeur":c['id'],"trajet":"simple"})
                         rem -= c['n']
-        
-        
+
+        if use_salle_address:
+            assign = expand_class_assignments(assign, chauffeurs, groupes, solo_cost, combo_cost)
+            chauffeurs = chauffeurs_concrets
+
         try:
             logger.info("Génération et téléchargement des rapports from_calculation...")
             file_id_avant = await generate_and_upload_affectation_reports_from_calculation(
@@ -645,6 +861,7 @@ async def solve_dispatch_problem(
 
         # 5. Sauvegarde
         logger.info("Sauvegarde des affectations...")
+        publish_stage("sauvegarde")
         await save_affectations(ds, assign)
         
         try:
@@ -661,6 +878,7 @@ async def solve_dispatch_problem(
 
         duration = time.perf_counter() - start_time
         logger.info(f"=== DISPATCH TERMINÉ AVEC SUCCÈS ===")
+        publish_stage("termine", duree=round(duration, 1))
         logger.info(f"Temps total: {duration:.2f} secondes")
         logger.info(f"Groupes traités: {len(groupes)}")
         logger.info(f"Chauffeurs utilisés: {len({a['chauffeur'] for g in assign for a in assign[g]})}")
@@ -1246,7 +1464,14 @@ async def run_dispatch_solver_orchestration(
     date_begin: Optional[str] = None,
     date_end: Optional[str] = None,
     milp_time_limit: int = 300,
-    use_salle_address: bool = False
+    use_salle_address: bool = False,
+    solver: Optional[str] = None,
+    solver_threads: Optional[int] = None,
+    solver_gap: Optional[float] = None,
+    solver_gap_abs: Optional[float] = None,
+    solver_stall: Optional[float] = None,
+    time_budget: Optional[float] = None,
+    mode: str = "full"
 ):
     """Orchestration complète du calcul des groupes et du dispatch (mise à jour coursecalcul puis solveur)"""
 
@@ -1275,7 +1500,10 @@ async def run_dispatch_solver_orchestration(
         groupe_ids = [groupe['groupe_id'] for groupe in groupes]
         await process_course_group(processor, groupe_ids)
         logger.info("Début du processus de dispatch...")
-        assignments = await solve_dispatch_problem(ds, date_begin, date_end, milp_time_limit, use_salle_address)
+        assignments = await solve_dispatch_problem(
+            ds, date_begin, date_end, milp_time_limit, use_salle_address, solver, solver_threads, solver_gap,
+            solver_gap_abs, solver_stall, time_budget, mode
+        )
         logger.info(f"Dispatch terminé avec {len(assignments)} affectations")
         return assignments
     except Exception as e:
@@ -1305,6 +1533,7 @@ async def generate_and_upload_affectation_reports_from_calculation(
     # 1. Créer le rapport avant insertion (basé sur votre code existant)
     print(f"groupes: {groupes}")
     rows = []
+    par_id = {ch['id']: ch for ch in chauffeurs}
     for g in groupes:
         row = {
             "group_id": g['id'],
@@ -1320,7 +1549,7 @@ async def generate_and_upload_affectation_reports_from_calculation(
         for i in range(30):  # Support pour jusqu'à 30 chauffeurs
             if i < len(aff_list):
                 a = aff_list[i]
-                ch = next((ch for ch in chauffeurs if ch['id'] == a["chauffeur"]), {})
+                ch = par_id.get(a["chauffeur"], {})
                 row[f"chauffeur_{i+1}_id"] = ch.get('id', '')
                 row[f"chauffeur_{i+1}_nom_prenom"] = ch.get('prenom_nom', '')
                 row[f"chauffeur_{i+1}_trajet"] = a["trajet"]
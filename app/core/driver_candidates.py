@@ -0,0 +1,92 @@
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sklearn.neighbors import BallTree
+
+from app.core.cost_matrix import RAYON_TERRE_KM, _column
+
+logger = logging.getLogger(__name__)
+
+
+def nearest_driver_mask(
+    groupes: List[Dict[str, Any]],
+    chauffeurs: List[Dict[str, Any]],
+    k: int,
+    radius_km: float = 0,
+    mask: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Restreint chaque groupe à ses ``k`` chauffeurs candidats les plus proches.
+
+    Un ``BallTree`` (métrique haversine) est construit sur les adresses des
+    chauffeurs et interrogé depuis les lieux de prise en charge. Les voisins
+    sont parcourus par distance croissante ; on garde ceux autorisés par
+    ``mask`` (disponibilités) et situés à moins de ``radius_km`` (0 = sans
+    limite) jusqu'à en avoir ``k``.
+
+    Fallback : si les candidats retenus n'offrent pas assez de places pour
+    le groupe (``ng``), ``k`` est doublé pour ce groupe, sans limite de
+    rayon, jusqu'à couvrir le groupe ou épuiser les chauffeurs.
+
+    Returns:
+        Masque booléen G×C (combiné avec ``mask`` s'il est fourni).
+    """
+    nb_g, nb_c = len(groupes), len(chauffeurs)
+    autorise = np.ones((nb_g, nb_c), dtype=bool) if mask is None else mask
+    if nb_c <= k:
+        return autorise.copy()
+
+    lat_c, lng_c = _column(chauffeurs, 'lat_chauff'), _column(chauffeurs, 'long_chauff')
+    lat_p, lng_p = _column(groupes, 'lat_pickup'), _column(groupes, 'long_pickup')
+    localises = np.flatnonzero(~(np.isnan(lat_c) | np.isnan(lng_c)))
+    if localises.size == 0:
+        return autorise.copy()
+
+    arbre = BallTree(np.radians(np.column_stack([lat_c[localises], lng_c[localises]])), metric='haversine')
+    capacites = _column(chauffeurs, 'n')
+    result = np.zeros((nb_g, nb_c), dtype=bool)
+    requetes = np.flatnonzero(~(np.isnan(lat_p) | np.isnan(lng_p)))
+    # Groupes sans coordonnées : pas de coût solo de toute façon, on laisse le masque tel quel
+    result[np.setdiff1d(np.arange(nb_g), requetes)] = autorise[np.setdiff1d(np.arange(nb_g), requetes)]
+
+    k_groupe = np.full(nb_g, k)
+    rayon_groupe = np.full(nb_g, radius_km if radius_km and radius_km > 0 else np.inf)
+    kq = min(localises.size, 2 * k)
+    elargis = 0
+    while requetes.size:
+        dist, voisins = arbre.query(np.radians(np.column_stack([lat_p[requetes], lng_p[requetes]])), k=kq)
+        dist = dist * RAYON_TERRE_KM
+        restants = []
+        for ligne, i in enumerate(requetes):
+            gardes, places, complet = 0, 0.0, False
+            for d, v in zip(dist[ligne], voisins[ligne]):
+                j = localises[v]
+                if gardes >= k_groupe[i] or d > rayon_groupe[i]:
+                    complet = True
+                    break
+                if autorise[i, j]:
+                    result[i, j] = True
+                    gardes += 1
+                    places += capacites[j]
+            if kq >= localises.size:
+                continue
+            if not complet:
+                # Trop de voisins non autorisés : on relance avec plus de voisins
+                restants.append(i)
+            elif places < (groupes[i].get('ng') or 0):
+                # Capacité insuffisante : k doublé, sans limite de rayon
+                k_groupe[i] *= 2
+                rayon_groupe[i] = np.inf
+                elargis += 1
+                restants.append(i)
+        requetes = np.array(restants, dtype=int)
+        kq = min(localises.size, 2 * kq)
+
+    if elargis:
+        logger.info(f"Candidats k-NN : voisinage élargi {elargis} fois (capacité insuffisante)")
+    logger.info(
+        f"Candidats k-NN (k={k}, rayon={radius_km} km) : "
+        f"{int(result.sum())} paires sur {int(autorise.sum())} autorisées"
+    )
+    return result
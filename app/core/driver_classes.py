@@ -0,0 +1,108 @@
+import logging
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def driver_class_key(chauffeur: Dict[str, Any]) -> Tuple:
+    """Clé d'équivalence : (position, capacité, fenêtres de disponibilité)."""
+    return (
+        chauffeur.get('lat_chauff'),
+        chauffeur.get('long_chauff'),
+        chauffeur['n'],
+        tuple(chauffeur.get('disponibilites') or
+              [(chauffeur.get('availability_date'), chauffeur.get('availability_date_end'))]),
+    )
+
+
+def build_driver_classes(chauffeurs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Regroupe les chauffeurs interchangeables en classes d'équivalence.
+
+    Avec ``use_salle_address=True`` tous les chauffeurs partent de la salle :
+    ils ne se distinguent plus que par leur capacité et leur disponibilité.
+    Chaque classe est une ligne chauffeur (mêmes clés que ``prepare_chauffeurs``)
+    avec en plus :
+
+    - ``size``    : nombre de chauffeurs de la classe
+    - ``membres`` : identifiants ``chauffeur_id`` concrets, dans l'ordre d'origine
+    """
+    classes: Dict[Tuple, Dict[str, Any]] = {}
+    for c in chauffeurs:
+        key = driver_class_key(c)
+        if key not in classes:
+            classes[key] = {**c, 'id': f"classe_{len(classes)}", 'size': 0, 'membres': []}
+        if c['id'] not in classes[key]['membres']:
+            classes[key]['membres'].append(c['id'])
+            classes[key]['size'] += 1
+
+    result = list(classes.values())
+    logger.info(f"{len(chauffeurs)} chauffeurs regroupés en {len(result)} classes d'équivalence")
+    return result
+
+
+def expand_class_assignments(
+    assign: Dict[Any, List[Dict[str, Any]]],
+    classes: List[Dict[str, Any]],
+    groupes: List[Dict[str, Any]],
+    solo_cost,
+    combo_cost: Dict[Tuple, float],
+    max_missions: int = 4
+) -> Dict[Any, List[Dict[str, Any]]]:
+    """
+    Remplace les identifiants de classe par des ``chauffeur_id`` concrets.
+
+    Les missions d'une classe sont parcourues par heure de début et confiées
+    au membre libre sur l'intervalle qui a le moins de missions. Les
+    contraintes de capacité par instant du modèle garantissent qu'un membre
+    libre existe (coloration d'un graphe d'intervalles) ; la limite de
+    missions n'est garantie qu'en agrégé : une mission qu'aucun membre libre
+    sous ``max_missions`` ne peut prendre est retirée de ``assign`` et ses
+    groupes restent non couverts (avertissement journalisé).
+    """
+    par_classe = {cl['id']: cl for cl in classes}
+    t_min = {g['id']: g['t_min'] for g in groupes}
+
+    # Une mission = une affectation solo ou les deux moitiés d'un combo
+    missions: Dict[Any, Dict[str, Any]] = {}
+    for gid, affectations in assign.items():
+        for i, a in enumerate(affectations):
+            cls = par_classe.get(a['chauffeur'])
+            if cls is None:
+                continue
+            cle = a.get('combo_id') or (gid, i)
+            if cle not in missions:
+                if a.get('combo_id'):
+                    g1, g2 = sorted([gid] + list(a['combiné_avec']))
+                    debut = min(t_min[g1], t_min[g2])
+                    fin = debut + combo_cost[(g1, g2, cls['id'])]
+                else:
+                    debut = t_min[gid]
+                    fin = debut + solo_cost[(gid, cls['id'])]
+                missions[cle] = {'classe': cls, 'debut': debut, 'fin': fin, 'affectations': []}
+            missions[cle]['affectations'].append((gid, a))
+
+    planning = {m: [] for cl in classes for m in cl['membres']}
+    for mission in sorted(missions.values(), key=lambda m: m['debut']):
+        libres = [
+            m for m in mission['classe']['membres']
+            if len(planning[m]) < max_missions
+            and all(mission['fin'] <= s or mission['debut'] >= f for s, f in planning[m])
+        ]
+        if not libres:
+            gids = sorted({gid for gid, _ in mission['affectations']})
+            logger.warning(
+                f"Aucun membre libre sous {max_missions} missions dans {mission['classe']['id']} "
+                f"à t={mission['debut']} : groupes {gids} laissés non couverts"
+            )
+            for gid, a in mission['affectations']:
+                assign[gid].remove(a)
+                if not assign[gid]:
+                    del assign[gid]
+            continue
+        membre = min(libres, key=lambda m: len(planning[m]))
+        planning[membre].append((mission['debut'], mission['fin']))
+        for _, a in mission['affectations']:
+            a['chauffeur'] = membre
+
+    return assign
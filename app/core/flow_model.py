@@ -0,0 +1,122 @@
+import logging
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from app.core.dispatch_instance import DispatchInstance
+from app.core.milp_matrix import MilpMatrix, assignment_columns
+
+logger = logging.getLogger(__name__)
+
+# Niveaux des nœuds à un même instant : les fins (et les débuts qui les
+# suivent immédiatement), puis les missions de durée nulle, puis les débuts
+# s'il y a eu des missions de durée nulle (mêmes règles que overlap_cliques).
+_FIN, _PONCTUEL, _DEBUT = 0, 1, 2
+
+
+class FlowMatrix(MilpMatrix):
+    """
+    Formulation en flot : après les colonnes ``x`` / ``y`` (arcs de mission),
+    une colonne continue par arc d'attente du graphe temporel d'un chauffeur.
+
+    ``arc_debut`` / ``arc_fin`` donnent, pour chaque mission, le premier arc
+    d'attente qu'elle enjambe et celui où elle rejoint la chaîne : le flot
+    d'attente d'une solution se déduit des missions (``values_from``).
+    """
+
+    def __init__(self, *args, attente_size, arc_debut, arc_fin, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.attente_size = np.asarray(attente_size, dtype=float)
+        self.arc_debut = np.asarray(arc_debut, dtype=int)
+        self.arc_fin = np.asarray(arc_fin, dtype=int)
+
+    def values_from(self, x: Dict[Tuple, float], y: Optional[Dict[Tuple, float]] = None) -> np.ndarray:
+        missions = super().values_from(x, y)
+        delta = np.zeros(len(self.attente_size) + 1)
+        np.add.at(delta, self.arc_debut, missions)
+        np.add.at(delta, self.arc_fin, -missions)
+        return np.concatenate([missions, self.attente_size - np.cumsum(delta)[:-1]])
+
+
+def build_flow_matrix(inst: DispatchInstance, solo_cost, combo_cost: Dict[Tuple, float]) -> FlowMatrix:
+    """
+    Modèle de ``solve_MILP`` en réseau espace-temps, par chauffeur.
+
+    Les nœuds d'un chauffeur sont les instants de début et de fin de ses
+    missions, chaînés dans l'ordre par des arcs d'attente ; chaque mission
+    est un arc de son début à sa fin. ``size`` unités de flot traversent la
+    chaîne (conservation à chaque nœud) : une journée est un chemin, et au
+    plus ``size`` missions sont simultanées sans aucune contrainte de
+    non-chevauchement. Les contraintes de couverture et de nombre de
+    missions sont les contraintes additionnelles du flot.
+
+    Mêmes colonnes ``x`` / ``y`` que ``build_milp_matrix`` : ``split_values``
+    et ``extract_assignments`` s'appliquent sans changement.
+    """
+    m = assignment_columns(inst, solo_cost, combo_cost)
+    cost, driver, debut = m['cost'], m['driver'], m['debut']
+    fin = debut + cost
+    rows, cols, vals = m['rows'], m['cols'], m['vals']
+    row_lower, row_upper = m['row_lower'], m['row_upper']
+    nb_missions = len(cost)
+
+    arc_debut = np.zeros(nb_missions, dtype=int)
+    arc_fin = np.zeros(nb_missions, dtype=int)
+    attente_size = []
+    par_chauffeur = np.argsort(driver, kind='stable')
+    bornes = np.searchsorted(driver[par_chauffeur], np.arange(inst.nb_chauffeurs + 1))
+    for j in range(inst.nb_chauffeurs):
+        taches = par_chauffeur[bornes[j]:bornes[j + 1]]
+        if taches.size == 0:
+            continue
+        size = int(inst.size[j])
+        s, f = debut[taches].tolist(), fin[taches].tolist()
+        ponctuels = {s[k] for k in range(len(taches)) if f[k] <= s[k]}
+        cle_debut, cle_fin = [], []
+        for k in range(len(taches)):
+            if f[k] <= s[k]:
+                cle_debut.append((s[k], _PONCTUEL, k))
+                cle_fin.append((s[k], _PONCTUEL, k + 0.5))
+            else:
+                cle_debut.append((s[k], _DEBUT if s[k] in ponctuels else _FIN, 0))
+                cle_fin.append((f[k], _FIN, 0))
+        noeuds = {cle: n for n, cle in enumerate(sorted(set(cle_debut) | set(cle_fin)))}
+        nb_noeuds = len(noeuds)
+        ligne0 = len(row_lower)
+        arc0 = len(attente_size)
+        a = np.array([noeuds[c] for c in cle_debut])
+        b = np.array([noeuds[c] for c in cle_fin])
+        arc_debut[taches] = arc0 + a
+        arc_fin[taches] = arc0 + b
+
+        # conservation : attente entrante + missions arrivant = attente sortante + missions partant
+        attentes = nb_missions + arc0 + np.arange(nb_noeuds)
+        rows += [ligne0 + np.arange(nb_noeuds), ligne0 + np.arange(1, nb_noeuds), ligne0 + a, ligne0 + b]
+        cols += [attentes, attentes[:-1], taches, taches]
+        vals += [-np.ones(nb_noeuds), np.ones(nb_noeuds - 1), -np.ones(taches.size), np.ones(taches.size)]
+        # le flot (size unités) entre au premier nœud
+        row_lower += [-size] + [0] * (nb_noeuds - 1)
+        row_upper += [-size] + [0] * (nb_noeuds - 1)
+        attente_size += [size] * nb_noeuds
+
+        rows.append(np.full(taches.size, len(row_lower)))
+        cols.append(taches)
+        vals.append(np.ones(taches.size))
+        row_lower.append(-np.inf)
+        row_upper.append(int(inst.max_missions[j]))
+
+    nb_attentes = len(attente_size)
+    modele = FlowMatrix(
+        m['x_keys'], m['y_keys'],
+        np.concatenate([cost, np.zeros(nb_attentes)]),
+        np.concatenate([m['upper'], attente_size]),
+        np.concatenate(rows), np.concatenate(cols), np.concatenate(vals),
+        row_lower, row_upper,
+        integer=np.arange(nb_missions + nb_attentes) < nb_missions,
+        attente_size=attente_size, arc_debut=arc_debut, arc_fin=arc_fin
+    )
+    logger.info(
+        f"Modèle en flot : {nb_missions} arcs de mission, {nb_attentes} arcs d'attente, "
+        f"{modele.nb_rows} contraintes, {modele.nb_nonzeros} coefficients"
+    )
+    return modele
@@ -0,0 +1,101 @@
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pulp
+
+from app.core.dispatch_instance import DispatchInstance
+from app.core.milp_backend import has_solution
+from app.core.milp_matrix import MilpMatrix
+from app.core.overlap_cliques import overlap_cliques
+from app.core.solver_progress import publish_model
+
+logger = logging.getLogger(__name__)
+
+
+def violated_cliques(
+    modele: MilpMatrix, inst: DispatchInstance, values: np.ndarray, cache: Dict[int, List[np.ndarray]]
+) -> Tuple[List[np.ndarray], List[float]]:
+    """
+    Cliques de non-chevauchement violées par ``values``.
+
+    Seuls les chauffeurs dont les missions retenues dépassent ``size`` sont
+    examinés ; leurs cliques maximales (toutes missions candidates) sont
+    calculées une fois et conservées dans ``cache``. Une clique maximale
+    contient toute clique violée de missions retenues : la coupe ajoutée est
+    la plus forte possible.
+
+    Returns:
+        (colonnes de chaque coupe, borne de chaque coupe)
+    """
+    actives = np.flatnonzero(values[:len(modele.driver)] > 0.5)
+    lignes, bornes = [], []
+    for j in np.unique(modele.driver[actives]):
+        size = int(inst.size[j])
+        retenues = actives[modele.driver[actives] == j]
+        if values[retenues].sum() <= size:
+            continue
+        if j not in cache:
+            taches = np.flatnonzero(modele.driver == j)
+            intervalles = list(zip(modele.debut[taches].tolist(), modele.fin[taches].tolist()))
+            cache[j] = [taches[c] for c in overlap_cliques(intervalles, min_size=size + 1)]
+        for clique in cache[j]:
+            if values[clique].sum() > size + 1e-6:
+                lignes.append(clique)
+                bornes.append(size)
+    return lignes, bornes
+
+
+def repair_overlaps(modele: MilpMatrix, inst: DispatchInstance, values: np.ndarray) -> np.ndarray:
+    """Retire les missions en conflit (les plus tardives) d'une solution non réalisable."""
+    values = values.copy()
+    actives = np.flatnonzero(values[:len(modele.driver)] > 0.5)
+    for j in np.unique(modele.driver[actives]):
+        size = int(inst.size[j])
+        gardees: List[Tuple[float, float]] = []
+        retenues = actives[modele.driver[actives] == j]
+        for k in retenues[np.argsort(modele.debut[retenues], kind='stable')]:
+            s, f = modele.debut[k], modele.fin[k]
+            libres = size - sum(1 for a, b in gardees if a < f and s < b)
+            garder = min(int(values[k]), max(libres, 0))
+            gardees.extend([(s, f)] * garder)
+            values[k] = garder
+    return values
+
+
+def resolve_lazy_overlap(
+    modele: MilpMatrix, inst: DispatchInstance, time_limit: float, backend, depart: Optional[np.ndarray] = None
+) -> Tuple[int, np.ndarray]:
+    """
+    Génération paresseuse des contraintes de non-chevauchement.
+
+    Résout un modèle sans cliques (ou avec une partie seulement) en ajoutant
+    les cliques violées jusqu'à ce qu'aucune ne le soit ou que le temps soit
+    épuisé. Dans ce dernier cas, la solution est réparée
+    (``repair_overlaps``) et le statut est ``NotSolved`` : l'appelant
+    complète les groupes découverts.
+
+    Returns:
+        (statut PuLP, valeurs des colonnes)
+    """
+    fin = time.perf_counter() + time_limit
+    cache: Dict[int, List[np.ndarray]] = {}
+    tour, coupes = 0, 0
+    while True:
+        tour += 1
+        publish_model(modele.nb_cols, modele.nb_rows, tour=tour)
+        status, values = backend.solve_matrix(modele, max(1.0, fin - time.perf_counter()), depart)
+        if not has_solution(status):
+            return status, values
+        lignes, bornes = violated_cliques(modele, inst, values, cache)
+        logger.info(f"Coupes paresseuses : tour {tour}, {len(lignes)} cliques violées")
+        if not lignes:
+            break
+        if time.perf_counter() >= fin:
+            logger.warning(f"Temps épuisé avec {len(lignes)} cliques violées - solution réparée")
+            return pulp.LpStatusNotSolved, repair_overlaps(modele, inst, values)
+        modele.add_rows(lignes, bornes)
+        coupes += len(lignes)
+    logger.info(f"Coupes paresseuses : {coupes} coupes ajoutées en {tour} tours")
+    return status, values
@@ -0,0 +1,142 @@
+import logging
+import time
+from typing import Any, Dict, Tuple
+
+import numpy as np
+import pulp
+
+from app.core.dispatch_instance import DispatchInstance
+from app.core.milp_backend import has_solution, status_name
+from app.core.milp_matrix import MilpMatrix, build_milp_matrix, column_groups
+from app.core.solver_progress import publish_model, relative_gap
+
+logger = logging.getLogger(__name__)
+
+
+def round_relaxation(
+    modele: MilpMatrix, inst: DispatchInstance, relaxee: np.ndarray, seuil: float = 0.7
+) -> np.ndarray:
+    """
+    Arrondit la solution de la relaxation continue en affectation réalisable.
+
+    1. Les colonnes presque entières (valeur fractionnaire d'au moins
+       ``seuil``) sont reprises par valeur décroissante (puis coût
+       croissant), arrondies à l'entier le plus proche, tant qu'elles couvrent
+       des places manquantes et que le chauffeur reste libre (``size``
+       missions simultanées, ``max_missions``).
+    2. Les groupes encore sous-couverts sont complétés, un à un, par la
+       colonne la moins chère par place utile.
+    3. Les colonnes devenues inutiles (couverture assurée sans elles) sont
+       retirées, les plus chères d'abord.
+
+    Les règles de capacité sont déjà appliquées aux colonnes du modèle.
+    Un groupe peut rester sous-couvert si aucun chauffeur n'est libre.
+    """
+    g1, g2, places = column_groups(modele, inst)
+    cost, driver, debut, fin = modele.cost, modele.driver, modele.debut, modele.fin
+    manque = inst.ng.astype(float)
+    valeurs = np.zeros(modele.nb_cols)
+    missions = np.zeros(inst.nb_chauffeurs, dtype=int)
+    intervalles = [[] for _ in range(inst.nb_chauffeurs)]
+
+    def utile(k):
+        return manque[g1[k]] > 1e-9 or (g2[k] >= 0 and manque[g2[k]] > 1e-9)
+
+    def libre(k):
+        j = driver[k]
+        if missions[j] >= inst.max_missions[j]:
+            return False
+        # compte prudent : toutes les missions qui recoupent l'intervalle
+        s, f = debut[k], fin[k]
+        return sum(1 for a, b in intervalles[j] if a < f and s < b) < inst.size[j]
+
+    def prendre(k, signe=1):
+        j = driver[k]
+        valeurs[k] += signe
+        missions[j] += signe
+        manque[g1[k]] -= signe * places[k]
+        if g2[k] >= 0:
+            manque[g2[k]] -= signe * places[k]
+        if signe > 0:
+            intervalles[j].append((debut[k], fin[k]))
+        else:
+            intervalles[j].remove((debut[k], fin[k]))
+
+    # 1. colonnes presque entières de la relaxation
+    # (les reprendre toutes sur-couvre les groupes avec des colonnes chères)
+    entiers = np.floor(relaxee + 1e-6)
+    unites = entiers + (relaxee - entiers >= seuil - 1e-6)
+    candidates = np.flatnonzero(unites > 0)
+    for k in candidates[np.lexsort((cost[candidates], -relaxee[candidates]))]:
+        for _ in range(int(unites[k])):
+            if not (utile(k) and libre(k)):
+                break
+            prendre(k)
+
+    # 2. complétion des groupes sous-couverts, colonne la moins chère par place utile
+    for i in np.flatnonzero(manque > 1e-9):
+        colonnes = np.flatnonzero((g1 == i) | (g2 == i))
+        while manque[i] > 1e-9:
+            utiles = np.minimum(places[colonnes], np.maximum(manque[g1[colonnes]], 0))
+            autre = g2[colonnes] >= 0
+            utiles[autre] += np.minimum(places[colonnes][autre], np.maximum(manque[g2[colonnes][autre]], 0))
+            ouvertes = [k for k in colonnes if valeurs[k] < modele.upper[k] and libre(k)]
+            if not ouvertes:
+                break
+            rang = {k: r for r, k in enumerate(colonnes)}
+            prendre(min(ouvertes, key=lambda k: cost[k] / utiles[rang[k]]))
+
+    # 3. retrait des colonnes superflues
+    for k in np.flatnonzero(valeurs)[np.argsort(-cost[np.flatnonzero(valeurs)], kind='stable')]:
+        while valeurs[k] > 0 and manque[g1[k]] + places[k] <= 1e-9 and (
+            g2[k] < 0 or manque[g2[k]] + places[k] <= 1e-9
+        ):
+            prendre(k, -1)
+    return valeurs
+
+
+def solve_lp_preview(
+    inst: DispatchInstance, solo_cost, combo_cost: Dict[Tuple, float], backend, time_limit: float
+) -> Tuple[MilpMatrix, np.ndarray, Dict[str, Any]]:
+    """
+    Aperçu rapide : relaxation continue du modèle de ``solve_MILP``, puis
+    arrondi (``round_relaxation``).
+
+    Returns:
+        (modèle, valeurs entières des colonnes, résumé : borne de la
+        relaxation, coût arrondi, écart d'arrondi, groupes non couverts,
+        durée)
+    """
+    debut = time.perf_counter()
+    modele = build_milp_matrix(inst, solo_cost, combo_cost)
+    modele.integer = np.zeros(modele.nb_cols, dtype=bool)
+    publish_model(modele.nb_cols, modele.nb_rows, groupes=inst.nb_groupes, relaxation=True)
+    status, relaxee = backend.solve_matrix(modele, time_limit)
+    if status != pulp.LpStatusOptimal:
+        # relaxation infaisable : aucun chauffeur pour certains groupes, l'arrondi le signale ;
+        # arrêtée avant l'optimum : arrondie, mais ce n'est plus une borne
+        logger.warning(f"Relaxation continue : statut {status_name(status)}")
+        if not has_solution(status):
+            relaxee = np.zeros(modele.nb_cols)
+    borne = float(modele.cost @ relaxee) if status == pulp.LpStatusOptimal else None
+    valeurs = round_relaxation(modele, inst, relaxee)
+    cout = float(modele.cost @ valeurs)
+
+    g1, g2, places = column_groups(modele, inst)
+    couvert = np.bincount(g1, weights=places * valeurs, minlength=inst.nb_groupes)
+    solo = g2 < 0
+    couvert += np.bincount(g2[~solo], weights=(places * valeurs)[~solo], minlength=inst.nb_groupes)
+    non_couverts = [inst.group_ids[i] for i in np.flatnonzero(couvert < inst.ng - 1e-9)]
+
+    resume = {
+        'borne_lp': None if borne is None else round(borne, 2),
+        'cout': round(cout, 2),
+        'ecart_arrondi': None if borne is None else relative_gap(cout, borne),
+        'non_couverts': non_couverts,
+        'duree_apercu': round(time.perf_counter() - debut, 2),
+    }
+    logger.info(
+        f"Aperçu : borne LP {resume['borne_lp']}, coût arrondi {resume['cout']}, "
+        f"écart {resume['ecart_arrondi']}, {len(non_couverts)} groupes non couverts en {resume['duree_apercu']}s"
+    )
+    return modele, valeurs, resume
@@ -0,0 +1,371 @@
+import logging
+import os
+import signal
+import subprocess
+import tempfile
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+import pulp
+from pulp.apis import coin_api
+
+from app.core.milp_matrix import MilpMatrix, write_mps
+from app.core.solver_progress import CbcLogWatcher, progress
+from app.core.stop_criteria import StallMonitor
+
+try:
+    import highspy
+except ImportError:  # HiGHS optionnel : repli sur CBC
+    highspy = None
+
+logger = logging.getLogger(__name__)
+
+# Arrêt anticipé (temps, stagnation) avec une solution réalisable non prouvée
+# optimale. PuLP renvoie ``LpStatusOptimal`` dans ce cas ; on reprend sa valeur
+# ``LpSolutionIntegerFeasible``, distincte de tous les ``LpStatus``.
+LpStatusFeasible = pulp.LpSolutionIntegerFeasible
+
+
+def has_solution(status: int) -> bool:
+    """Le statut porte une solution réalisable (optimale ou non)."""
+    return status in (pulp.LpStatusOptimal, LpStatusFeasible)
+
+
+def status_name(status: int) -> str:
+    """Libellé d'un statut renvoyé par les backends."""
+    return "Feasible" if status == LpStatusFeasible else pulp.LpStatus.get(status, str(status))
+
+
+def problem_status(prob: pulp.LpProblem) -> int:
+    """Statut d'un problème PuLP résolu, ``LpStatusFeasible`` si l'optimalité n'est pas prouvée."""
+    if prob.status == pulp.LpStatusOptimal and prob.sol_status == pulp.LpSolutionIntegerFeasible:
+        return LpStatusFeasible
+    return prob.status
+
+# Le planificateur de threads de HiGHS est global au processus : il doit être
+# réinitialisé quand le nombre de threads change, sinon ``run`` échoue.
+_highs_threads = None
+
+
+def _highs_scheduler(threads: int) -> None:
+    global _highs_threads
+    if _highs_threads is not None and _highs_threads != threads:
+        highspy.Highs.resetGlobalScheduler(True)
+    _highs_threads = threads
+
+
+def _highs_progress(type_cb, message, sortie, entree, stall: Optional[StallMonitor]) -> None:
+    """
+    Callback HiGHS : solution courante, borne, écart et nœuds vers le
+    reporter de progression ; interruption si la solution stagne.
+    """
+    reporter = progress()
+    if reporter is not None:
+        reporter.solver(
+            sortie.mip_primal_bound, sortie.mip_dual_bound, sortie.mip_gap, int(sortie.mip_node_count),
+            force=int(type_cb) == int(highspy.cb.HighsCallbackType.kCallbackMipImprovingSolution)
+        )
+    if stall is not None and stall.stalled(sortie.mip_primal_bound):
+        if not entree.user_interrupt:
+            logger.info(f"Aucune amélioration depuis {stall.stall_time}s - arrêt de HiGHS")
+        entree.user_interrupt = True
+
+
+def _highs_callbacks(stall: Optional[StallMonitor] = None) -> list:
+    """Callbacks HiGHS à activer (aucun sans reporter de progression ni critère de stagnation)."""
+    if progress() is None and stall is None:
+        return []
+    return [
+        highspy.cb.HighsCallbackType.kCallbackMipImprovingSolution,
+        highspy.cb.HighsCallbackType.kCallbackMipInterrupt,
+    ]
+
+
+class MilpBackend:
+    """
+    Solveur MILP utilisé par ``solve_MILP``.
+
+    Un backend sait résoudre les deux formes du modèle : le problème PuLP
+    (``pulp_solver``) et la matrice creuse de ``milp_matrix``
+    (``solve_matrix``). ``threads`` = 0 utilise tous les cœurs.
+
+    Critères d'arrêt anticipé (0 = désactivé) : écart relatif ``gap_rel``
+    (sinon défaut du solveur), écart absolu ``gap_abs`` sur l'objectif et
+    ``stall_time`` secondes sans amélioration de la solution.
+    """
+
+    name = None
+
+    def __init__(self, threads: int = 0, gap_rel: float = 0.0, gap_abs: float = 0.0, stall_time: float = 0.0):
+        self.threads = threads if threads and threads > 0 else (os.cpu_count() or 1)
+        self.gap_rel = gap_rel if gap_rel and gap_rel > 0 else None
+        self.gap_abs = gap_abs if gap_abs and gap_abs > 0 else None
+        self.stall_time = stall_time if stall_time and stall_time > 0 else None
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.name}(threads={self.threads}, gap_rel={self.gap_rel}, "
+            f"gap_abs={self.gap_abs}, stall_time={self.stall_time})"
+        )
+
+    def _stall(self) -> Optional[StallMonitor]:
+        """Suivi de stagnation d'une résolution (``None`` sans critère)."""
+        return StallMonitor(self.stall_time) if self.stall_time is not None else None
+
+    def pulp_solver(self, time_limit: float, warm_start: bool = False) -> pulp.LpSolver:
+        """Solveur PuLP ; avec ``warm_start``, part des valeurs posées par ``setInitialValue``."""
+        raise NotImplementedError
+
+    def solve_matrix(
+        self, modele: MilpMatrix, time_limit: float, initial: Optional[np.ndarray] = None
+    ) -> Tuple[int, np.ndarray]:
+        """
+        Résout la matrice, en partant de la solution ``initial`` si fournie.
+
+        Returns:
+            (statut PuLP ou ``LpStatusFeasible``, valeurs des colonnes)
+        """
+        raise NotImplementedError
+
+
+class CbcBackend(MilpBackend):
+    """CBC (binaire fourni avec PuLP), multi-thread via ``-threads``."""
+
+    name = "cbc"
+
+    def pulp_solver(self, time_limit: float, warm_start: bool = False) -> pulp.LpSolver:
+        solveur = _CbcProgress(
+            timeLimit=time_limit, msg=False, threads=self.threads, gapRel=self.gap_rel, gapAbs=self.gap_abs,
+            warmStart=warm_start
+        )
+        solveur.stall_time = self.stall_time
+        return solveur
+
+    def solve_matrix(
+        self, modele: MilpMatrix, time_limit: float, initial: Optional[np.ndarray] = None
+    ) -> Tuple[int, np.ndarray]:
+        """Résout un fichier MPS généré et relit la solution de CBC."""
+        cbc = self.pulp_solver(time_limit)
+        values = np.zeros(modele.nb_cols)
+        with tempfile.TemporaryDirectory() as tmp:
+            mps, sol = os.path.join(tmp, 'affectation.mps'), os.path.join(tmp, 'affectation.sol')
+            log = os.path.join(tmp, 'affectation.log')
+            write_mps(modele, mps)
+            cmd = [cbc.path, mps, '-sec', str(time_limit), '-threads', str(self.threads)]
+            if self.gap_rel is not None:
+                cmd += ['-ratioGap', str(self.gap_rel)]
+            if self.gap_abs is not None:
+                cmd += ['-allowableGap', str(self.gap_abs)]
+            if initial is not None:
+                # même format que COIN_CMD.writesol
+                mst = os.path.join(tmp, 'affectation.mst')
+                with open(mst, 'w') as f:
+                    f.write("Stopped on time - objective value 0\n")
+                    for k, v in enumerate(initial):
+                        f.write(f"{k:>7} X{k} {v:>15g} {0:>23}\n")
+                cmd += ['-mips', mst]
+            cmd += ['-solve', '-solution', sol]
+            with open(log, 'w') as journal:
+                processus = subprocess.Popen(cmd, stdout=journal, stderr=subprocess.DEVNULL)
+                # SIGINT : CBC s'arrête et écrit la meilleure solution trouvée
+                with CbcLogWatcher(log, stall=self._stall(), interrupt=lambda: processus.send_signal(signal.SIGINT)):
+                    if processus.wait() != 0:
+                        raise subprocess.CalledProcessError(processus.returncode, cmd)
+            status, sol_status = cbc.get_status(sol)
+            if sol_status == pulp.LpSolutionIntegerFeasible:
+                status = LpStatusFeasible
+            with open(sol) as f:
+                next(f)
+                for ligne in f:
+                    champs = ligne.split()
+                    if champs and champs[0] == '**':
+                        champs = champs[1:]
+                    if len(champs) >= 3 and champs[1].startswith('X'):
+                        values[int(champs[1][1:])] = float(champs[2])
+        return status, _arrondir(modele, values)
+
+
+class HighsBackend(MilpBackend):
+    """HiGHS dans le processus (``highspy``), sans fichier intermédiaire."""
+
+    name = "highs"
+
+    def pulp_solver(self, time_limit: float, warm_start: bool = False) -> pulp.LpSolver:
+        _highs_scheduler(self.threads)
+        solveur = _HighsWarmStart if warm_start else pulp.HiGHS
+        stall = self._stall()
+        callbacks = _highs_callbacks(stall)
+        return solveur(
+            timeLimit=time_limit, msg=False, threads=self.threads, gapRel=self.gap_rel, gapAbs=self.gap_abs,
+            callbackTuple=(_highs_progress, stall) if callbacks else None, callbacksToActivate=callbacks
+        )
+
+    def _configure(self, time_limit: float, stall: Optional[StallMonitor] = None) -> "highspy.Highs":
+        _highs_scheduler(self.threads)
+        h = highspy.Highs()
+        h.setOptionValue('output_flag', False)
+        h.setOptionValue('time_limit', float(time_limit))
+        h.setOptionValue('threads', self.threads)
+        if self.gap_rel is not None:
+            h.setOptionValue('mip_rel_gap', self.gap_rel)
+        if self.gap_abs is not None:
+            h.setOptionValue('mip_abs_gap', self.gap_abs)
+        callbacks = _highs_callbacks(stall)
+        if callbacks:
+            # HiGHS ne garde qu'un pointeur vers ``stall`` : l'appelant le maintient en vie
+            h.setCallback(_highs_progress, stall)
+            for callback in callbacks:
+                h.startCallback(callback)
+        return h
+
+    def solve_matrix(
+        self, modele: MilpMatrix, time_limit: float, initial: Optional[np.ndarray] = None
+    ) -> Tuple[int, np.ndarray]:
+        """Passe la matrice CSR à HiGHS en un seul appel (``passModel``)."""
+        stall = self._stall()
+        h = self._configure(time_limit, stall)
+        lp = highspy.HighsLp()
+        lp.num_col_ = modele.nb_cols
+        lp.num_row_ = modele.nb_rows
+        lp.col_cost_ = modele.cost
+        lp.col_lower_ = modele.lower
+        lp.col_upper_ = modele.upper
+        lp.row_lower_ = modele.row_lower
+        lp.row_upper_ = modele.row_upper
+        lp.a_matrix_.format_ = highspy.MatrixFormat.kRowwise
+        lp.a_matrix_.num_col_ = modele.nb_cols
+        lp.a_matrix_.num_row_ = modele.nb_rows
+        lp.a_matrix_.start_ = modele.a_start
+        lp.a_matrix_.index_ = modele.a_index
+        lp.a_matrix_.value_ = modele.a_value
+        lp.integrality_ = [
+            highspy.HighsVarType.kInteger if entier else highspy.HighsVarType.kContinuous
+            for entier in modele.integer
+        ]
+        h.passModel(lp)
+        if initial is not None:
+            _set_highs_solution(h, initial)
+        h.run()
+
+        etat = h.getModelStatus()
+        if etat == highspy.HighsModelStatus.kOptimal:
+            status = pulp.LpStatusOptimal
+        elif etat == highspy.HighsModelStatus.kInfeasible:
+            status = pulp.LpStatusInfeasible
+        elif etat in (highspy.HighsModelStatus.kUnbounded, highspy.HighsModelStatus.kUnboundedOrInfeasible):
+            status = pulp.LpStatusUnbounded
+        elif h.getInfo().primal_solution_status == 2:
+            # arrêt (temps, stagnation) avec une solution réalisable, comme CBC
+            status = LpStatusFeasible
+        else:
+            status = pulp.LpStatusNotSolved
+        if not has_solution(status):
+            return status, np.zeros(modele.nb_cols)
+        return status, _arrondir(modele, np.asarray(h.getSolution().col_value))
+
+
+def _arrondir(modele: MilpMatrix, values: np.ndarray) -> np.ndarray:
+    """Colonnes entières arrondies (tolérance d'intégralité du solveur), continues inchangées."""
+    return np.where(modele.integer, np.round(values), values)
+
+
+def _set_highs_solution(h: "highspy.Highs", values) -> None:
+    """Solution de départ (MIP start) d'un modèle HiGHS déjà chargé."""
+    solution = highspy.HighsSolution()
+    solution.col_value = [float(v) for v in values]
+    h.setSolution(solution)
+
+
+class _PopenCapture:
+    """
+    Module ``subprocess`` vu par PuLP : les processus lancés par un thread
+    qui a ouvert une capture (``capturer``) y sont enregistrés. PuLP
+    n'expose pas le ``Popen`` de CBC ; le reste est délégué à ``subprocess``.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def __getattr__(self, nom):
+        return getattr(subprocess, nom)
+
+    def Popen(self, *args, **kwargs):
+        processus = subprocess.Popen(*args, **kwargs)
+        lances = getattr(self._local, 'lances', None)
+        if lances is not None:
+            lances.append(processus)
+        return processus
+
+    def capturer(self, lances: list) -> None:
+        """Enregistre dans ``lances`` les processus lancés par ce thread (``None`` : arrêt)."""
+        self._local.lances = lances
+
+
+_POPEN = _PopenCapture()
+coin_api.subprocess = _POPEN
+
+
+def _interrompre(lances: list) -> None:
+    """SIGINT aux processus encore actifs : CBC s'arrête et écrit la meilleure solution trouvée."""
+    for processus in lances:
+        if processus.poll() is None:
+            processus.send_signal(signal.SIGINT)
+
+
+class _CbcProgress(pulp.PULP_CBC_CMD):
+    """
+    ``PULP_CBC_CMD`` dont le journal est suivi en direct quand la
+    progression est publiée ou qu'un critère de stagnation est posé
+    (``stall_time``).
+    """
+
+    stall_time = None
+
+    def actualSolve(self, lp, **kwargs):
+        if (progress() is None and self.stall_time is None) or self.optionsDict.get('logPath'):
+            return super().actualSolve(lp, **kwargs)
+        stall = StallMonitor(self.stall_time) if self.stall_time is not None else None
+        lances = []
+        with tempfile.TemporaryDirectory() as tmp:
+            self.optionsDict['logPath'] = os.path.join(tmp, 'cbc.log')
+            _POPEN.capturer(lances)
+            try:
+                with CbcLogWatcher(self.optionsDict['logPath'], stall=stall, interrupt=lambda: _interrompre(lances)):
+                    return super().actualSolve(lp, **kwargs)
+            finally:
+                _POPEN.capturer(None)
+                del self.optionsDict['logPath']
+
+
+if highspy is not None:
+    class _HighsWarmStart(pulp.HiGHS):
+        """``pulp.HiGHS`` qui transmet les valeurs initiales des variables (non géré par PuLP)."""
+
+        def callSolver(self, lp):
+            _set_highs_solution(lp.solverModel, [v.varValue or 0 for v in lp.variables()])
+            super().callSolver(lp)
+
+
+MILP_BACKENDS = {
+    CbcBackend.name: CbcBackend,
+    HighsBackend.name: HighsBackend,
+}
+
+
+def get_backend(
+    name: Optional[str] = None, threads: int = 0, gap_rel: float = 0.0, gap_abs: float = 0.0, stall_time: float = 0.0
+) -> MilpBackend:
+    """
+    Instancie le backend ``name`` (``cbc`` par défaut).
+
+    Raises:
+        ValueError: backend inconnu.
+    """
+    name = (name or CbcBackend.name).lower()
+    if name not in MILP_BACKENDS:
+        raise ValueError(f"Solveur MILP inconnu : {name} (attendu : {', '.join(MILP_BACKENDS)})")
+    if name == HighsBackend.name and highspy is None:
+        logger.warning("highspy non installé - repli sur CBC")
+        name = CbcBackend.name
+    return MILP_BACKENDS[name](threads, gap_rel, gap_abs, stall_time)
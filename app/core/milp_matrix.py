@@ -0,0 +1,276 @@
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.capacity_rules import combo_allowed, solo_allowed
+from app.core.dispatch_instance import DispatchInstance
+from app.core.overlap_cliques import overlap_cliques
+
+logger = logging.getLogger(__name__)
+
+
+class MilpMatrix:
+    """
+    Modèle d'affectation sous forme de tableaux, sans objets PuLP.
+
+    Colonnes : les variables solo ``x`` (clés ``(g, c)``) puis les variables
+    combo ``y`` (clés ``(g1, g2, c)``), entières dans ``[lower, upper]``
+    (``lower`` nul par défaut), puis d'éventuelles colonnes auxiliaires
+    (``integer`` indique les colonnes entières, toutes par défaut).
+    Lignes : ``row_lower <= A·v <= row_upper``, la matrice ``A`` étant
+    stockée en CSR (``a_start``, ``a_index``, ``a_value``). La résolution
+    est confiée à un backend de ``milp_backend``.
+    """
+
+    def __init__(self, x_keys, y_keys, cost, upper, rows, cols, vals, row_lower, row_upper, integer=None):
+        self.x_keys = list(x_keys)
+        self.y_keys = list(y_keys)
+        self.cost = np.asarray(cost, dtype=float)
+        self.upper = np.asarray(upper, dtype=float)
+        self.lower = np.zeros(len(self.cost))
+        self.integer = np.ones(len(self.cost), dtype=bool) if integer is None else np.asarray(integer, dtype=bool)
+        self.row_lower = np.asarray(row_lower, dtype=float)
+        self.row_upper = np.asarray(row_upper, dtype=float)
+        self._set_coo(rows, cols, vals)
+
+    def _set_coo(self, rows, cols, vals) -> None:
+        """COO → CSR"""
+        rows, cols, vals = np.asarray(rows, dtype=int), np.asarray(cols, dtype=int), np.asarray(vals, dtype=float)
+        ordre = np.lexsort((cols, rows))
+        self.a_index = cols[ordre]
+        self.a_value = vals[ordre]
+        self.a_start = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=self.nb_rows))]).astype(int)
+
+    @property
+    def nb_cols(self) -> int:
+        return len(self.cost)
+
+    @property
+    def nb_rows(self) -> int:
+        return len(self.row_lower)
+
+    @property
+    def nb_nonzeros(self) -> int:
+        return len(self.a_value)
+
+    def add_rows(self, lignes: List[np.ndarray], upper: List[float], coefs: Optional[List[np.ndarray]] = None) -> None:
+        """Ajoute des lignes ``Σ coef·v[cols] <= upper`` (coefficients 1 par défaut) à la fin de la matrice."""
+        if not lignes:
+            return
+        self.a_index = np.concatenate([self.a_index] + [np.asarray(l, dtype=int) for l in lignes])
+        if coefs is None:
+            self.a_value = np.concatenate([self.a_value, np.ones(sum(len(l) for l in lignes))])
+        else:
+            self.a_value = np.concatenate([self.a_value] + [np.asarray(c, dtype=float) for c in coefs])
+        self.a_start = np.concatenate([self.a_start, self.a_start[-1] + np.cumsum([len(l) for l in lignes])])
+        self.row_lower = np.concatenate([self.row_lower, np.full(len(lignes), -np.inf)])
+        self.row_upper = np.concatenate([self.row_upper, np.asarray(upper, dtype=float)])
+
+    def add_columns(self, lignes, cost, upper, integer: bool = False) -> None:
+        """Ajoute des colonnes de coefficient 1 sur une seule ligne chacune (``lignes``), à la fin du modèle."""
+        lignes = np.asarray(lignes, dtype=int)
+        if lignes.size == 0:
+            return
+        nouvelles = self.nb_cols + np.arange(lignes.size)
+        rows = np.concatenate([np.repeat(np.arange(self.nb_rows), np.diff(self.a_start)), lignes])
+        self.cost = np.concatenate([self.cost, np.broadcast_to(np.asarray(cost, dtype=float), lignes.shape)])
+        self.upper = np.concatenate([self.upper, np.broadcast_to(np.asarray(upper, dtype=float), lignes.shape)])
+        self.lower = np.concatenate([self.lower, np.zeros(lignes.size)])
+        self.integer = np.concatenate([self.integer, np.full(lignes.size, integer)])
+        self._set_coo(rows, np.concatenate([self.a_index, nouvelles]), np.concatenate([self.a_value, np.ones(lignes.size)]))
+
+    def values_from(self, x: Dict[Tuple, float], y: Optional[Dict[Tuple, float]] = None) -> np.ndarray:
+        """Vecteur des colonnes à partir de valeurs indexées par clé (absentes = 0)."""
+        y = y or {}
+        return np.array([x.get(k, 0) for k in self.x_keys] + [y.get(k, 0) for k in self.y_keys], dtype=float)
+
+    def split_values(self, values) -> Tuple[Dict[Tuple, float], Dict[Tuple, float]]:
+        """Valeurs de la solution réparties en dicts ``x`` et ``y`` (mêmes clés que le modèle PuLP)."""
+        nx = len(self.x_keys)
+        x = {k: float(v) for k, v in zip(self.x_keys, values[:nx])}
+        y = {k: float(v) for k, v in zip(self.y_keys, values[nx:])}
+        return x, y
+
+
+def column_groups(modele: MilpMatrix, inst: DispatchInstance) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Indices des groupes couverts par chaque colonne ``x`` / ``y`` (second
+    groupe -1 pour un solo) et places apportées à chacun (moitié du
+    véhicule pour un combo), comme dans les lignes de couverture.
+    """
+    gidx, cidx = inst.group_index, inst.driver_index
+    g1 = np.array([gidx[k[0]] for k in modele.x_keys] + [gidx[k[0]] for k in modele.y_keys], dtype=int)
+    g2 = np.array([-1] * len(modele.x_keys) + [gidx[k[1]] for k in modele.y_keys], dtype=int)
+    places = inst.n[[cidx[k[-1]] for k in modele.x_keys + modele.y_keys]].astype(float)
+    places[len(modele.x_keys):] *= 0.5
+    return g1, g2, places
+
+
+def assignment_columns(inst: DispatchInstance, solo_cost, combo_cost: Dict[Tuple, float]) -> Dict[str, Any]:
+    """
+    Variables d'affectation et lignes de couverture, communes aux
+    formulations (cliques : ``build_milp_matrix``, flot : ``flow_model``).
+
+    Les affectations interdites par les règles de capacité (grand véhicule
+    pour un petit groupe, cf. capacity_rules) ne créent pas de colonne.
+
+    Returns:
+        ``x_keys``, ``y_keys``, ``cost``, ``upper``, ``driver`` (indice du
+        chauffeur de chaque colonne), ``debut`` (début de la mission) et les
+        lignes de couverture en COO (``rows``, ``cols``, ``vals``,
+        ``row_lower``, ``row_upper``), à compléter.
+    """
+    gidx, cidx = inst.group_index, inst.driver_index
+
+    ng = inst.ng
+    x_keys, x_g, x_c, x_cost = [], [], [], []
+    for (gid, cid) in solo_cost:
+        if gid in gidx and cid in cidx:
+            x_keys.append((gid, cid))
+            x_g.append(gidx[gid])
+            x_c.append(cidx[cid])
+            x_cost.append(solo_cost[(gid, cid)])
+    y_keys, y_g1, y_g2, y_c, y_cost = [], [], [], [], []
+    for (g1, g2, c), cost in combo_cost.items():
+        if g1 in gidx and g2 in gidx and c in cidx:
+            y_keys.append((g1, g2, c))
+            y_g1.append(gidx[g1])
+            y_g2.append(gidx[g2])
+            y_c.append(cidx[c])
+            y_cost.append(cost)
+
+    x_g, x_c, x_cost = np.array(x_g, dtype=int), np.array(x_c, dtype=int), np.array(x_cost, dtype=float)
+    y_g1, y_g2 = np.array(y_g1, dtype=int), np.array(y_g2, dtype=int)
+    y_c, y_cost = np.array(y_c, dtype=int), np.array(y_cost, dtype=float)
+    # règles de capacité appliquées avant la création des colonnes
+    gardes_x = np.flatnonzero(solo_allowed(ng[x_g], inst.n[x_c]))
+    gardes_y = np.flatnonzero(combo_allowed(ng[y_g1], ng[y_g2], inst.n[y_c]))
+    x_keys = [x_keys[k] for k in gardes_x]
+    y_keys = [y_keys[k] for k in gardes_y]
+    x_g, x_c, x_cost = x_g[gardes_x], x_c[gardes_x], x_cost[gardes_x]
+    y_g1, y_g2, y_c, y_cost = y_g1[gardes_y], y_g2[gardes_y], y_c[gardes_y], y_cost[gardes_y]
+    nx, ny = len(x_keys), len(y_keys)
+    x_cols, y_cols = np.arange(nx), nx + np.arange(ny)
+
+    cost = np.concatenate([x_cost, y_cost])
+    driver = np.concatenate([x_c, y_c])
+    upper = inst.size[driver].astype(float)
+
+    return {
+        'x_keys': x_keys,
+        'y_keys': y_keys,
+        'cost': cost,
+        'upper': upper,
+        'driver': driver,
+        'debut': np.concatenate([inst.t_min[x_g], np.minimum(inst.t_min[y_g1], inst.t_min[y_g2])]),
+        # couverture : une ligne par groupe
+        'rows': [x_g, y_g1, y_g2],
+        'cols': [x_cols, y_cols, y_cols],
+        'vals': [inst.n[x_c].astype(float), 0.5 * inst.n[y_c], 0.5 * inst.n[y_c]],
+        'row_lower': list(ng.astype(float)),
+        'row_upper': [np.inf] * inst.nb_groupes,
+    }
+
+
+def build_milp_matrix(
+    inst: DispatchInstance, solo_cost, combo_cost: Dict[Tuple, float], cliques: bool = True
+) -> MilpMatrix:
+    """
+    Construit le modèle de ``solve_MILP`` directement en tableaux COO.
+
+    Mêmes variables, objectif et contraintes que le chemin PuLP :
+    couverture des groupes, cliques de non-chevauchement, 4 missions par
+    chauffeur (``4 × size`` pour une classe, ``max_missions`` de l'instance).
+    Sans ``cliques``, le modèle est relâché : les contraintes de
+    non-chevauchement sont ajoutées à la demande (cf. lazy_overlap).
+    """
+    m = assignment_columns(inst, solo_cost, combo_cost)
+    cost, driver = m['cost'], m['driver']
+    rows, cols, vals = m['rows'], m['cols'], m['vals']
+    row_lower, row_upper = m['row_lower'], m['row_upper']
+
+    # non-chevauchement + max4, chauffeur par chauffeur
+    debut = m['debut']
+    fin = debut + cost
+    par_chauffeur = np.argsort(driver, kind='stable')
+    bornes = np.searchsorted(driver[par_chauffeur], np.arange(inst.nb_chauffeurs + 1))
+    lignes_c, cols_c = [], []
+    for j in range(inst.nb_chauffeurs):
+        taches = par_chauffeur[bornes[j]:bornes[j + 1]]
+        if taches.size == 0:
+            continue
+        size = int(inst.size[j])
+        if cliques:
+            intervalles = list(zip(debut[taches].tolist(), fin[taches].tolist()))
+            for clique in overlap_cliques(intervalles, min_size=size + 1):
+                lignes_c.append(np.full(len(clique), len(row_lower)))
+                cols_c.append(taches[clique])
+                row_lower.append(-np.inf)
+                row_upper.append(size)
+        lignes_c.append(np.full(taches.size, len(row_lower)))
+        cols_c.append(taches)
+        row_lower.append(-np.inf)
+        row_upper.append(int(inst.max_missions[j]))
+    if lignes_c:
+        rows.append(np.concatenate(lignes_c))
+        cols.append(np.concatenate(cols_c))
+        vals.append(np.ones(len(rows[-1])))
+
+    modele = MilpMatrix(
+        m['x_keys'], m['y_keys'], cost, m['upper'],
+        np.concatenate(rows), np.concatenate(cols), np.concatenate(vals),
+        row_lower, row_upper
+    )
+    # chauffeur et intervalle de chaque mission (coupes de non-chevauchement à la demande)
+    modele.driver, modele.debut, modele.fin = driver, debut, fin
+    modele.cliques = cliques
+    logger.info(
+        f"Modèle matriciel : {modele.nb_cols} variables, {modele.nb_rows} contraintes, "
+        f"{modele.nb_nonzeros} coefficients"
+    )
+    return modele
+
+
+# =============================================================================
+# Export MPS
+# =============================================================================
+
+def write_mps(modele: MilpMatrix, path: str) -> None:
+    """Écrit le modèle au format MPS (colonnes ``X<k>``, lignes ``R<k>``)."""
+    ordre = np.argsort(modele.a_index, kind='stable')
+    lignes_de = np.repeat(np.arange(modele.nb_rows), np.diff(modele.a_start))[ordre]
+    valeurs = modele.a_value[ordre]
+    bornes = np.searchsorted(modele.a_index[ordre], np.arange(modele.nb_cols + 1))
+
+    out: List[str] = ["NAME          AFFECTATION", "ROWS", " N  OBJ"]
+    for r in range(modele.nb_rows):
+        if modele.row_lower[r] == modele.row_upper[r]:
+            sens = 'E'
+        else:
+            sens = 'G' if np.isfinite(modele.row_lower[r]) else 'L'
+        out.append(f" {sens}  R{r}")
+    out.append("COLUMNS")
+    entier = False
+    for k in range(modele.nb_cols):
+        if modele.integer[k] != entier:
+            entier = bool(modele.integer[k])
+            out.append(f"    MARKER                 'MARKER'                 '{'INTORG' if entier else 'INTEND'}'")
+        out.append(f"    {'X%d' % k:<8}  {'OBJ':<8}  {modele.cost[k]: .12e}")
+        for r, v in zip(lignes_de[bornes[k]:bornes[k + 1]], valeurs[bornes[k]:bornes[k + 1]]):
+            out.append(f"    {'X%d' % k:<8}  {'R%d' % r:<8}  {v: .12e}")
+    if entier:
+        out.append("    MARKER                 'MARKER'                 'INTEND'")
+    out.append("RHS")
+    for r in range(modele.nb_rows):
+        rhs = modele.row_lower[r] if np.isfinite(modele.row_lower[r]) else modele.row_upper[r]
+        out.append(f"    {'RHS':<8}  {'R%d' % r:<8}  {rhs: .12e}")
+    out.append("BOUNDS")
+    for k in range(modele.nb_cols):
+        if modele.lower[k] != 0:
+            out.append(f" LO {'BND':<8}  {'X%d' % k:<8}  {modele.lower[k]: .12e}")
+        out.append(f" UP {'BND':<8}  {'X%d' % k:<8}  {modele.upper[k]: .12e}")
+    out.append("ENDATA")
+    with open(path, 'w') as f:
+        f.write("\n".join(out) + "\n")
+
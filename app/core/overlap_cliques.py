@@ -0,0 +1,49 @@
+from typing import List, Sequence, Tuple
+
+# Ordre des événements à un même instant : les fins avant les débuts (deux
+# missions qui se touchent ne se chevauchent pas), les missions de durée
+# nulle entre les deux, ouvertes puis fermées une par une.
+_FIN, _PONCTUEL, _DEBUT = 0, 1, 2
+
+
+def overlap_cliques(intervals: Sequence[Tuple[float, float]], min_size: int = 2) -> List[List[int]]:
+    """
+    Cliques maximales du graphe d'intervalles, par balayage des extrémités.
+
+    Deux intervalles ``[s, f)`` se chevauchent si ``s_a < f_b`` et
+    ``s_b < f_a`` (même test que l'ancienne comparaison deux à deux). Dans un
+    graphe d'intervalles, les cliques maximales sont les ensembles
+    d'intervalles actifs juste avant chaque fin qui suit un début : on les
+    obtient en O(T log T) au lieu de comparer toutes les paires.
+
+    Args:
+        intervals: liste de (début, fin)
+        min_size: taille minimale des cliques renvoyées
+
+    Returns:
+        Listes d'indices dans ``intervals`` ; toute paire d'intervalles qui se
+        chevauchent apparaît dans au moins une clique.
+    """
+    events = []
+    for k, (s, f) in enumerate(intervals):
+        if f > s:
+            events.append((s, _DEBUT, k, 0))
+            events.append((f, _FIN, k, 0))
+        else:
+            events.append((s, _PONCTUEL, k, 0))
+            events.append((s, _PONCTUEL, k, 1))
+    events.sort()
+
+    cliques: List[List[int]] = []
+    actifs = {}  # dict ordonné : indices des intervalles ouverts
+    dernier_ajout = False
+    for _, _, k, _ in events:
+        if k in actifs:
+            if dernier_ajout and len(actifs) >= min_size:
+                cliques.append(list(actifs))
+            del actifs[k]
+            dernier_ajout = False
+        else:
+            actifs[k] = None
+            dernier_ajout = True
+    return cliques
@@ -0,0 +1,159 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from app.core.combo_candidates import iter_combo_candidates
+from app.core.cost_matrix import TOURNEES_COMBO, CostMatrix, _column, haversine_km
+
+logger = logging.getLogger(__name__)
+
+
+# =============================================================================
+# Tableaux partagés entre processus
+# =============================================================================
+
+def _share(array: np.ndarray, blocs: List[shared_memory.SharedMemory]) -> Tuple[str, Tuple[int, ...], str]:
+    """Copie un tableau en mémoire partagée et renvoie son descripteur."""
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    blocs.append(shm)
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+    return shm.name, array.shape, array.dtype.str
+
+
+def _attach(desc, blocs: List[shared_memory.SharedMemory]) -> np.ndarray:
+    """Vue NumPy sur un tableau partagé créé par ``_share``."""
+    name, shape, dtype = desc
+    shm = shared_memory.SharedMemory(name=name)
+    blocs.append(shm)
+    return np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def _combo_chunk(descs: Dict[str, Any], lo: int, hi: int) -> int:
+    """
+    Calcule les coûts combinés des entrées ``[lo, hi)`` et les écrit
+    directement dans le tableau de sortie partagé (rien n'est renvoyé
+    entrée par entrée au processus parent).
+    """
+    blocs: List[shared_memory.SharedMemory] = []
+    try:
+        aller = _attach(descs['aller'], blocs)
+        retour = _attach(descs['retour'], blocs)
+        interieur = _attach(descs['interieur'], blocs)
+        lignes = _attach(descs['lignes'], blocs)
+        paire = _attach(descs['paire'], blocs)[lo:hi]
+        col = _attach(descs['col'], blocs)[lo:hi]
+        out = _attach(descs['out'], blocs)
+
+        couts = np.full(hi - lo, np.inf)
+        for k, (debut, fin) in enumerate(TOURNEES_COMBO):
+            tour = (aller[lignes[paire, debut], col]
+                    + interieur[paire, k]
+                    + retour[lignes[paire, fin], col])
+            couts = np.minimum(couts, tour)
+        couts[np.isinf(couts)] = np.nan
+        out[lo:hi] = couts
+        return hi - lo
+    finally:
+        for shm in blocs:
+            shm.close()
+
+
+def _pair_leg_tables(groupes: List[Dict[str, Any]], i1: np.ndarray, i2: np.ndarray) -> np.ndarray:
+    """Version vectorisée de ``combo_leg_table`` pour P paires → tableau (P, 4)."""
+    lat_p, lng_p = _column(groupes, 'lat_pickup'), _column(groupes, 'long_pickup')
+    lat_d, lng_d = _column(groupes, 'dest_lat'), _column(groupes, 'dest_lng')
+
+    def t(lat_a, lng_a, a, lat_b, lng_b, b):
+        return np.round(haversine_km(lat_a[a], lng_a[a], lat_b[b], lng_b[b]))
+
+    c1c2 = t(lat_p, lng_p, i1, lat_p, lng_p, i2)
+    c2a1 = t(lat_p, lng_p, i2, lat_d, lng_d, i1)
+    c2a2 = t(lat_p, lng_p, i2, lat_d, lng_d, i2)
+    c1a1 = t(lat_p, lng_p, i1, lat_d, lng_d, i1)
+    c1a2 = t(lat_p, lng_p, i1, lat_d, lng_d, i2)
+    a1a2 = t(lat_d, lng_d, i1, lat_d, lng_d, i2)
+    return np.stack([
+        c1c2 + c2a1 + a1a2,
+        c1c2 + c2a2 + a1a2,
+        c1c2 + c1a1 + a1a2,
+        c1c2 + c1a2 + a1a2,
+    ], axis=1)
+
+
+# =============================================================================
+# Point d'entrée
+# =============================================================================
+
+def compute_combo_costs_parallel(
+    solo: CostMatrix,
+    groupes: List[Dict[str, Any]],
+    chauffeurs: List[Dict[str, Any]],
+    tolerance_min: float,
+    workers: int
+) -> Dict[Tuple[Any, Any, Any], int]:
+    """
+    Calcule ``combo_cost`` en répartissant les candidats sur un
+    ``ProcessPoolExecutor``.
+
+    Les matrices aller/retour, la table des trajets par paire et le tableau
+    de sortie sont placés en mémoire partagée ; chaque worker traite un bloc
+    contigu d'entrées (paire, chauffeur) et écrit ses résultats en place.
+    """
+    # Les éligibles d'une paire sont un suffixe des chauffeurs triés par capacité
+    # (même tri stable que iter_combo_candidates)
+    ordre = np.array([solo.driver_index[c['id']] for c in sorted(chauffeurs, key=lambda c: c['n'])], dtype=np.int64)
+    idx = {g['id']: i for i, g in enumerate(groupes)}
+    i1, i2, tailles = [], [], []
+    for g1, g2, eligibles in iter_combo_candidates(groupes, chauffeurs, tolerance_min):
+        if eligibles:
+            i1.append(idx[g1['id']])
+            i2.append(idx[g2['id']])
+            tailles.append(len(eligibles))
+    if not tailles:
+        return {}
+
+    i1, i2, tailles = np.array(i1), np.array(i2), np.array(tailles)
+    paire = np.repeat(np.arange(len(tailles)), tailles)
+    fin_paire = np.cumsum(tailles)
+    rang = np.arange(len(paire)) - np.repeat(fin_paire - tailles, tailles)
+    col = ordre[len(ordre) - np.repeat(tailles, tailles) + rang]
+
+    lignes_g = np.array([solo.group_index[g['id']] for g in groupes], dtype=np.int64)
+    lignes = np.stack([lignes_g[i1], lignes_g[i2]], axis=1)
+    interieur = _pair_leg_tables(groupes, i1, i2)
+    n_entrees = len(paire)
+
+    blocs: List[shared_memory.SharedMemory] = []
+    try:
+        descs = {
+            'aller': _share(np.ascontiguousarray(solo.aller), blocs),
+            'retour': _share(np.ascontiguousarray(solo.retour), blocs),
+            'interieur': _share(interieur, blocs),
+            'lignes': _share(lignes, blocs),
+            'paire': _share(paire, blocs),
+            'col': _share(col, blocs),
+            'out': _share(np.full(n_entrees, np.nan), blocs),
+        }
+        bornes = np.linspace(0, n_entrees, workers * 4 + 1, dtype=np.int64)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_combo_chunk, descs, int(lo), int(hi))
+                       for lo, hi in zip(bornes[:-1], bornes[1:]) if hi > lo]
+            for f in futures:
+                f.result()
+        out = np.ndarray((n_entrees,), dtype=np.float64, buffer=blocs[-1].buf).copy()
+    finally:
+        for shm in blocs:
+            shm.close()
+            shm.unlink()
+
+    logger.info(f"{n_entrees} coûts combinés calculés sur {workers} processus")
+    gids = [g['id'] for g in groupes]
+    cids = solo.driver_ids
+    return {
+        (gids[i1[p]], gids[i2[p]], cids[c]): int(v)
+        for p, c, v in zip(paire.tolist(), col.tolist(), out.tolist())
+        if v == v
+    }
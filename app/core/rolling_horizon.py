@@ -0,0 +1,162 @@
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pulp
+
+from app.core.decomposition import _merge_status
+from app.core.dispatch_instance import DispatchInstance
+from app.core.milp_backend import status_name
+
+logger = logging.getLogger(__name__)
+
+
+class DriverState:
+    """
+    État d'un chauffeur reporté d'une tranche à la suivante : missions déjà
+    utilisées, intervalles occupés par les missions validées et heure de
+    fin de la dernière mission.
+    """
+
+    def __init__(self, size: int, max_missions: int):
+        self.size = size
+        self.restantes = max_missions
+        self.occupe: List[Tuple[float, float]] = []
+        self.libre_a = float('-inf')
+
+    def accepte(self, debut: float, fin: float) -> bool:
+        """Mission compatible avec les missions validées (au plus ``size`` simultanées)."""
+        if self.restantes <= 0:
+            return False
+        if debut >= self.libre_a:
+            return True
+        return sum(1 for s, f in self.occupe if s < fin and debut < f) < self.size
+
+    def valider(self, debut: float, fin: float, nb: int) -> None:
+        self.restantes -= nb
+        self.occupe.extend([(debut, fin)] * nb)
+        self.libre_a = max(self.libre_a, fin)
+
+
+def _valeurs(d: Dict) -> Dict:
+    return {k: pulp.value(v) or 0 for k, v in d.items()}
+
+
+def solve_rolling_horizon(
+    inst: DispatchInstance,
+    solo_cost,
+    combo_cost: Dict[Tuple[Any, Any, Any], float],
+    time_limit: float,
+    solve_fn: Callable,
+    slice_min: float,
+    overlap_min: float,
+    backend=None,
+    warm_start: Optional[Dict[Any, List[Dict[str, Any]]]] = None
+) -> Tuple[int, Dict, Dict]:
+    """
+    Résout l'événement tranche par tranche avec ``solve_fn`` (``solve_MILP``).
+
+    Chaque tranche ne voit que ses groupes et les missions encore possibles
+    compte tenu de l'état des chauffeurs (``DriverState``) : budget de
+    missions restant et missions déjà validées. Seules les affectations des
+    groupes de la partie non recouverte sont validées ; la taille des
+    modèles reste bornée par la tranche et le temps total croît
+    linéairement avec la durée de l'événement. Le temps restant est réparti
+    au prorata des groupes de la tranche parmi les groupes non encore
+    validés, la dernière tranche reçoit donc tout le reliquat.
+
+    Returns:
+        (statut fusionné, x, y) avec des valeurs numériques, directement
+        utilisables par ``extract_assignments``.
+    """
+    etats = {
+        cid: DriverState(int(inst.size[j]), int(inst.max_missions[j]))
+        for j, cid in enumerate(inst.driver_ids)
+    }
+    gidx = inst.group_index
+
+    # coûts indexés par groupe (premier groupe pour un combo) en une passe
+    solos: Dict[Any, List] = {}
+    for k in solo_cost:
+        if k[0] in gidx and k[1] in etats:
+            solos.setdefault(k[0], []).append(k)
+    combos: Dict[Any, List] = {}
+    for k in combo_cost:
+        if k[0] in gidx and k[1] in gidx and k[2] in etats:
+            combos.setdefault(k[0], []).append(k)
+
+    pas = max(1.0, slice_min - overlap_min)
+    ordre = sorted(inst.group_ids, key=inst.t_min_of)
+    total = inst.nb_groupes
+    fin_budget = time.perf_counter() + time_limit
+    x, y, statuts = {}, {}, []
+    valides_total: set = set()
+    k = 0
+    while k < len(ordre):
+        debut = inst.t_min_of(ordre[k])
+        gids, m = [], k
+        while m < len(ordre) and inst.t_min_of(ordre[m]) < debut + slice_min:
+            if ordre[m] not in valides_total:
+                gids.append(ordre[m])
+            m += 1
+        # dernière tranche : tout est validé
+        fin_validee = debut + pas if m < len(ordre) else float('inf')
+
+        dans_tranche = set(gids)
+        solo = {}
+        for gid in gids:
+            s = inst.t_min_of(gid)
+            for cle in solos.get(gid, []):
+                if etats[cle[1]].accepte(s, s + solo_cost[cle]):
+                    solo[cle] = solo_cost[cle]
+        combo = {}
+        for gid in gids:
+            for cle in combos.get(gid, []):
+                if cle[1] in dans_tranche:
+                    s = min(inst.t_min_of(cle[0]), inst.t_min_of(cle[1]))
+                    if etats[cle[2]].accepte(s, s + combo_cost[cle]):
+                        combo[cle] = combo_cost[cle]
+        cids = {cle[1] for cle in solo} | {cle[2] for cle in combo}
+        groupes = [inst.groupe(gid) for gid in gids]
+        chauffeurs = [{**inst.chauffeur(cid), 'max_missions': etats[cid].restantes} for cid in cids]
+        depart = None
+        if warm_start:
+            depart = {gid: [a for a in warm_start.get(gid, []) if (gid, a['chauffeur']) in solo] for gid in gids}
+        # budget épuisé : plancher minimal pour obtenir une solution de la tranche
+        restant = fin_budget - time.perf_counter()
+        limite = max(0.5, restant * len(gids) / max(1, total - len(valides_total)))
+
+        _, status, xs, ys = solve_fn(groupes, chauffeurs, solo, combo, limite, backend=backend, warm_start=depart)
+        statuts.append(status)
+        xs, ys = _valeurs(xs), _valeurs(ys)
+
+        # validation de la partie non recouverte, étendue aux groupes combinés avec elle
+        valides = {gid for gid in gids if inst.t_min_of(gid) < fin_validee}
+        liens = [(g1, g2) for (g1, g2, _), v in ys.items() if v]
+        ajout = True
+        while ajout:
+            ajout = False
+            for g1, g2 in liens:
+                if (g1 in valides) != (g2 in valides):
+                    valides.update((g1, g2))
+                    ajout = True
+        for (gid, cid), v in xs.items():
+            if gid in valides and v:
+                s = inst.t_min_of(gid)
+                etats[cid].valider(s, s + solo_cost[(gid, cid)], int(round(v)))
+                x[(gid, cid)] = v
+        for (g1, g2, cid), v in ys.items():
+            if v and g1 in valides:
+                s = min(inst.t_min_of(g1), inst.t_min_of(g2))
+                etats[cid].valider(s, s + combo_cost[(g1, g2, cid)], int(round(v)))
+                y[(g1, g2, cid)] = v
+        valides_total |= valides
+        logger.info(
+            f"Horizon glissant : tranche {len(statuts)} à t={debut:.0f} min - {len(gids)} groupes, "
+            f"{len(valides)} validés, {len(solo) + len(combo)} variables, statut {status_name(status)}"
+        )
+        while k < len(ordre) and (ordre[k] in valides_total or inst.t_min_of(ordre[k]) < fin_validee):
+            k += 1
+
+    status = _merge_status(statuts) if statuts else pulp.LpStatusOptimal
+    return status, x, y
@@ -0,0 +1,218 @@
+import json
+import logging
+import math
+import re
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Ligne de progression écrite sur la sortie standard du script de dispatch,
+# relue en direct par l'API (cf. api.dispatch.run_dispatch_script)
+PREFIXE = "DISPATCH_PROGRESS "
+
+
+class ProgressReporter:
+    """
+    Publie des événements de progression structurés pendant un dispatch :
+    étape, taille du modèle, puis solution courante, meilleure borne, écart
+    et nœuds explorés pendant la résolution.
+
+    Les événements du solveur sont limités à un par ``min_interval``
+    secondes, sauf nouvelle solution (``force``). ``sink`` reçoit chaque
+    événement (dict sérialisable en JSON).
+    """
+
+    def __init__(self, sink: Callable[[Dict[str, Any]], None], min_interval: float = 1.0):
+        self.sink = sink
+        self.min_interval = min_interval
+        self._dernier = 0.0
+        self._verrou = threading.Lock()
+
+    def _publier(self, evenement: Dict[str, Any]) -> None:
+        evenement['t'] = round(time.time(), 3)
+        try:
+            self.sink(evenement)
+        except Exception as e:  # la progression ne doit jamais interrompre la résolution
+            logger.debug(f"Publication de la progression impossible : {e}")
+
+    def stage(self, name: str, **info) -> None:
+        self._publier({'type': 'stage', 'stage': name, **info})
+
+    def model(self, variables: int, contraintes: int, **info) -> None:
+        self._publier({'type': 'model', 'variables': int(variables), 'contraintes': int(contraintes), **info})
+
+    def solver(
+        self,
+        incumbent: Optional[float] = None,
+        bound: Optional[float] = None,
+        gap: Optional[float] = None,
+        nodes: Optional[int] = None,
+        force: bool = False
+    ) -> None:
+        with self._verrou:
+            maintenant = time.monotonic()
+            if not force and maintenant - self._dernier < self.min_interval:
+                return
+            self._dernier = maintenant
+        if gap is None and incumbent is not None and bound is not None:
+            gap = relative_gap(incumbent, bound)
+        self._publier({
+            'type': 'solver',
+            'incumbent': _fini(incumbent),
+            'bound': _fini(bound),
+            'gap': _fini(gap),
+            'nodes': nodes,
+        })
+
+
+def _fini(v: Optional[float]) -> Optional[float]:
+    return float(v) if v is not None and math.isfinite(v) else None
+
+
+def relative_gap(incumbent: float, bound: float) -> Optional[float]:
+    """Écart relatif ``|solution - borne| / |solution|`` (définition de CBC et HiGHS)."""
+    if incumbent is None or bound is None or not math.isfinite(incumbent) or not math.isfinite(bound):
+        return None
+    return abs(incumbent - bound) / max(abs(incumbent), 1e-10)
+
+
+def stdout_sink(evenement: Dict[str, Any]) -> None:
+    """Écrit l'événement sur une ligne préfixée de la sortie standard."""
+    sys.stdout.write(PREFIXE + json.dumps(evenement) + "\n")
+    sys.stdout.flush()
+
+
+def parse_progress_line(ligne: str) -> Optional[Dict[str, Any]]:
+    """Événement contenu dans une ligne de sortie, ``None`` pour une ligne ordinaire."""
+    if not ligne.startswith(PREFIXE):
+        return None
+    try:
+        return json.loads(ligne[len(PREFIXE):])
+    except ValueError:
+        return None
+
+
+# Reporter du processus (aucun par défaut : les solveurs ne s'abonnent à rien)
+_reporter: Optional[ProgressReporter] = None
+
+
+def set_progress_reporter(reporter: Optional[ProgressReporter]) -> None:
+    global _reporter
+    _reporter = reporter
+
+
+def progress() -> Optional[ProgressReporter]:
+    return _reporter
+
+
+def publish_stage(name: str, **info) -> None:
+    if _reporter is not None:
+        _reporter.stage(name, **info)
+
+
+def publish_model(variables: int, contraintes: int, **info) -> None:
+    if _reporter is not None:
+        _reporter.model(variables, contraintes, **info)
+
+
+# =============================================================================
+# Journal de CBC
+# =============================================================================
+
+_NOMBRE = r"(-?[\d.]+(?:e[+-]?\d+)?)"
+_CBC_SOLUTION = re.compile(rf"Cbc00(?:04|12)I Integer solution of {_NOMBRE} found.* and (\d+) nodes")
+_CBC_NOEUDS = re.compile(rf"Cbc0010I After (\d+) nodes, \d+ on tree, {_NOMBRE} best solution, best possible {_NOMBRE}")
+_CBC_RACINE = re.compile(rf"Cbc0013I At root node, .* to {_NOMBRE}")
+_CBC_CONTINU = re.compile(rf"Continuous objective value is {_NOMBRE}")
+_CBC_OPTIMAL = "Result - Optimal solution found"
+
+
+class CbcLogState:
+    """Solution et borne courantes reconstruites ligne à ligne depuis le journal de CBC."""
+
+    def __init__(self):
+        self.incumbent = None
+        self.bound = None
+        self.nodes = 0
+
+    def feed(self, ligne: str) -> bool:
+        """Met à jour l'état ; ``True`` si une nouvelle solution a été trouvée."""
+        m = _CBC_SOLUTION.search(ligne)
+        if m:
+            self.incumbent, self.nodes = float(m.group(1)), int(m.group(2))
+            return True
+        m = _CBC_NOEUDS.search(ligne)
+        if m:
+            self.nodes = int(m.group(1))
+            self.bound = float(m.group(3))
+            if m.group(2) != "1e+50":
+                self.incumbent = float(m.group(2))
+            return False
+        m = _CBC_RACINE.search(ligne) or _CBC_CONTINU.search(ligne)
+        if m:
+            self.bound = float(m.group(1))
+        elif ligne.startswith(_CBC_OPTIMAL) and self.incumbent is not None:
+            self.bound = self.incumbent
+        return False
+
+
+class CbcLogWatcher:
+    """
+    Suit le journal de CBC pendant la résolution (thread) et publie la
+    progression. Avec ``stall`` (cf. stop_criteria.StallMonitor), appelle
+    ``interrupt`` quand la solution ne s'améliore plus. Sans reporter actif
+    ni critère de stagnation, ne fait rien.
+    """
+
+    def __init__(
+        self, path: str, interval: float = 0.5, stall=None, interrupt: Optional[Callable[[], Any]] = None
+    ):
+        self.path = path
+        self.interval = interval
+        self.stall = stall
+        self.interrupt = interrupt
+        self._fin = threading.Event()
+        self._thread = None
+
+    def __enter__(self) -> "CbcLogWatcher":
+        if _reporter is not None or self.stall is not None:
+            self._thread = threading.Thread(target=self._suivre, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._fin.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _suivre(self) -> None:
+        etat = CbcLogState()
+        position, reste, interrompu = 0, "", False
+        while True:
+            fini = self._fin.is_set()
+            try:
+                with open(self.path) as f:
+                    f.seek(position)
+                    morceau = f.read()
+                    position = f.tell()
+            except FileNotFoundError:
+                morceau = ""
+            lignes = (reste + morceau).split("\n")
+            reste = lignes.pop()
+            for ligne in lignes:
+                nouvelle = etat.feed(ligne)
+                if _reporter is not None and (nouvelle or etat.bound is not None):
+                    _reporter.solver(etat.incumbent, etat.bound, nodes=etat.nodes, force=nouvelle)
+            if self.stall is not None and not interrompu and not fini and self.stall.stalled(etat.incumbent):
+                logger.info(f"Aucune amélioration depuis {self.stall.stall_time}s - arrêt de CBC")
+                self.interrupt()
+                interrompu = True
+            if fini:
+                # état final toujours publié (les dernières lignes ont pu être filtrées par le débit)
+                if _reporter is not None and (etat.bound is not None or etat.incumbent is not None):
+                    _reporter.solver(etat.incumbent, etat.bound, nodes=etat.nodes, force=True)
+                return
+            self._fin.wait(self.interval)
@@ -0,0 +1,65 @@
+import logging
+import math
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StallMonitor:
+    """
+    Critère d'arrêt sur stagnation : la résolution s'arrête quand la
+    meilleure solution ne s'est pas améliorée depuis ``stall_time``
+    secondes. Tant qu'aucune solution n'est connue, la recherche continue.
+    """
+
+    def __init__(self, stall_time: float, tolerance: float = 1e-6):
+        self.stall_time = stall_time
+        self.tolerance = tolerance
+        self.incumbent = None
+        self._depuis = time.monotonic()
+
+    def stalled(self, incumbent: Optional[float]) -> bool:
+        """Enregistre la solution courante ; ``True`` si la recherche stagne."""
+        maintenant = time.monotonic()
+        if incumbent is None or not math.isfinite(incumbent):
+            return False
+        if self.incumbent is None or incumbent < self.incumbent - self.tolerance:
+            self.incumbent = incumbent
+            self._depuis = maintenant
+            return False
+        return maintenant - self._depuis >= self.stall_time
+
+
+class TimeBudget:
+    """
+    Budget de temps global d'un dispatch, réparti entre étapes.
+
+    ``parts`` associe à chaque étape (dans l'ordre d'exécution) sa part du
+    budget total. Une étape reçoit le temps restant moins les parts
+    réservées aux étapes suivantes : le temps non utilisé par une étape
+    (arrêt sur écart ou stagnation, étape sautée) profite aux suivantes.
+    """
+
+    def __init__(self, total: float, parts: Dict[str, float], minimum: float = 1.0):
+        self.total = total
+        self.parts = parts
+        self.minimum = minimum
+        self._debut = time.perf_counter()
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._debut
+
+    def remaining(self) -> float:
+        return max(0.0, self.total - self.elapsed())
+
+    def allot(self, etape: str, plafond: Optional[float] = None) -> float:
+        """Limite de temps de ``etape`` (au moins ``minimum``, au plus ``plafond``)."""
+        etapes = list(self.parts)
+        reserve = sum(self.parts[e] for e in etapes[etapes.index(etape) + 1:]) * self.total
+        limite = max(self.minimum, self.remaining() - reserve)
+        if plafond is not None:
+            limite = min(limite, plafond)
+        logger.info(f"Budget de temps : {limite:.1f}s pour l'étape {etape} ({self.remaining():.1f}s restantes)")
+        return limite
+
@@ -0,0 +1,98 @@
+import logging
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from app.core.dispatch_instance import DispatchInstance
+from app.core.milp_matrix import MilpMatrix
+
+logger = logging.getLogger(__name__)
+
+# Chauffeurs identiques : mêmes capacité, nombre de missions, taille de classe
+# et mêmes missions possibles aux mêmes coûts (même point de départ, mêmes
+# disponibilités). Toute permutation d'entre eux donne une solution de même
+# coût ; on n'en garde qu'une en ordonnant leurs nombres de missions.
+
+
+def identical_drivers(inst: DispatchInstance, solo_cost, combo_cost: Dict[Tuple, float]) -> List[List[int]]:
+    """
+    Classes de chauffeurs interchangeables (indices de l'instance, dans
+    l'ordre de l'instance), d'au moins deux chauffeurs ayant des missions.
+    """
+    gidx, cidx = inst.group_index, inst.driver_index
+    solos = [[] for _ in range(inst.nb_chauffeurs)]
+    combos = [[] for _ in range(inst.nb_chauffeurs)]
+    for (g, c) in solo_cost:
+        if g in gidx and c in cidx:
+            solos[cidx[c]].append((gidx[g], solo_cost[(g, c)]))
+    for (g1, g2, c), cout in combo_cost.items():
+        if g1 in gidx and g2 in gidx and c in cidx:
+            combos[cidx[c]].append((gidx[g1], gidx[g2], cout))
+
+    classes: Dict[Tuple, List[int]] = {}
+    for j in range(inst.nb_chauffeurs):
+        if not solos[j] and not combos[j]:
+            continue
+        cle = (
+            int(inst.n[j]), int(inst.size[j]), int(inst.max_missions[j]),
+            tuple(sorted(solos[j])), tuple(sorted(combos[j])),
+        )
+        classes.setdefault(cle, []).append(j)
+    return [membres for membres in classes.values() if len(membres) > 1]
+
+
+def symmetry_pairs(classes: List[List[int]]) -> List[Tuple[int, int]]:
+    """Paires ``(j, j')`` de chauffeurs consécutifs d'une classe : missions(j) ≥ missions(j')."""
+    return [(a, b) for membres in classes for a, b in zip(membres, membres[1:])]
+
+
+def order_start(
+    x: Dict[Tuple, float], y: Dict[Tuple, float], inst: DispatchInstance, classes: List[List[int]]
+) -> Tuple[Dict[Tuple, float], Dict[Tuple, float]]:
+    """
+    Solution de départ (valeurs ``x`` indexées par ``(g, c)``, ``y`` par
+    ``(g1, g2, c)``) permutée au sein de chaque classe pour respecter l'ordre
+    des nombres de missions : les chauffeurs étant interchangeables, elle
+    reste réalisable au même coût.
+    """
+    ids = inst.driver_ids
+    renomme = {}
+    for membres in classes:
+        missions = {ids[j]: 0.0 for j in membres}
+        for k, v in list(x.items()) + list(y.items()):
+            if k[-1] in missions:
+                missions[k[-1]] += v
+        tries = sorted(missions, key=lambda c: -missions[c])
+        renomme.update(zip(tries, (ids[j] for j in membres)))
+    return tuple(
+        {k[:-1] + (renomme.get(k[-1], k[-1]),): v for k, v in valeurs.items()} for valeurs in (x, y)
+    )
+
+
+def symmetry_rows(
+    modele: MilpMatrix, inst: DispatchInstance, classes: List[List[int]]
+) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+    """
+    Lignes ``Σ v[j'] - Σ v[j] <= 0`` d'un modèle matriciel, sur ses colonnes
+    de mission, au format de ``MilpMatrix.add_rows``.
+
+    Returns:
+        (colonnes de chaque ligne, coefficients correspondants)
+    """
+    cidx = inst.driver_index
+    driver = np.array([cidx[k[-1]] for k in modele.x_keys + modele.y_keys], dtype=int)
+    lignes, coefs = [], []
+    for a, b in symmetry_pairs(classes):
+        ca, cb = np.flatnonzero(driver == a), np.flatnonzero(driver == b)
+        lignes.append(np.concatenate([cb, ca]))
+        coefs.append(np.concatenate([np.ones(len(cb)), -np.ones(len(ca))]))
+    return lignes, coefs
+
+
+def log_symmetry(inst: DispatchInstance, classes: List[List[int]]) -> None:
+    """Journalise les classes détectées (une contrainte d'ordre par paire consécutive)."""
+    identiques = sum(len(m) for m in classes)
+    logger.info(
+        f"Brisure de symétrie : {identiques}/{inst.nb_chauffeurs} chauffeurs identiques "
+        f"en {len(classes)} classes, {identiques - len(classes)} contraintes d'ordre"
+    )
@@ -0,0 +1,30 @@
+-- Cache des distances chauffeur/adresses (cf. app/core/cost_cache.py)
+CREATE TABLE IF NOT EXISTS coutTrajetCache (
+    hash_origine TEXT NOT NULL,
+    hash_arrivee TEXT NOT NULL,
+    distance_km FLOAT NOT NULL,
+    lat_origine FLOAT,
+    lng_origine FLOAT,
+    lat_arrivee FLOAT,
+    lng_arrivee FLOAT,
+    date_created TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (hash_origine, hash_arrivee)
+);
+
+-- Invalidation : toute modification des coordonnées d'une adresse
+-- supprime les distances qui la concernent
+CREATE OR REPLACE FUNCTION invalider_cout_trajet_cache() RETURNS TRIGGER AS $$
+BEGIN
+    DELETE FROM coutTrajetCache
+    WHERE hash_origine = NEW.hash_address OR hash_arrivee = NEW.hash_address;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_invalider_cout_trajet_cache ON adresseGps;
+
+CREATE TRIGGER trg_invalider_cout_trajet_cache
+AFTER UPDATE OF latitude, longitude ON adresseGps
+FOR EACH ROW
+WHEN (OLD.latitude IS DISTINCT FROM NEW.latitude OR OLD.longitude IS DISTINCT FROM NEW.longitude)
+EXECUTE FUNCTION invalider_cout_trajet_cache();
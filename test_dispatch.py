@@ -4,6 +4,7 @@ from typing import Optional
 from app.db.postgres import PostgresDataSource
 from app.core.course_groupe_processor import CourseGroupeProcessor
 from app.core.dispatch_solver import solve_dispatch_problem
+from app.core.solver_progress import ProgressReporter, set_progress_reporter, stdout_sink
 from datetime import datetime
 
 # Configuration globale
@@ -37,42 +38,71 @@ async def update_courses_and_dispatch(
     ds: PostgresDataSource, 
     date_begin: Optional[str] = None,
     date_end: Optional[str] = None,
-    milp_time_limit: int = 300
+    milp_time_limit: int = 300,
+    solver: Optional[str] = None,
+    solver_threads: Optional[int] = None,
+    solver_gap: Optional[float] = None,
+    solver_gap_abs: Optional[float] = None,
+    solver_stall: Optional[float] = None,
+    time_budget: Optional[float] = None,
+    mode: str = "full"
 ) -> None:
     """Orchestration complète du processus"""
     try:
-        # 1. Mise à jour des groupes de courses
-        processor = CourseGroupeProcessor(ds)
-        groupes = await ds.fetch_all("""
-            SELECT cg.groupe_id
-            FROM courseGroupe cg
-            LEFT JOIN coursecalcul cc ON cg.hash_route = cc.hash_route
-            WHERE cg.hash_route IS NULL OR cg.hash_route = ''
-            OR cc.duree_trajet_min IS NULL OR cc.distance_routiere_km IS NULL
-            OR cc.points_passage_coords IS NULL OR cc.distance_vol_oiseau_km IS NULL
-            OR cc.duree_trajet_secondes IS NULL OR cc.points_passage IS NULL
-        """)
-        
-        logger.info(f"Nombre de groupes à traiter: {len(groupes)}")
-        
-        # Diviser les groupes pour le traitement
-        groupe_ids = [groupe['groupe_id'] for groupe in groupes]
-        await process_course_group(processor, groupe_ids)
+        # 1. Mise à jour des groupes de courses (écritures en base et appels
+        # à l'API de routage : sautée en aperçu, qui n'écrit rien)
+        if mode == "preview":
+            logger.info("Aperçu : mise à jour des groupes de courses sautée")
+        else:
+            processor = CourseGroupeProcessor(ds)
+            groupes = await ds.fetch_all("""
+                SELECT cg.groupe_id
+                FROM courseGroupe cg
+                LEFT JOIN coursecalcul cc ON cg.hash_route = cc.hash_route
+                WHERE cg.hash_route IS NULL OR cg.hash_route = ''
+                OR cc.duree_trajet_min IS NULL OR cc.distance_routiere_km IS NULL
+                OR cc.points_passage_coords IS NULL OR cc.distance_vol_oiseau_km IS NULL
+                OR cc.duree_trajet_secondes IS NULL OR cc.points_passage IS NULL
+            """)
+
+            logger.info(f"Nombre de groupes à traiter: {len(groupes)}")
+
+            # Diviser les groupes pour le traitement
+            groupe_ids = [groupe['groupe_id'] for groupe in groupes]
+            await process_course_group(processor, groupe_ids)
 
         # 2. Exécution du dispatch
         logger.info("Début du processus de dispatch...")
-        assignments = await solve_dispatch_problem(ds, date_begin, date_end, milp_time_limit)
+        assignments = await solve_dispatch_problem(
+            ds, date_begin, date_end, milp_time_limit,
+            solver=solver, solver_threads=solver_threads, solver_gap=solver_gap,
+            solver_gap_abs=solver_gap_abs, solver_stall=solver_stall, time_budget=time_budget, mode=mode
+        )
         logger.info(f"Dispatch terminé avec {len(assignments)} affectations")
 
     except Exception as e:
         logger.error(f"Échec critique: {str(e)}", exc_info=True)
         raise
 
-async def main(date_begin: Optional[str] = None, date_end: Optional[str] = None, milp_timeout: int = 300) -> None:
+async def main(
+    date_begin: Optional[str] = None,
+    date_end: Optional[str] = None,
+    milp_timeout: int = 300,
+    solver: Optional[str] = None,
+    solver_threads: Optional[int] = None,
+    solver_gap: Optional[float] = None,
+    solver_gap_abs: Optional[float] = None,
+    solver_stall: Optional[float] = None,
+    time_budget: Optional[float] = None,
+    mode: str = "full"
+) -> None:
     """Point d'entrée principal"""
     ds = PostgresDataSource()
     try:
-        await update_courses_and_dispatch(ds, date_begin, date_end, milp_timeout)
+        await update_courses_and_dispatch(
+            ds, date_begin, date_end, milp_timeout, solver, solver_threads, solver_gap,
+            solver_gap_abs, solver_stall, time_budget, mode
+        )
     finally:
         await ds.close()
 
@@ -85,6 +115,15 @@ if __name__ == "__main__":
     parser.add_argument('--date_begin', nargs='+', help="Date et heure de début (format: 'YYYY-MM-DD HH:MM:SS')")
     parser.add_argument('--date_end', nargs='+', help="Date et heure de fin (format: 'YYYY-MM-DD HH:MM:SS')")
     parser.add_argument("--milp_timeout", type=int, help="Timeout MILP en secondes (défaut: 300)", default=300)
+    parser.add_argument("--solver", choices=["cbc", "highs"], help="Solveur MILP (défaut: MILP_SOLVER)")
+    parser.add_argument("--solver_threads", type=int, help="Threads du solveur MILP (0 = tous les cœurs)")
+    parser.add_argument("--solver_gap", type=float, help="Écart relatif d'optimalité pour arrêter le solveur")
+    parser.add_argument("--solver_gap_abs", type=float, help="Écart absolu entre solution et borne pour arrêter le solveur")
+    parser.add_argument("--solver_stall", type=float, help="Secondes sans amélioration avant d'arrêter le solveur")
+    parser.add_argument("--time_budget", type=float, help="Budget de temps global du dispatch en secondes")
+    parser.add_argument("--mode", choices=["full", "preview"], default="full",
+                        help="preview : aperçu rapide par relaxation LP arrondie, sans sauvegarde")
+    parser.add_argument("--progress", action="store_true", help="Publier la progression du solveur sur la sortie standard")
     
     args = parser.parse_args()
     
@@ -107,8 +146,15 @@ if __name__ == "__main__":
             logger.error("Format de date_end invalide. Utilisez YYYY-MM-DD HH:MM:SS")
             exit(1)
     
+    if args.progress:
+        set_progress_reporter(ProgressReporter(stdout_sink))
+
     try:
-        asyncio.run(main(args.date_begin, args.date_end, args.milp_timeout))
+        asyncio.run(main(
+            args.date_begin, args.date_end, args.milp_timeout,
+            args.solver, args.solver_threads, args.solver_gap,
+            args.solver_gap_abs, args.solver_stall, args.time_budget, args.mode
+        ))
     except KeyboardInterrupt:
         logger.info("Interruption manuelle")
     except Exception as e:
@@ -0,0 +1,42 @@
+import random
+
+
+def instance_aleatoire(seed, nb_groupes, nb_chauffeurs, tailles=(2, 3, 4, 6), coordonnees=False, simultanees=True):
+    """
+    Instance aléatoire reproductible : groupes de ``tailles`` personnes
+    répartis sur 10 heures, chauffeurs de 4 ou 7 places, 80 % des paires
+    groupe/chauffeur possibles. ``coordonnees`` ajoute un point de prise en
+    charge aux groupes, ``simultanees`` des chauffeurs à 2 missions
+    simultanées.
+
+    Returns:
+        (groupes, chauffeurs, solo_cost)
+    """
+    rng = random.Random(seed)
+    groupes = []
+    for i in range(nb_groupes):
+        g = {"id": i, "ng": rng.choice(tailles), "t_min": rng.randint(0, 600)}
+        if coordonnees:
+            g["lat_pickup"] = 48.8 + rng.random() / 5
+            g["long_pickup"] = 2.3 + rng.random() / 5
+        groupes.append(g)
+    chauffeurs = []
+    for j in range(nb_chauffeurs):
+        c = {"id": f"c{j}", "n": rng.choice([4, 4, 7])}
+        if simultanees:
+            c["size"] = rng.choice([1, 1, 2])
+        chauffeurs.append(c)
+    solo = {(g["id"], c["id"]): rng.randint(40, 160) for g in groupes for c in chauffeurs if rng.random() < 0.8}
+    return groupes, chauffeurs, solo
+
+
+def combos_proches(groupes, chauffeurs, solo, ecart_min=20, places=8):
+    """Combos des groupes partant à moins de ``ecart_min`` minutes, coût du plus long solo + 10"""
+    combo = {}
+    for g1 in groupes:
+        for g2 in groupes:
+            if g1["id"] < g2["id"] and abs(g1["t_min"] - g2["t_min"]) <= ecart_min and g1["ng"] + g2["ng"] <= places:
+                for c in chauffeurs:
+                    if (g1["id"], c["id"]) in solo and (g2["id"], c["id"]) in solo:
+                        combo[(g1["id"], g2["id"], c["id"])] = max(solo[(g1["id"], c["id"])], solo[(g2["id"], c["id"])]) + 10
+    return combo
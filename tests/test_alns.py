@@ -0,0 +1,80 @@
+import numpy as np
+import pulp
+import pytest
+
+from app.core.alns import AlnsSearch
+from app.core.dispatch_instance import DispatchInstance
+from app.core.dispatch_solver import heuristic_solution
+from app.core.milp_backend import get_backend
+from app.core.milp_matrix import build_milp_matrix
+from tests.instances import combos_proches, instance_aleatoire
+
+
+def _verifier(recherche):
+    """Objectif tenu à jour = objectif recalculé, plannings et nombres de missions respectés"""
+    inst, v = recherche.inst, recherche.v
+    couvert = np.bincount(recherche.g1, weights=recherche.places * v, minlength=inst.nb_groupes)
+    combos = recherche.g2 >= 0
+    couvert += np.bincount(recherche.g2[combos], weights=(recherche.places * v)[combos], minlength=inst.nb_groupes)
+    manque = inst.ng - couvert
+    assert np.allclose(recherche.manque[:-1], manque)
+    attendu = recherche.cost @ v + recherche.penalite * np.maximum(manque, 0).sum()
+    assert recherche.total == pytest.approx(attendu)
+    for j in range(inst.nb_chauffeurs):
+        taches = sorted((recherche.debut[k], recherche.fin[k]) for k in np.flatnonzero((recherche.driver == j) & (v > 0)))
+        assert len(taches) <= inst.max_missions[j]
+        assert all(f <= s for (_, f), (s, _) in zip(taches, taches[1:]))
+
+
+def test_recherche_coherente_et_proche_optimum():
+    """Deltas cohérents, solution réalisable, à moins de 5 % de l'optimum MILP"""
+    for seed in range(2):
+        groupes, chauffeurs, solo = instance_aleatoire(seed, 25, 15, coordonnees=True, simultanees=False)
+        combo = combos_proches(groupes, chauffeurs, solo)
+        inst = DispatchInstance(groupes, chauffeurs)
+        recherche = AlnsSearch(inst, solo, combo, seed=seed)
+        recherche.run(30, max_iterations=1500)
+        _verifier(recherche)
+        assert (recherche.manque <= 1e-9).all()
+        assert any(p != 1.0 for p in recherche.poids.values())
+
+        modele = build_milp_matrix(inst, solo, combo)
+        status, values = get_backend("highs", threads=1).solve_matrix(modele, 30)
+        assert status == pulp.LpStatusOptimal
+        assert recherche.cout_trajets() <= 1.05 * float(modele.cost @ values)
+
+
+def test_recherche_utilise_les_combos():
+    """Deux groupes proches transportés ensemble quand c'est moins cher"""
+    groupes = [{"id": 1, "ng": 4, "t_min": 0}, {"id": 2, "ng": 4, "t_min": 10}]
+    chauffeurs = [{"id": "a", "n": 8}, {"id": "b", "n": 4}, {"id": "c", "n": 4}]
+    solo = {(g, c): 100 for g in (1, 2) for c in "bc"}
+    combo = {(1, 2, "a"): 120}
+    assign = heuristic_solution(groupes, chauffeurs, solo, combo, time_limit=5)
+    assert [a["trajet"] for a in assign[1] + assign[2]] == ["combiné", "combiné"]
+    assert assign[1][0]["combo_id"] == assign[2][0]["combo_id"] and assign[1][0]["combiné_avec"] == [2]
+
+
+def test_affectations_fixes_conservees():
+    """Les affectations existantes restent en place et occupent le planning du chauffeur"""
+    groupes = [{"id": 1, "ng": 3, "t_min": 0}, {"id": 2, "ng": 3, "t_min": 30}, {"id": 3, "ng": 3, "t_min": 500}]
+    chauffeurs = [{"id": "a", "n": 4}, {"id": "b", "n": 4}]
+    solo = {(g, c): 60 if c == "b" else 50 for g in (1, 2, 3) for c in "ab"}
+    existant = {2: [{"chauffeur": "b", "trajet": "simple"}]}
+    assign = heuristic_solution(groupes, chauffeurs, solo, {}, existant, time_limit=5)
+    assert assign[2] == existant[2]
+    # « a » est le moins cher partout, mais 1 (0 → 50) ne chevauche pas 2 tenu par « b »
+    assert assign[1][0]["chauffeur"] == "a" and assign[3][0]["chauffeur"] == "a"
+
+    recherche = AlnsSearch(DispatchInstance(groupes, chauffeurs), solo, {}, fixes={1: [{"chauffeur": "a", "trajet": "simple"}]})
+    recherche.run(5, max_iterations=200)
+    _verifier(recherche)
+    # 2 (30 → 80) ne peut plus aller à « a »
+    assert recherche.assignments()[2][0]["chauffeur"] == "b"
+
+
+def test_groupe_impossible():
+    """Un groupe sans candidat reste non couvert, les autres sont servis"""
+    groupes = [{"id": 1, "ng": 3, "t_min": 0}, {"id": 2, "ng": 3, "t_min": 200}]
+    assign = heuristic_solution(groupes, [{"id": "a", "n": 4}], {(1, "a"): 50}, {}, time_limit=2)
+    assert list(assign) == [1]
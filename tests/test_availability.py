@@ -0,0 +1,50 @@
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.core.availability import availability_mask, merge_driver_availabilities
+
+
+def test_fusion_des_lignes_dispo():
+    """Plusieurs lignes dispoChauffeur donnent un seul chauffeur et ses fenêtres"""
+    d = datetime(2025, 3, 1, 8)
+    rows = [
+        {'id': 1, 'n': 4, 'availability_date': d, 'availability_date_end': d + timedelta(hours=2)},
+        {'id': 2, 'n': 8, 'availability_date': d, 'availability_date_end': d + timedelta(hours=1)},
+        {'id': 1, 'n': 4, 'availability_date': d + timedelta(hours=6), 'availability_date_end': d + timedelta(hours=8)},
+        {'id': 1, 'n': 4, 'availability_date': d + timedelta(hours=1), 'availability_date_end': d + timedelta(hours=3)},
+    ]
+    chauffeurs = merge_driver_availabilities(rows)
+
+    assert [c['id'] for c in chauffeurs] == [1, 2]
+    assert chauffeurs[0]['disponibilites'] == [
+        (d, d + timedelta(hours=3)),
+        (d + timedelta(hours=6), d + timedelta(hours=8)),
+    ]
+    assert chauffeurs[0]['availability_date_end'] == d + timedelta(hours=8)
+
+
+def test_masque_identique_au_test_par_paire():
+    """Le balayage donne le même masque que le test direct de chaque fenêtre"""
+    rng = random.Random(3)
+    origine = datetime(2025, 3, 1)
+    rows = []
+    for j in range(30):
+        for _ in range(rng.randint(1, 3)):
+            debut = origine + timedelta(minutes=rng.randint(0, 1200))
+            rows.append({'id': j, 'n': 4, 'availability_date': debut,
+                         'availability_date_end': debut + timedelta(minutes=rng.randint(30, 300))})
+    chauffeurs = merge_driver_availabilities(rows)
+    groupes = [{'id': i, 'date_heure_prise_en_charge': origine + timedelta(minutes=rng.randint(0, 1440))}
+               for i in range(60)]
+    groupes.append({'id': 60, 'date_heure_prise_en_charge': None})
+
+    attendu = np.array([
+        [g['date_heure_prise_en_charge'] is None or any(
+            r['availability_date'] <= g['date_heure_prise_en_charge'] <= r['availability_date_end']
+            for r in rows if r['id'] == c['id'])
+         for c in chauffeurs]
+        for g in groupes
+    ])
+    assert (availability_mask(groupes, chauffeurs) == attendu).all()
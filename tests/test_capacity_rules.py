@@ -0,0 +1,30 @@
+import numpy as np
+
+from app.core import capacity_rules
+from app.core.capacity_rules import capacity_mask, combo_allowed, filter_combo_costs, solo_allowed
+
+
+GROUPES = [{"id": 1, "ng": 2}, {"id": 2, "ng": 4}, {"id": 3, "ng": 6}]
+CHAUFFEURS = [{"id": "a", "n": 4}, {"id": "b", "n": 7}]
+
+
+def test_regles_solo_et_combo():
+    """Pas de grand véhicule pour un petit groupe, seuils lus dans Settings"""
+    assert solo_allowed(4, 4) and not solo_allowed(4, 7) and solo_allowed(6, 7)
+    assert combo_allowed(4, 4, 7) and not combo_allowed(3, 6, 7) and combo_allowed(3, 6, 4)
+
+
+def test_masque_capacite():
+    masque = capacity_mask(GROUPES, CHAUFFEURS)
+    assert masque.tolist() == [[True, False], [True, False], [True, True]]
+
+
+def test_filtre_des_combos():
+    combos = {(1, 3, "a"): 100, (1, 3, "b"): 90, (2, 3, "b"): 80}
+    assert filter_combo_costs(combos, GROUPES, CHAUFFEURS) == {(1, 3, "a"): 100, (2, 3, "b"): 80}
+
+
+def test_seuils_configurables(monkeypatch):
+    monkeypatch.setattr(capacity_rules.settings, "PETIT_GROUPE_SOLO_MAX", 2)
+    masque = capacity_mask(GROUPES, CHAUFFEURS)
+    assert np.all(masque[1:]) and not masque[0, 1]
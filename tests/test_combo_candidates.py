@@ -0,0 +1,50 @@
+import random
+
+from app.core.combo_candidates import iter_combo_candidates, prune_combo_costs
+
+
+def _brute_force(groupes, chauffeurs, tolerance):
+    """Ancienne triple boucle O(G²·C) de solve_dispatch_problem"""
+    attendu = set()
+    for g1 in groupes:
+        for g2 in groupes:
+            if g1['id'] >= g2['id']:
+                continue
+            if abs(g1['t_min'] - g2['t_min']) <= tolerance:
+                for c in chauffeurs:
+                    if c['n'] >= g1['ng'] + g2['ng']:
+                        attendu.add((g1['id'], g2['id'], c['id']))
+    return attendu
+
+
+def test_balayage_identique_a_la_triple_boucle():
+    """Le balayage produit exactement les mêmes triplets que la triple boucle"""
+    rng = random.Random(42)
+    groupes = [{'id': i, 'ng': rng.randint(1, 6), 't_min': rng.uniform(0, 600)} for i in range(80)]
+    chauffeurs = [{'id': 100 + j, 'n': rng.choice([3, 4, 5, 7, 8])} for j in range(25)]
+
+    obtenu = {
+        (g1['id'], g2['id'], c['id'])
+        for g1, g2, eligibles in iter_combo_candidates(groupes, chauffeurs, 45)
+        for c in eligibles
+    }
+    assert obtenu == _brute_force(groupes, chauffeurs, 45)
+
+
+def test_generation_paresseuse():
+    """Le générateur ne calcule rien tant qu'on ne le consomme pas"""
+    groupes = [{'id': i, 'ng': 1, 't_min': i} for i in range(1000)]
+    gen = iter_combo_candidates(groupes, [{'id': 1, 'n': 4}], 45)
+    g1, g2, eligibles = next(gen)
+    assert (g1['id'], g2['id']) == (0, 1)
+    assert [c['id'] for c in eligibles] == [1]
+
+
+def test_elagage_des_combos_domines():
+    """Un combo plus cher que les deux trajets solo est retiré et compté"""
+    solo_cost = {(1, 9): 50, (2, 9): 40, (3, 9): 35}
+    combo_cost = {(1, 2, 9): 70, (1, 3, 9): 90, (2, 3, 9): 65}
+    kept, stats = prune_combo_costs(combo_cost, solo_cost, max_detour_ratio=1.5)
+
+    assert kept == {(1, 2, 9): 70}
+    assert stats == {'initial': 3, 'domines': 1, 'detour': 1, 'restants': 1}
@@ -0,0 +1,109 @@
+import numpy as np
+import pulp
+
+from app.core.complement import committed_values, complement_matrix, complement_pulp
+from app.core.dispatch_instance import DispatchInstance
+from app.core.lazy_overlap import resolve_lazy_overlap
+from app.core.milp_backend import get_backend
+from app.core.milp_matrix import build_milp_matrix
+
+
+GROUPES = [
+    {"id": 1, "ng": 3, "t_min": 0},
+    {"id": 2, "ng": 3, "t_min": 30},
+    {"id": 3, "ng": 3, "t_min": 60},
+    {"id": 4, "ng": 3, "t_min": 30},
+]
+CHAUFFEURS = [{"id": "a", "n": 4}, {"id": "b", "n": 4}]
+# « a » est le moins cher ; déjà pris par le groupe 1 (0 → 50), il ne peut plus
+# prendre 2 ni 4 (30 → 80). « b » ne peut prendre que 2 ou 4 (30 → 120 / 30 → 530).
+SOLO = {(g["id"], c): 50 + (40 if c == "b" else 0) for g in GROUPES for c in "ab"}
+SOLO[(4, "b")] = 500
+RETENUES = {1: [{"chauffeur": "a", "trajet": "simple"}]}
+
+
+def _affectees(modele, values):
+    x, _ = modele.split_values(values)
+    return {k for k, v in x.items() if v}
+
+
+def test_valeurs_retenues():
+    """Les combos sont comptés une fois, dans l'ordre des clés du modèle"""
+    assign = {
+        1: [{"chauffeur": "a", "trajet": "simple"}, {"chauffeur": "b", "trajet": "combiné", "combo_id": "k", "combiné_avec": [2]}],
+        2: [{"chauffeur": "b", "trajet": "combiné", "combo_id": "k", "combiné_avec": [1]}],
+    }
+    assert committed_values(assign, [(2, 1, "b")]) == ({(1, "a"): 1}, {(2, 1, "b"): 1})
+
+
+def test_seconde_passe_matricielle():
+    """Affectation retenue fixée, plannings respectés, groupe impossible laissé en écart"""
+    inst = DispatchInstance(GROUPES, CHAUFFEURS)
+    for cliques in (True, False):
+        modele = build_milp_matrix(inst, SOLO, {}, cliques=cliques)
+        nb_cols = modele.nb_cols
+        depart = complement_matrix(modele, inst, RETENUES, [2, 3, 4])
+        assert modele.nb_cols == nb_cols + 3 and not modele.integer[nb_cols:].any()
+        assert np.array_equal(depart[nb_cols:], [3, 3, 3])
+        if cliques:
+            status, values = get_backend("highs").solve_matrix(modele, 30, depart)
+        else:
+            status, values = resolve_lazy_overlap(modele, inst, 30, get_backend("highs"))
+        assert status == pulp.LpStatusOptimal
+        assert _affectees(modele, values) == {(1, "a"), (2, "b"), (3, "a")}
+        assert values[nb_cols:].tolist() == [0, 0, 3]
+
+
+def test_seconde_passe_cbc():
+    """Bornes inférieures et colonnes continues transmises à CBC (MPS)"""
+    inst = DispatchInstance(GROUPES, CHAUFFEURS)
+    modele = build_milp_matrix(inst, SOLO, {})
+    depart = complement_matrix(modele, inst, RETENUES, [2, 3, 4])
+    status, values = get_backend("cbc").solve_matrix(modele, 30, depart)
+    assert status == pulp.LpStatusOptimal
+    assert _affectees(modele, values) == {(1, "a"), (2, "b"), (3, "a")}
+
+
+def test_seconde_passe_pulp():
+    """Même seconde passe sur un problème PuLP aux contraintes de couverture nommées"""
+    inst = DispatchInstance(GROUPES, CHAUFFEURS[:1])
+    solo = {k: v for k, v in SOLO.items() if k[1] == "a"}
+    prob = pulp.LpProblem("Affectation", pulp.LpMinimize)
+    x = {k: pulp.LpVariable(f"x_{k[0]}_{k[1]}", 0, 1, pulp.LpBinary) for k in solo}
+    prob += pulp.lpSum(solo[k] * v for k, v in x.items())
+    for i, g in enumerate(GROUPES):
+        prob += 4 * x[(g["id"], "a")] >= g["ng"], f"couverture_{i}"
+    # cliques de « a » : 1 (0 → 50), 2 et 4 (30 → 80) ; 2, 4 et 3 (60 → 110)
+    prob += x[(1, "a")] + x[(2, "a")] + x[(4, "a")] <= 1
+    prob += x[(2, "a")] + x[(3, "a")] + x[(4, "a")] <= 1
+
+    complement_pulp(prob, x, {}, inst, RETENUES, [2, 3, 4])
+    assert x[(1, "a")].lowBound == 1
+    status = prob.solve(get_backend("cbc").pulp_solver(30, warm_start=True))
+    assert status == pulp.LpStatusOptimal
+    assert {k for k, v in x.items() if v.value() > 0.5} == {(1, "a"), (3, "a")}
+
+
+def test_groupe_en_partie_couvert():
+    """Un groupe couvert en partie par les affectations fixées est complété, pas rendu infaisable"""
+    groupes = [{"id": 1, "ng": 6, "t_min": 0}]
+    solo = {(1, "a"): 50, (1, "b"): 60}
+    inst = DispatchInstance(groupes, CHAUFFEURS)
+    retenues = {1: [{"chauffeur": "a", "trajet": "simple"}]}
+
+    modele = build_milp_matrix(inst, solo, {})
+    nb_cols = modele.nb_cols
+    depart = complement_matrix(modele, inst, retenues, [])
+    assert modele.nb_cols == nb_cols + 1 and depart[nb_cols:].tolist() == [2]
+    status, values = get_backend("highs").solve_matrix(modele, 30, depart)
+    assert status == pulp.LpStatusOptimal
+    assert _affectees(modele, values) == {(1, "a"), (1, "b")}
+
+    prob = pulp.LpProblem("Affectation", pulp.LpMinimize)
+    x = {k: pulp.LpVariable(f"x_{k[0]}_{k[1]}", 0, 1, pulp.LpBinary) for k in solo}
+    prob += pulp.lpSum(solo[k] * v for k, v in x.items())
+    prob += 4 * x[(1, "a")] + 4 * x[(1, "b")] >= 6, "couverture_0"
+    complement_pulp(prob, x, {}, inst, retenues, [])
+    status = prob.solve(get_backend("cbc").pulp_solver(30, warm_start=True))
+    assert status == pulp.LpStatusOptimal
+    assert {k for k, v in x.items() if v.value() > 0.5} == {(1, "a"), (1, "b")}
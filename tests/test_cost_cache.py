@@ -0,0 +1,110 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.core import cost_cache
+from app.core.cost_cache import LegCostCache
+from app.core.cost_matrix import haversine_km
+
+
+ORIGINES = ["c1", "c2", None]
+LAT_O, LNG_O = np.array([48.80, 48.90, 48.85]), np.array([2.30, 2.40, 2.35])
+ARRIVEES = ["p1", "p2"]
+LAT_A, LNG_A = np.array([49.00, 48.70]), np.array([2.55, 2.36])
+
+
+class FakeConnection:
+    def __init__(self):
+        self.rollbacks = 0
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+
+class FakeDataSource:
+    """Base factice : renvoie ``rows`` au SELECT et garde les transactions exécutées"""
+
+    def __init__(self, rows=(), erreur=None):
+        self.conn = FakeConnection()
+        self.rows, self.erreur = list(rows), erreur
+        self.transactions = []
+
+    async def fetch_all(self, query, params=None):
+        if self.erreur:
+            raise self.erreur
+        return self.rows
+
+    async def execute_transaction(self, queries_with_params):
+        self.transactions.append(queries_with_params)
+
+
+class Compteur:
+    """``haversine_km`` qui compte les paires calculées"""
+
+    def __init__(self):
+        self.paires = 0
+
+    def __call__(self, *coords):
+        self.paires += len(coords[0])
+        return haversine_km(*coords)
+
+
+@pytest.fixture(autouse=True)
+def lru_vide(monkeypatch):
+    monkeypatch.setattr(cost_cache, "_TABLE", cost_cache._PairTable())
+
+
+def _matrice(cache, calcul, lat_a=LAT_A):
+    return cache.leg_matrix(ORIGINES, LAT_O, LNG_O, ARRIVEES, lat_a, LNG_A, calcul)
+
+
+def test_lru_sert_les_paires_connues():
+    """Second appel servi par le LRU (sauf l'adresse sans hash), résultat identique"""
+    attendu = np.round(haversine_km(LAT_O[:, None], LNG_O[:, None], LAT_A[None, :], LNG_A[None, :]))
+    cache, calcul = LegCostCache(), Compteur()
+    assert np.array_equal(_matrice(cache, calcul), attendu)
+    assert calcul.paires == 6
+    assert np.array_equal(_matrice(LegCostCache(), calcul), attendu)
+    assert calcul.paires == 8
+
+
+def test_coordonnees_modifiees_invalident():
+    """Une adresse regéocodée est recalculée ; l'éviction garde les paires récentes"""
+    calcul = Compteur()
+    _matrice(LegCostCache(), calcul)
+    lat_a = LAT_A + np.array([0.0, 0.01])
+    _matrice(LegCostCache(), calcul, lat_a)
+    # p2 a bougé : (c1, p2) et (c2, p2) recalculées, plus les 2 paires de l'adresse sans hash
+    assert calcul.paires == 6 + 4
+
+    cache = LegCostCache(maxsize=2)
+    _matrice(cache, calcul)
+    assert len(cost_cache._TABLE) == 2
+
+
+def test_preload_et_flush():
+    """Les distances en base évitent le calcul ; les nouvelles sont envoyées une seule fois"""
+    rows = [{"hash_origine": "c1", "hash_arrivee": "p1", "distance_km": 99.0,
+             "lat_origine": 48.80, "lng_origine": 2.30, "lat_arrivee": 49.00, "lng_arrivee": 2.55}]
+    ds, calcul = FakeDataSource(rows), Compteur()
+    cache = LegCostCache(ds)
+    asyncio.run(cache.preload(["c1", "c2"], ["p1", "p2"]))
+    assert _matrice(cache, calcul)[0, 0] == 99.0
+    assert calcul.paires == 5
+
+    asyncio.run(cache.flush())
+    [[(_, params)]] = ds.transactions
+    assert sorted(zip(params["hash_origine"], params["hash_arrivee"])) == [
+        ("c1", "p2"), ("c2", "p1"), ("c2", "p2")
+    ]
+    asyncio.run(cache.flush())
+    assert len(ds.transactions) == 1
+
+
+def test_preload_en_echec_annule_la_transaction():
+    """Échec du SELECT : rollback de la connexion, l'erreur remonte à l'appelant"""
+    ds = FakeDataSource(erreur=RuntimeError("relation coutTrajetCache inexistante"))
+    with pytest.raises(RuntimeError):
+        asyncio.run(LegCostCache(ds).preload(["c1"], ["p1"]))
+    assert ds.conn.rollbacks == 1
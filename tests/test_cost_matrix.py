@@ -0,0 +1,102 @@
+import random
+
+import numpy as np
+import pytest
+from geopy.distance import geodesic
+
+from app.core.combo_candidates import iter_combo_candidates
+from app.core.cost_matrix import compute_combo_costs, compute_solo_cost_matrix, haversine_km
+from app.core.parallel_costs import compute_combo_costs_parallel
+
+
+GROUPES = [
+    {"id": 1, "ng": 3, "lat_pickup": 49.0097, "long_pickup": 2.5479,
+     "dest_lat": 49.0500, "dest_lng": 2.0300, "duree_trajet_min": 45, "t_min": 0},
+    {"id": 2, "ng": 2, "lat_pickup": 48.7262, "long_pickup": 2.3652,
+     "dest_lat": 48.8566, "dest_lng": 2.3522, "duree_trajet_min": 30, "t_min": 20},
+    {"id": 3, "ng": 1, "lat_pickup": None, "long_pickup": 2.3652,
+     "dest_lat": 48.8566, "dest_lng": 2.3522, "duree_trajet_min": 30, "t_min": 20},
+]
+
+CHAUFFEURS = [
+    {"id": 10, "n": 4, "lat_chauff": 49.0370, "long_chauff": 2.0760},
+    {"id": 11, "n": 7, "lat_chauff": 48.8400, "long_chauff": 2.2400},
+]
+
+
+def test_haversine_proche_de_geodesic():
+    """L'approximation sphérique reste à moins de 0,5 % de geodesic"""
+    cdg, orly = (49.0097, 2.5479), (48.7262, 2.3652)
+    attendu = geodesic(cdg, orly).kilometers
+    assert haversine_km(*cdg, *orly) == pytest.approx(attendu, rel=5e-3)
+
+
+def test_matrice_solo_equivalente_au_calcul_par_paire():
+    """La matrice reproduit le calcul par paire en geodesic (aller + durée + retour)"""
+    solo = compute_solo_cost_matrix(GROUPES, CHAUFFEURS)
+    for g in GROUPES[:2]:
+        for c in CHAUFFEURS:
+            d = (c["lat_chauff"], c["long_chauff"])
+            attendu = (
+                round(geodesic(d, (g["lat_pickup"], g["long_pickup"])).kilometers)
+                + round(g["duree_trajet_min"])
+                + round(geodesic((g["dest_lat"], g["dest_lng"]), d).kilometers)
+            )
+            assert abs(solo[(g["id"], c["id"])] - attendu) <= 1
+
+
+def test_coordonnees_invalides_absentes():
+    """Une coordonnée manquante retire la paire comme l'ancien dict solo_cost"""
+    solo = compute_solo_cost_matrix(GROUPES, CHAUFFEURS)
+    assert (3, 10) not in solo
+    assert (1, 10) in solo
+    assert len(solo) == 4
+    assert set(solo) == {(1, 10), (1, 11), (2, 10), (2, 11)}
+    with pytest.raises(KeyError):
+        solo[(3, 11)]
+
+
+def test_table_des_trajets_combo_equivalente_aux_4_tournees():
+    """La table par paire + trajets dépôt donne le minimum des 4 tournées"""
+    solo = compute_solo_cost_matrix(GROUPES, CHAUFFEURS)
+    g1, g2 = GROUPES[0], GROUPES[1]
+    combos = compute_combo_costs(solo, g1, g2, CHAUFFEURS)
+
+    def t(p, q):
+        return round(geodesic(p, q).kilometers)
+
+    for c in CHAUFFEURS:
+        D = (c["lat_chauff"], c["long_chauff"])
+        C1, C2 = (g1["lat_pickup"], g1["long_pickup"]), (g2["lat_pickup"], g2["long_pickup"])
+        A1, A2 = (g1["dest_lat"], g1["dest_lng"]), (g2["dest_lat"], g2["dest_lng"])
+        attendu = min(
+            t(D, C1) + t(C1, C2) + t(C2, A1) + t(A1, A2) + t(A2, D),
+            t(D, C1) + t(C1, C2) + t(C2, A2) + t(A2, A1) + t(A1, D),
+            t(D, C2) + t(C2, C1) + t(C1, A1) + t(A1, A2) + t(A2, D),
+            t(D, C2) + t(C2, C1) + t(C1, A2) + t(A2, A1) + t(A1, D),
+        )
+        assert abs(combos[(1, 2, c["id"])] - attendu) <= 3
+
+
+def test_combos_paralleles_identiques_avec_masque():
+    """Une paire masquée (aller absent) exclut le combo dans les deux calculs"""
+    rng = random.Random(0)
+    groupes = [
+        {"id": i, "ng": rng.choice([1, 2, 3]), "t_min": rng.randint(0, 120), "duree_trajet_min": 30,
+         "lat_pickup": 48.8 + rng.random() / 5, "long_pickup": 2.3 + rng.random() / 5,
+         "dest_lat": 48.8 + rng.random() / 5, "dest_lng": 2.3 + rng.random() / 5}
+        for i in range(20)
+    ]
+    chauffeurs = [
+        {"id": 100 + j, "n": rng.choice([4, 7]), "lat_chauff": 48.8 + rng.random() / 5,
+         "long_chauff": 2.3 + rng.random() / 5}
+        for j in range(8)
+    ]
+    masque = np.random.default_rng(0).random((len(groupes), len(chauffeurs))) < 0.6
+    solo = compute_solo_cost_matrix(groupes, chauffeurs, mask=masque)
+
+    sequentiel = {}
+    for g1, g2, eligibles in iter_combo_candidates(groupes, chauffeurs, 45):
+        sequentiel.update(compute_combo_costs(solo, g1, g2, eligibles))
+    assert sequentiel == compute_combo_costs_parallel(solo, groupes, chauffeurs, 45, 2)
+    assert all((g1, c) in solo and (g2, c) in solo for g1, g2, c in sequentiel)
@@ -0,0 +1,104 @@
+import pulp
+
+from app.core.decomposition import interaction_blocks, solve_blocks
+from app.core.dispatch_instance import DispatchInstance
+from app.core.milp_backend import LpStatusFeasible, get_backend
+from app.core.milp_matrix import build_milp_matrix
+
+
+GROUPES = [
+    {"id": 1, "ng": 3, "t_min": 0},
+    {"id": 2, "ng": 2, "t_min": 30},
+    {"id": 3, "ng": 3, "t_min": 600},
+    {"id": 4, "ng": 2, "t_min": 620},
+]
+CHAUFFEURS = [{"id": "a", "n": 4}, {"id": "b", "n": 4}, {"id": "c", "n": 4}]
+
+
+class _PoolSequentiel:
+    """``ProcessPoolExecutor`` exécuté dans le processus (fonction de résolution locale au test)"""
+
+    def __init__(self, max_workers=None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def map(self, fn, *iterables):
+        return map(fn, *iterables)
+
+
+def _solve(groupes, chauffeurs, solo_cost, combo_cost, time_limit, backend=None, warm_start=None):
+    modele = build_milp_matrix(DispatchInstance(groupes, chauffeurs), solo_cost, combo_cost)
+    status, values = get_backend("highs").solve_matrix(modele, time_limit)
+    x, y = modele.split_values(values)
+    return modele, status, x, y
+
+
+def test_vagues_independantes():
+    """Deux vagues sans chevauchement forment deux blocs, sans réservation si le budget suffit"""
+    solo = {(g["id"], c["id"]): 100 for g in GROUPES for c in CHAUFFEURS}
+    blocs = interaction_blocks(DispatchInstance(GROUPES, CHAUFFEURS), solo, {})
+
+    assert sorted(sorted(b["groupes"]) for b in blocs) == [[1, 2], [3, 4]]
+    # chaque vague : 2 missions qui se chevauchent, une seule possible par chauffeur
+    for b in blocs:
+        assert b["chauffeurs"] == {"a": 1, "b": 1, "c": 1}
+
+
+def test_combo_relie_les_groupes():
+    """Un combo met ses deux groupes dans le même bloc"""
+    solo = {(1, "a"): 100, (2, "b"): 100, (3, "a"): 100, (4, "c"): 100}
+    blocs = interaction_blocks(DispatchInstance(GROUPES, CHAUFFEURS), solo, {(2, 3, "b"): 700})
+    assert sorted(sorted(b["groupes"]) for b in blocs) == [[1], [2, 3], [4]]
+
+
+def test_reservation_du_budget():
+    """Un chauffeur partagé voit son budget de missions réparti entre les blocs"""
+    chauffeurs = [{"id": "a", "n": 4, "max_missions": 1}]
+    solo = {(g["id"], "a"): 10 for g in GROUPES}
+    blocs = interaction_blocks(DispatchInstance(GROUPES, chauffeurs), solo, {})
+
+    assert sum(b["chauffeurs"].get("a", 0) for b in blocs) == 1
+    assert all(b["partage"] for b in blocs if "a" in b["chauffeurs"])
+    # optimum de chaque bloc pour sa part du budget seulement : pas d'optimum global annoncé
+    chauffeurs.append({"id": "b", "n": 4})
+    solo.update({(g["id"], "b"): 20 for g in GROUPES})
+    inst = DispatchInstance(GROUPES, chauffeurs)
+    status, _, _ = solve_blocks(interaction_blocks(inst, solo, {}), inst, solo, {}, 10, _solve)
+    assert status == LpStatusFeasible
+
+
+def test_fusion_des_blocs():
+    """Les solutions des blocs sont fusionnées en un seul x"""
+    solo = {(1, "a"): 100, (2, "b"): 100, (3, "a"): 100, (4, "c"): 100, (4, "b"): 150}
+    inst = DispatchInstance(GROUPES, CHAUFFEURS)
+    blocs = interaction_blocks(inst, solo, {})
+    status, x, y = solve_blocks(blocs, inst, solo, {}, 10, _solve)
+
+    assert status == pulp.LpStatusOptimal
+    assert {k for k, v in x.items() if v} == {(1, "a"), (2, "b"), (3, "a"), (4, "c")}
+    assert y == {}
+
+
+def test_backend_partage_entre_workers(monkeypatch):
+    """Les workers reçoivent les threads partagés et tous les critères d'arrêt du backend"""
+    recus = []
+    monkeypatch.setattr("app.core.decomposition.ProcessPoolExecutor", _PoolSequentiel)
+
+    def solve(groupes, chauffeurs, solo_cost, combo_cost, time_limit, backend=None, warm_start=None):
+        recus.append(backend)
+        return _solve(groupes, chauffeurs, solo_cost, combo_cost, time_limit)
+
+    solo = {(g["id"], c["id"]): 100 for g in GROUPES for c in CHAUFFEURS}
+    inst = DispatchInstance(GROUPES, CHAUFFEURS)
+    backend = get_backend("highs", threads=4, gap_rel=0.01, gap_abs=5, stall_time=3)
+    solve_blocks(interaction_blocks(inst, solo, {}), inst, solo, {}, 10, solve, backend=backend, workers=2)
+
+    assert len(recus) == 2
+    for b in recus:
+        assert (b.name, b.threads, b.gap_rel, b.gap_abs, b.stall_time) == ("highs", 2, 0.01, 5, 3)
+    assert backend.threads == 4
@@ -0,0 +1,19 @@
+from app.core.dispatch_instance import DispatchInstance
+
+
+def test_index_et_capacites():
+    """Les accès par id remplacent les recherches linéaires"""
+    groupes = [{'id': 7, 'ng': 3, 't_min': 120}, {'id': 2, 'ng': 5, 't_min': 60}]
+    chauffeurs = [{'id': 'a', 'n': 4}, {'id': 'b', 'n': 8, 'size': 3}]
+    inst = DispatchInstance(groupes, chauffeurs)
+
+    assert inst.group_index == {7: 0, 2: 1}
+    assert inst.ng_of(2) == 5 and inst.t_min_of(7) == 120
+    assert inst.capacity_of('b') == 8
+    assert list(inst.size) == [1, 3]
+    assert inst.chauffeur('z') is None
+
+    assign = {2: [{'chauffeur': 'a'}, {'chauffeur': 'b'}]}
+    assert inst.covered_capacity(assign, 2) == 12
+    assert inst.covered_capacity(assign, 7) == 0
+    assert inst.subset([groupes[1]]).group_ids == [2]
@@ -0,0 +1,45 @@
+import random
+
+import numpy as np
+
+from app.core.cost_matrix import haversine_km
+from app.core.driver_candidates import nearest_driver_mask
+
+
+def _instance(seed=5, G=40, C=50):
+    rng = random.Random(seed)
+    groupes = [{'id': i, 'ng': rng.randint(1, 4),
+                'lat_pickup': 48.85 + rng.uniform(-.3, .3), 'long_pickup': 2.35 + rng.uniform(-.4, .4)}
+               for i in range(G)]
+    chauffeurs = [{'id': 100 + j, 'n': rng.choice([3, 4, 7]),
+                   'lat_chauff': 48.85 + rng.uniform(-.3, .3), 'long_chauff': 2.35 + rng.uniform(-.4, .4)}
+                  for j in range(C)]
+    return groupes, chauffeurs
+
+
+def test_k_plus_proches_et_disponibles():
+    """Chaque groupe garde les k chauffeurs autorisés les plus proches"""
+    groupes, chauffeurs = _instance()
+    autorise = np.random.default_rng(0).random((len(groupes), len(chauffeurs))) > 0.3
+    mask = nearest_driver_mask(groupes, chauffeurs, 6, 0, autorise)
+
+    assert not (mask & ~autorise).any()
+    for i, g in enumerate(groupes):
+        distances = sorted(
+            (float(haversine_km(g['lat_pickup'], g['long_pickup'], c['lat_chauff'], c['long_chauff'])), j)
+            for j, c in enumerate(chauffeurs) if autorise[i, j]
+        )
+        attendus = {j for _, j in distances[:6]}
+        assert attendus <= set(np.flatnonzero(mask[i]))
+
+
+def test_elargissement_si_capacite_insuffisante():
+    """Un groupe que les k voisins ne peuvent pas transporter élargit son voisinage"""
+    groupes, chauffeurs = _instance()
+    for g in groupes:
+        g['ng'] = 1
+    groupes[0]['ng'] = 30
+    mask = nearest_driver_mask(groupes, chauffeurs, 2)
+
+    assert sum(chauffeurs[j]['n'] for j in np.flatnonzero(mask[0])) >= 30
+    assert all(mask[i].sum() == 2 for i in range(1, len(groupes)))
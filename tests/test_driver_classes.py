@@ -0,0 +1,54 @@
+from app.core.driver_classes import build_driver_classes, expand_class_assignments
+
+
+SALLE = (49.04, 2.08)
+
+CHAUFFEURS = [
+    {"id": 1, "n": 4, "lat_chauff": SALLE[0], "long_chauff": SALLE[1]},
+    {"id": 2, "n": 4, "lat_chauff": SALLE[0], "long_chauff": SALLE[1]},
+    {"id": 3, "n": 7, "lat_chauff": SALLE[0], "long_chauff": SALLE[1]},
+    {"id": 4, "n": 4, "lat_chauff": SALLE[0], "long_chauff": SALLE[1]},
+]
+
+
+def test_regroupement_par_position_et_capacite():
+    """Les chauffeurs de même position et capacité forment une seule classe"""
+    classes = build_driver_classes(CHAUFFEURS)
+    assert [(cl["n"], cl["size"], cl["membres"]) for cl in classes] == [
+        (4, 3, [1, 2, 4]),
+        (7, 1, [3]),
+    ]
+
+
+def test_expansion_sans_chevauchement():
+    """Deux missions simultanées d'une classe vont à deux chauffeurs distincts"""
+    classes = build_driver_classes(CHAUFFEURS)
+    cid = classes[0]["id"]
+    groupes = [{"id": 10, "t_min": 0}, {"id": 11, "t_min": 10}, {"id": 12, "t_min": 200}]
+    solo_cost = {(10, cid): 100, (11, cid): 100, (12, cid): 100}
+    assign = {
+        10: [{"chauffeur": cid, "trajet": "simple", "combo_id": None, "combiné_avec": []}],
+        11: [{"chauffeur": cid, "trajet": "simple", "combo_id": None, "combiné_avec": []}],
+        12: [{"chauffeur": cid, "trajet": "simple", "combo_id": None, "combiné_avec": []}],
+    }
+    expand_class_assignments(assign, classes, groupes, solo_cost, {})
+
+    c10, c11, c12 = (assign[g][0]["chauffeur"] for g in (10, 11, 12))
+    assert c10 != c11
+    assert {c10, c11, c12} <= {1, 2, 4}
+
+
+def test_expansion_respecte_la_limite_de_missions():
+    """Au-delà de ``max_missions`` par membre, la mission est retirée (groupe non couvert)"""
+    classes = build_driver_classes(CHAUFFEURS)
+    cl = next(cl for cl in classes if cl["size"] == 1)
+    groupes = [{"id": 20 + k, "t_min": 100 * k} for k in range(3)]
+    solo_cost = {(g["id"], cl["id"]): 50 for g in groupes}
+    assign = {
+        g["id"]: [{"chauffeur": cl["id"], "trajet": "simple", "combo_id": None, "combiné_avec": []}]
+        for g in groupes
+    }
+    expand_class_assignments(assign, classes, groupes, solo_cost, {}, max_missions=2)
+
+    assert sorted(assign) == [20, 21]
+    assert all(a["chauffeur"] == 3 for g in assign for a in assign[g])
@@ -0,0 +1,76 @@
+import numpy as np
+import pulp
+
+from app.core.dispatch_instance import DispatchInstance
+from app.core.flow_model import build_flow_matrix
+from app.core.milp_backend import get_backend
+from app.core.milp_matrix import build_milp_matrix
+from tests.instances import instance_aleatoire
+
+
+GROUPES = [
+    {"id": 1, "ng": 3, "t_min": 0},
+    {"id": 2, "ng": 2, "t_min": 30},
+    {"id": 3, "ng": 6, "t_min": 500},
+]
+CHAUFFEURS = [{"id": "a", "n": 4}, {"id": "b", "n": 7}, {"id": "c", "n": 4}]
+SOLO = {
+    (1, "a"): 100, (1, "b"): 90, (1, "c"): 120,
+    (2, "a"): 100, (2, "c"): 80,
+    (3, "b"): 150,
+}
+COMBO = {(1, 2, "b"): 130}
+
+
+def test_meme_optimum_que_les_cliques():
+    """Flot et cliques donnent le même optimum, avec HiGHS et CBC"""
+    for seed in range(3):
+        groupes, chauffeurs, solo = instance_aleatoire(seed, 15, 10)
+        inst = DispatchInstance(groupes, chauffeurs)
+        cliques = build_milp_matrix(inst, solo, {})
+        status, values = get_backend("highs").solve_matrix(cliques, 30)
+        assert status == pulp.LpStatusOptimal
+        reference = sum(solo[k] * v for k, v in cliques.split_values(values)[0].items())
+        flot = build_flow_matrix(inst, solo, {})
+        for nom in ("highs", "cbc"):
+            status, values = get_backend(nom).solve_matrix(flot, 30)
+            assert status == pulp.LpStatusOptimal
+            x, _ = flot.split_values(values)
+            assert sum(solo[k] * v for k, v in x.items()) == reference
+
+
+def test_colonnes_et_affectations():
+    """Les colonnes x / y sont celles du modèle à cliques, suivies des arcs d'attente"""
+    inst = DispatchInstance(GROUPES, CHAUFFEURS)
+    flot = build_flow_matrix(inst, SOLO, COMBO)
+    assert flot.x_keys == build_milp_matrix(inst, SOLO, COMBO).x_keys and flot.y_keys == []
+    assert flot.integer.sum() == len(flot.x_keys) and not flot.integer[-1]
+
+    status, values = get_backend("highs").solve_matrix(flot, 30)
+    assert status == pulp.LpStatusOptimal
+    x, y = flot.split_values(values)
+    assert {k for k, v in x.items() if v} == {(1, "a"), (2, "c"), (3, "b")}
+
+
+def test_solution_de_depart_realisable():
+    """Le flot d'attente déduit des missions respecte la conservation"""
+    inst = DispatchInstance(GROUPES, CHAUFFEURS)
+    flot = build_flow_matrix(inst, SOLO, COMBO)
+    depart = flot.values_from({(1, "c"): 1, (2, "a"): 1, (3, "b"): 1})
+
+    lignes = np.repeat(np.arange(flot.nb_rows), np.diff(flot.a_start))
+    activite = np.bincount(lignes, weights=flot.a_value * depart[flot.a_index], minlength=flot.nb_rows)
+    assert np.all(activite >= flot.row_lower - 1e-9) and np.all(activite <= flot.row_upper + 1e-9)
+    assert np.all(depart >= 0) and np.all(depart <= flot.upper)
+
+
+def test_missions_qui_se_touchent():
+    """Deux missions bout à bout passent, une mission de durée nulle au milieu d'une autre non"""
+    groupes = [{"id": 1, "ng": 4, "t_min": 0}, {"id": 2, "ng": 4, "t_min": 100}, {"id": 3, "ng": 4, "t_min": 50}]
+    chauffeurs = [{"id": "a", "n": 4}, {"id": "b", "n": 4}]
+    solo = {(1, "a"): 100, (2, "a"): 100, (3, "a"): 0, (3, "b"): 500}
+    flot = build_flow_matrix(DispatchInstance(groupes, chauffeurs), solo, {})
+    status, values = get_backend("highs").solve_matrix(flot, 30)
+    assert status == pulp.LpStatusOptimal
+    x, _ = flot.split_values(values)
+    assert {k for k, v in x.items() if v} == {(1, "a"), (2, "a"), (3, "b")}
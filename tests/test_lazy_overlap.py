@@ -0,0 +1,50 @@
+import numpy as np
+import pulp
+
+from app.core.dispatch_instance import DispatchInstance
+from app.core.lazy_overlap import repair_overlaps, resolve_lazy_overlap
+from app.core.milp_backend import get_backend
+from app.core.milp_matrix import build_milp_matrix
+
+
+GROUPES = [
+    {"id": 1, "ng": 3, "t_min": 0},
+    {"id": 2, "ng": 3, "t_min": 30},
+    {"id": 3, "ng": 3, "t_min": 60},
+    {"id": 4, "ng": 3, "t_min": 500},
+]
+CHAUFFEURS = [{"id": "a", "n": 4}, {"id": "b", "n": 4}, {"id": "c", "n": 4}]
+# « a » est le moins cher partout : le modèle relâché lui donne les trois premiers groupes
+SOLO = {(g["id"], c): 100 + 50 * k for g in GROUPES for k, c in enumerate("abc")}
+
+
+def test_modele_relache():
+    """Sans cliques, seules la couverture et la limite de missions restent"""
+    inst = DispatchInstance(GROUPES, CHAUFFEURS)
+    assert build_milp_matrix(inst, SOLO, {}, cliques=False).nb_rows == len(GROUPES) + len(CHAUFFEURS)
+    assert build_milp_matrix(inst, SOLO, {}).nb_rows > len(GROUPES) + len(CHAUFFEURS)
+
+
+def test_coupes_jusqu_a_realisabilite():
+    """Les coupes ajoutées mènent au même optimum que le modèle complet"""
+    inst = DispatchInstance(GROUPES, CHAUFFEURS)
+    modele = build_milp_matrix(inst, SOLO, {}, cliques=False)
+    status, values = resolve_lazy_overlap(modele, inst, 30, get_backend("highs"))
+
+    assert status == pulp.LpStatusOptimal
+    x, _ = modele.split_values(values)
+    retenues = [k for k, v in x.items() if v]
+    assert sorted(k[0] for k in retenues) == [1, 2, 3, 4]
+    assert len({c for g, c in retenues if g != 4}) == 3
+    assert sum(SOLO[k] for k in retenues) == 550
+    assert modele.nb_rows > len(GROUPES) + len(CHAUFFEURS)
+
+
+def test_reparation():
+    """Une solution en conflit garde, pour chaque chauffeur, les missions les plus tôt"""
+    inst = DispatchInstance(GROUPES, CHAUFFEURS)
+    modele = build_milp_matrix(inst, SOLO, {}, cliques=False)
+    values = modele.values_from({(1, "a"): 1, (2, "a"): 1, (3, "a"): 1, (4, "a"): 1})
+    x, _ = modele.split_values(repair_overlaps(modele, inst, values))
+    assert {k for k, v in x.items() if v} == {(1, "a"), (4, "a")}
+    assert np.all(values[:4] >= 0)
@@ -0,0 +1,104 @@
+import asyncio
+import random
+
+import numpy as np
+import pytest
+
+from app.core import dispatch_solver
+from app.core.dispatch_instance import DispatchInstance
+from app.core.milp_backend import get_backend
+from app.core.lp_preview import round_relaxation, solve_lp_preview
+from app.core.solver_progress import ProgressReporter, set_progress_reporter
+from tests.instances import instance_aleatoire
+
+
+def _verifier(inst, modele, valeurs):
+    """Couverture, missions simultanées et nombre de missions par chauffeur"""
+    x, _ = modele.split_values(valeurs)
+    couvert = {}
+    for (g, c), v in x.items():
+        couvert[g] = couvert.get(g, 0) + v * inst.n[inst.driver_index[c]]
+    assert all(couvert.get(g, 0) >= inst.ng[i] for i, g in enumerate(inst.group_ids))
+    for j in range(inst.nb_chauffeurs):
+        taches = np.flatnonzero((modele.driver == j) & (valeurs > 0))
+        assert valeurs[taches].sum() <= inst.max_missions[j]
+        for k in taches:
+            en_cours = taches[(modele.debut[taches] <= modele.debut[k]) & (modele.fin[taches] > modele.debut[k])]
+            assert valeurs[en_cours].sum() <= inst.size[j]
+
+
+def test_relaxation_et_arrondi():
+    """Relaxation non entière, arrondi réalisable, borne LP inférieure au coût arrondi"""
+    for seed in range(3):
+        groupes, chauffeurs, solo = instance_aleatoire(seed, 20, 12, tailles=(2, 3, 4, 6, 8))
+        inst = DispatchInstance(groupes, chauffeurs)
+        modele, valeurs, resume = solve_lp_preview(inst, solo, {}, get_backend("highs", threads=1), 30)
+        assert not modele.integer.any()
+        assert np.array_equal(valeurs, np.round(valeurs))
+        assert resume["non_couverts"] == []
+        assert resume["borne_lp"] <= resume["cout"]
+        assert resume["ecart_arrondi"] == pytest.approx((resume["cout"] - resume["borne_lp"]) / resume["cout"], abs=1e-4)
+        _verifier(inst, modele, valeurs)
+
+
+def test_arrondi_sans_relaxation():
+    """Sans solution de la relaxation, l'arrondi complète tous les groupes"""
+    groupes, chauffeurs, solo = instance_aleatoire(0, 20, 12, tailles=(2, 3, 4, 6, 8))
+    inst = DispatchInstance(groupes, chauffeurs)
+    modele, _, _ = solve_lp_preview(inst, solo, {}, get_backend("highs", threads=1), 30)
+    _verifier(inst, modele, round_relaxation(modele, inst, np.zeros(modele.nb_cols)))
+
+
+def test_groupe_impossible():
+    """Un groupe sans chauffeur candidat est signalé, les autres restent couverts"""
+    groupes = [{"id": 1, "ng": 3, "t_min": 0}, {"id": 2, "ng": 3, "t_min": 200}]
+    chauffeurs = [{"id": "a", "n": 4}]
+    modele, valeurs, resume = solve_lp_preview(
+        DispatchInstance(groupes, chauffeurs), {(1, "a"): 50}, {}, get_backend("cbc", threads=1), 30
+    )
+    assert resume["non_couverts"] == [2] and resume["borne_lp"] is None
+    assert modele.split_values(valeurs)[0] == {(1, "a"): 1.0}
+
+
+class BaseInterdite:
+    """Source de données factice : tout accès à la base fait échouer le test"""
+
+    def __getattr__(self, nom):
+        raise AssertionError(f"accès à la base en mode aperçu : {nom}")
+
+
+def test_dispatch_en_mode_apercu(monkeypatch):
+    """Le dispatch en aperçu renvoie des affectations et publie son résumé sans toucher à la base"""
+    rng = random.Random(0)
+    groupes = [
+        {"id": i, "ng": rng.choice([2, 3, 4]), "t_min": 60 * i, "duree_trajet_min": 30,
+         "lat_pickup": 48.8 + rng.random() / 5, "long_pickup": 2.3 + rng.random() / 5,
+         "dest_lat": 48.8 + rng.random() / 5, "dest_lng": 2.3 + rng.random() / 5}
+        for i in range(8)
+    ]
+    chauffeurs = [
+        {"id": 100 + j, "n": 4, "lat_chauff": 48.8 + rng.random() / 5, "long_chauff": 2.3 + rng.random() / 5}
+        for j in range(4)
+    ]
+
+    async def demandes(*args):
+        return groupes
+
+    async def disponibles(*args):
+        return chauffeurs
+
+    monkeypatch.setattr(dispatch_solver, "prepare_demandes", demandes)
+    monkeypatch.setattr(dispatch_solver, "prepare_chauffeurs", disponibles)
+    evenements = []
+    set_progress_reporter(ProgressReporter(evenements.append))
+    try:
+        assign = asyncio.run(dispatch_solver.solve_dispatch_problem(
+            BaseInterdite(), milp_time_limit=30, solver="highs", time_budget=0, mode="preview"
+        ))
+    finally:
+        set_progress_reporter(None)
+
+    assert sorted(assign) == [g["id"] for g in groupes]
+    [fin] = [e for e in evenements if e.get("stage") == "termine"]
+    assert fin["mode"] == "preview" and fin["non_couverts"] == []
+    assert "duree" in fin and "duree_apercu" in fin
@@ -0,0 +1,73 @@
+import pulp
+import pytest
+
+from app.core.dispatch_instance import DispatchInstance
+from app.core.milp_backend import get_backend
+from app.core.milp_matrix import build_milp_matrix
+
+
+GROUPES = [
+    {"id": 1, "ng": 3, "t_min": 0},
+    {"id": 2, "ng": 2, "t_min": 30},
+    {"id": 3, "ng": 6, "t_min": 500},
+]
+CHAUFFEURS = [{"id": "a", "n": 4}, {"id": "b", "n": 7}, {"id": "c", "n": 4}]
+SOLO = {
+    (1, "a"): 100, (1, "b"): 90, (1, "c"): 120,
+    (2, "a"): 100, (2, "c"): 80,
+    (3, "b"): 150,
+}
+COMBO = {(1, 2, "b"): 130}
+
+
+def test_lignes_et_colonnes():
+    """Une ligne de couverture par groupe, pas de colonne pour les paires de capacité faible"""
+    modele = build_milp_matrix(DispatchInstance(GROUPES, CHAUFFEURS), SOLO, COMBO)
+
+    assert modele.nb_cols == len(SOLO) - 1
+    assert (1, "b") not in modele.x_keys and modele.y_keys == []
+    assert list(modele.row_lower[:3]) == [3, 2, 6]
+    borne = dict(zip(modele.x_keys, modele.upper))
+    assert borne[(3, "b")] == 1
+    # couverture du groupe 1 : 4·x1a + 4·x1c
+    debut, fin = modele.a_start[0], modele.a_start[1]
+    assert sorted(modele.a_value[debut:fin]) == [4, 4]
+
+
+def test_highs_et_cbc_mps_identiques():
+    """HiGHS (API) et CBC (fichier MPS) trouvent le même optimum"""
+    modele = build_milp_matrix(DispatchInstance(GROUPES, CHAUFFEURS), SOLO, COMBO)
+    solutions = []
+    for nom in ("highs", "cbc"):
+        status, values = get_backend(nom, threads=2).solve_matrix(modele, 30)
+        assert status == pulp.LpStatusOptimal
+        solutions.append(modele.split_values(values))
+    x, y = solutions[0]
+    assert {k for k, v in x.items() if v} == {(1, "a"), (2, "c"), (3, "b")}
+    assert solutions[1] == solutions[0]
+
+
+def test_modele_infaisable():
+    """Un groupe sans chauffeur candidat rend le modèle infaisable"""
+    solo = {k: v for k, v in SOLO.items() if k[0] != 3}
+    modele = build_milp_matrix(DispatchInstance(GROUPES, CHAUFFEURS), solo, {})
+    status, values = get_backend("highs").solve_matrix(modele, 30)
+    assert status == pulp.LpStatusInfeasible
+    assert not values.any()
+
+
+def test_backend_inconnu():
+    with pytest.raises(ValueError):
+        get_backend("gurobi")
+
+
+def test_solution_de_depart():
+    """Une solution de départ réalisable ne change pas l'optimum"""
+    modele = build_milp_matrix(DispatchInstance(GROUPES, CHAUFFEURS), SOLO, COMBO)
+    depart = modele.values_from({(1, "c"): 1, (2, "a"): 1, (3, "b"): 1})
+    assert depart.sum() == 3
+    for nom in ("highs", "cbc"):
+        status, values = get_backend(nom).solve_matrix(modele, 30, depart)
+        assert status == pulp.LpStatusOptimal
+        x, _ = modele.split_values(values)
+        assert {k for k, v in x.items() if v} == {(1, "a"), (2, "c"), (3, "b")}
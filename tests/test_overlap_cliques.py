@@ -0,0 +1,33 @@
+import random
+from itertools import combinations
+
+from app.core.overlap_cliques import overlap_cliques
+
+
+def _chevauche(a, b):
+    return a[0] < b[1] and b[0] < a[1]
+
+
+def test_cliques_couvrent_exactement_les_chevauchements():
+    """Chaque paire qui se chevauche est dans une clique, et seulement celles-là"""
+    rng = random.Random(11)
+    for _ in range(50):
+        intervals = []
+        for _ in range(rng.randint(0, 25)):
+            s = rng.randint(0, 100)
+            intervals.append((s, s + rng.choice([0, 5, 10, 30, 60])))
+        cliques = overlap_cliques(intervals)
+
+        couvertes = set()
+        for clique in cliques:
+            for a, b in combinations(sorted(clique), 2):
+                assert _chevauche(intervals[a], intervals[b])
+                couvertes.add((a, b))
+        attendues = {(a, b) for a, b in combinations(range(len(intervals)), 2)
+                     if _chevauche(intervals[a], intervals[b])}
+        assert couvertes == attendues
+
+
+def test_intervalles_qui_se_touchent():
+    """Une mission qui commence à la fin d'une autre ne la chevauche pas"""
+    assert overlap_cliques([(0, 10), (10, 20), (5, 15)]) == [[0, 2], [2, 1]]
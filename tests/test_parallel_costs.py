@@ -0,0 +1,37 @@
+import random
+
+from app.core.combo_candidates import iter_combo_candidates
+from app.core.cost_matrix import compute_combo_costs, compute_solo_cost_matrix
+from app.core.parallel_costs import compute_combo_costs_parallel
+
+
+def _instance(seed):
+    rng = random.Random(seed)
+    groupes = [
+        {"id": i, "ng": rng.choice([1, 2, 3]), "t_min": rng.randint(0, 120), "duree_trajet_min": 30,
+         "lat_pickup": 48.8 + rng.random() / 5, "long_pickup": 2.3 + rng.random() / 5,
+         "dest_lat": 48.8 + rng.random() / 5, "dest_lng": 2.3 + rng.random() / 5}
+        for i in range(30)
+    ]
+    # coordonnée manquante : ni coût solo ni combo pour ce groupe
+    groupes[0]["lat_pickup"] = None
+    chauffeurs = [
+        {"id": 100 + j, "n": rng.choice([4, 7]), "lat_chauff": 48.8 + rng.random() / 5,
+         "long_chauff": 2.3 + rng.random() / 5}
+        for j in range(10)
+    ]
+    return groupes, chauffeurs
+
+
+def test_combos_paralleles_identiques_au_sequentiel():
+    """Même dictionnaire combo_cost, clé par clé, quel que soit le nombre de processus"""
+    groupes, chauffeurs = _instance(0)
+    solo = compute_solo_cost_matrix(groupes, chauffeurs)
+    sequentiel = {}
+    for g1, g2, eligibles in iter_combo_candidates(groupes, chauffeurs, 45):
+        sequentiel.update(compute_combo_costs(solo, g1, g2, eligibles))
+
+    assert sequentiel
+    assert not any(0 in (g1, g2) for g1, g2, _ in sequentiel)
+    for workers in (1, 3):
+        assert compute_combo_costs_parallel(solo, groupes, chauffeurs, 45, workers) == sequentiel
@@ -0,0 +1,81 @@
+import pulp
+import pytest
+
+from app.core import rolling_horizon
+from app.core.dispatch_instance import DispatchInstance
+from app.core.milp_backend import get_backend
+from app.core.milp_matrix import build_milp_matrix
+from app.core.rolling_horizon import DriverState, solve_rolling_horizon
+
+
+CHAUFFEURS = [{"id": "a", "n": 4}, {"id": "b", "n": 4}]
+
+
+def _solve(groupes, chauffeurs, solo_cost, combo_cost, time_limit, backend=None, warm_start=None):
+    modele = build_milp_matrix(DispatchInstance(groupes, chauffeurs), solo_cost, combo_cost)
+    status, values = get_backend("highs").solve_matrix(modele, time_limit)
+    x, y = modele.split_values(values)
+    return modele, status, x, y
+
+
+def test_etat_chauffeur():
+    """Une mission validée bloque les missions qui la chevauchent et consomme le budget"""
+    etat = DriverState(size=1, max_missions=2)
+    etat.valider(0, 100, 1)
+    assert not etat.accepte(50, 80)
+    assert etat.accepte(100, 150)
+    etat.valider(100, 150, 1)
+    assert etat.restantes == 0 and etat.libre_a == 150
+    assert not etat.accepte(500, 550)
+
+
+def test_tranches_successives():
+    """Chaque groupe est validé une seule fois et l'état est reporté entre tranches"""
+    groupes = [{"id": i, "ng": 3, "t_min": 120 * i} for i in range(8)]
+    solo = {(g["id"], c["id"]): 100 + (10 if c["id"] == "b" else 0) for g in groupes for c in CHAUFFEURS}
+    inst = DispatchInstance(groupes, CHAUFFEURS)
+    appels = []
+
+    def solve(groupes, *args, **kwargs):
+        appels.append([g["id"] for g in groupes])
+        return _solve(groupes, *args, **kwargs)
+
+    status, x, y = solve_rolling_horizon(inst, solo, {}, 10, solve, slice_min=360, overlap_min=120)
+
+    assert status == pulp.LpStatusOptimal
+    assert len(appels) > 1 and max(len(a) for a in appels) <= 3
+    couverts = sorted(k[0] for k, v in x.items() if v)
+    assert couverts == list(range(8))
+    # 4 missions au plus pour « a », le moins cher : les autres passent à « b »
+    assert sum(1 for k, v in x.items() if v and k[1] == "a") == 4
+
+
+def test_mission_a_cheval():
+    """Une mission validée qui déborde sur la tranche suivante y bloque le chauffeur"""
+    groupes = [{"id": 1, "ng": 3, "t_min": 0}, {"id": 2, "ng": 3, "t_min": 300}]
+    solo = {(1, "a"): 400, (2, "a"): 100, (2, "b"): 200}
+    inst = DispatchInstance(groupes, CHAUFFEURS)
+    status, x, y = solve_rolling_horizon(inst, solo, {}, 10, _solve, slice_min=240, overlap_min=0)
+
+    assert status == pulp.LpStatusOptimal
+    assert {k for k, v in x.items() if v} == {(1, "a"), (2, "b")}
+
+
+def test_budget_reparti_sur_les_tranches_restantes(monkeypatch):
+    """Chaque tranche consomme sa limite : le total reste dans le budget"""
+    groupes = [{"id": i, "ng": 3, "t_min": 120 * i} for i in range(8)]
+    solo = {(g["id"], c["id"]): 100 for g in groupes for c in CHAUFFEURS}
+    inst = DispatchInstance(groupes, CHAUFFEURS)
+    horloge = [0.0]
+    monkeypatch.setattr(rolling_horizon.time, "perf_counter", lambda: horloge[0])
+    limites = []
+
+    def solve(groupes, chauffeurs, solo_cost, combo_cost, time_limit, **kwargs):
+        limites.append(time_limit)
+        horloge[0] += time_limit
+        return _solve(groupes, chauffeurs, solo_cost, combo_cost, 10, **kwargs)
+
+    solve_rolling_horizon(inst, solo, {}, 8, solve, slice_min=360, overlap_min=120)
+
+    assert len(limites) > 1
+    assert sum(limites) == pytest.approx(8)
@@ -0,0 +1,83 @@
+import asyncio
+
+import pulp
+
+from app.api.dispatch import read_progress
+from app.core.dispatch_instance import DispatchInstance
+from app.core.milp_backend import get_backend
+from app.core.milp_matrix import build_milp_matrix
+from app.core.solver_progress import (
+    CbcLogState, ProgressReporter, parse_progress_line, set_progress_reporter, stdout_sink
+)
+
+
+GROUPES = [{"id": i, "ng": 3, "t_min": 40 * i} for i in range(12)]
+CHAUFFEURS = [{"id": f"c{j}", "n": 4} for j in range(6)]
+SOLO = {(g["id"], c["id"]): 60 + (7 * g["id"] + 13 * j) % 50 for g in GROUPES for j, c in enumerate(CHAUFFEURS)}
+
+
+def test_journal_cbc():
+    """Solution, borne et nœuds relus dans les lignes du journal de CBC"""
+    etat = CbcLogState()
+    assert not etat.feed("Continuous objective value is 5294.12 - 0.13 seconds")
+    assert etat.bound == 5294.12
+    assert etat.feed("Cbc0012I Integer solution of 7113 found by feasibility pump after 0 iterations and 0 nodes (3.25 seconds)")
+    assert etat.incumbent == 7113
+    etat.feed("Cbc0010I After 100 nodes, 12 on tree, 6846 best solution, best possible 6830.5 (5.12 seconds)")
+    assert (etat.incumbent, etat.bound, etat.nodes) == (6846, 6830.5, 100)
+    etat.feed("Result - Optimal solution found")
+    assert etat.bound == 6846
+
+
+def test_limitation_du_debit():
+    """Un événement solveur par intervalle, sauf nouvelle solution"""
+    evenements = []
+    reporter = ProgressReporter(evenements.append, min_interval=60)
+    reporter.solver(100, 90)
+    reporter.solver(100, 95)
+    reporter.solver(98, 95, force=True)
+    assert [e["incumbent"] for e in evenements] == [100, 98]
+    assert evenements[0]["gap"] == 0.1
+
+
+def test_ligne_de_progression(capsys):
+    stdout_sink({"type": "stage", "stage": "milp"})
+    ligne = capsys.readouterr().out
+    assert parse_progress_line(ligne) == {"type": "stage", "stage": "milp"}
+    assert parse_progress_line("rows [...]") is None
+
+
+def test_progression_pendant_la_resolution():
+    """HiGHS et CBC publient la solution courante et la borne pendant la résolution"""
+    modele = build_milp_matrix(DispatchInstance(GROUPES, CHAUFFEURS), SOLO, {})
+    for nom in ("highs", "cbc"):
+        evenements = []
+        set_progress_reporter(ProgressReporter(evenements.append, min_interval=0))
+        try:
+            status, _ = get_backend(nom, threads=1).solve_matrix(modele, 30)
+        finally:
+            set_progress_reporter(None)
+        assert status == pulp.LpStatusOptimal
+        solutions = [e for e in evenements if e["type"] == "solver" and e["incumbent"] is not None]
+        assert solutions, nom
+        assert solutions[-1]["bound"] is not None
+    # fin du journal de CBC : la borne rejoint la solution
+    assert solutions[-1]["gap"] == 0
+
+
+def test_lecture_des_lignes_longues(capsys):
+    """Une ligne plus longue que la limite du StreamReader ne bloque pas la lecture"""
+    stdout_sink({"type": "stage", "stage": "milp", "t": 1})
+    evenement = capsys.readouterr().out.encode()
+    longue = b"rows " + b"x" * 300_000 + b"\n"
+
+    async def lire():
+        stream = asyncio.StreamReader()
+        stream.feed_data(longue + evenement + b"fin sans retour")
+        stream.feed_eof()
+        progress = {}
+        return await read_progress(stream, progress), progress
+
+    lignes, progress = asyncio.run(lire())
+    assert lignes == [longue.decode(), "fin sans retour"]
+    assert progress["stage"] == "milp"
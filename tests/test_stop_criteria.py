@@ -0,0 +1,84 @@
+import signal
+import threading
+import time
+
+import pulp
+from pulp.apis import coin_api
+
+from app.core.dispatch_instance import DispatchInstance
+from app.core.milp_backend import LpStatusFeasible, _interrompre, get_backend
+from app.core.milp_matrix import build_milp_matrix
+from app.core.stop_criteria import StallMonitor, TimeBudget
+
+
+GROUPES = [{"id": i, "ng": 3, "t_min": 40 * i} for i in range(12)]
+CHAUFFEURS = [{"id": f"c{j}", "n": 4} for j in range(6)]
+SOLO = {(g["id"], c["id"]): 60 + (7 * g["id"] + 13 * j) % 50 for g in GROUPES for j, c in enumerate(CHAUFFEURS)}
+
+
+def test_stagnation():
+    """Arrêt après ``stall_time`` sans amélioration, jamais sans solution"""
+    suivi = StallMonitor(0.05)
+    assert not suivi.stalled(None) and not suivi.stalled(float("inf"))
+    assert not suivi.stalled(100)
+    time.sleep(0.06)
+    assert not suivi.stalled(90)
+    assert not suivi.stalled(90)
+    time.sleep(0.06)
+    assert suivi.stalled(90)
+
+
+def test_repartition_du_budget():
+    """Chaque étape garde la réserve des suivantes et récupère le temps non utilisé"""
+    budget = TimeBudget(100, {"milp": 0.6, "complementaire": 0.3, "heuristique": 0.1})
+    assert abs(budget.allot("milp") - 60) < 0.5
+    assert abs(budget.allot("complementaire") - 90) < 0.5
+    assert budget.allot("complementaire", plafond=20) == 20
+    assert abs(budget.allot("heuristique") - 100) < 0.5
+
+    epuise = TimeBudget(0.0, {"milp": 1.0})
+    assert epuise.allot("milp") == epuise.minimum
+
+
+def test_criteres_transmis_aux_solveurs():
+    """Écarts et stagnation acceptés par les deux backends, solution toujours renvoyée"""
+    modele = build_milp_matrix(DispatchInstance(GROUPES, CHAUFFEURS), SOLO, {})
+    for nom in ("highs", "cbc"):
+        backend = get_backend(nom, threads=1, gap_rel=0.05, gap_abs=10, stall_time=5)
+        assert (backend.gap_abs, backend.stall_time) == (10, 5)
+        status, values = backend.solve_matrix(modele, 30)
+        assert status == pulp.LpStatusOptimal
+        assert sum(modele.split_values(values)[0].values()) == len(GROUPES)
+    assert get_backend("cbc").gap_abs is None and get_backend("cbc").stall_time is None
+
+
+def test_limite_de_temps_non_optimale():
+    """Arrêt au temps limite avec la solution de départ : statut réalisable, pas optimal"""
+    modele = build_milp_matrix(DispatchInstance(GROUPES, CHAUFFEURS), SOLO, {})
+    depart = modele.values_from({(g["id"], CHAUFFEURS[g["id"] % 6]["id"]): 1 for g in GROUPES}, {})
+    status, values = get_backend("highs", threads=1).solve_matrix(modele, 1e-6, depart)
+    assert status == LpStatusFeasible
+    assert modele.cost @ values <= modele.cost @ depart
+
+
+def test_interruption_limitee_aux_processus_captures():
+    """Seuls les processus lancés par PuLP dans le thread qui capture sont interrompus"""
+    autres = []
+    voisin = threading.Thread(target=lambda: autres.append(coin_api.subprocess.Popen(["sleep", "30"])))
+    lances = []
+    coin_api.subprocess.capturer(lances)
+    try:
+        voisin.start()
+        voisin.join()
+        coin_api.subprocess.Popen(["sleep", "30"])
+    finally:
+        coin_api.subprocess.capturer(None)
+    try:
+        assert len(lances) == 1
+        _interrompre(lances)
+        assert lances[0].wait(5) == -signal.SIGINT
+        assert autres[0].poll() is None
+    finally:
+        for processus in lances + autres:
+            processus.kill()
+            processus.wait()
@@ -0,0 +1,49 @@
+import pulp
+import pytest
+
+from app.core import dispatch_solver
+from app.core.dispatch_instance import DispatchInstance
+from app.core.milp_backend import get_backend
+from app.core.symmetry import identical_drivers, order_start
+
+
+GROUPES = [{"id": i, "ng": 3, "t_min": 60 * i} for i in range(6)]
+# a, b et c partent du même point ; d est plus loin
+CHAUFFEURS = [{"id": c, "n": 4} for c in "abcd"]
+SOLO = {(g["id"], c): 90 if c != "d" else 100 for g in GROUPES for c in "abcd"}
+COMBO = {(0, 1, c): 130 for c in "abc"}
+
+
+def test_chauffeurs_identiques():
+    """Même capacité et mêmes missions aux mêmes coûts ; un combo en moins suffit à distinguer"""
+    inst = DispatchInstance(GROUPES, CHAUFFEURS)
+    assert identical_drivers(inst, SOLO, COMBO) == [[0, 1, 2]]
+    assert identical_drivers(inst, SOLO, {(0, 1, "a"): 130}) == [[1, 2]]
+    assert identical_drivers(DispatchInstance(GROUPES, CHAUFFEURS[:1] + [{"id": "b", "n": 7}]), SOLO, {}) == []
+
+
+def test_depart_ordonne():
+    """La solution de départ est renommée au sein de la classe, missions décroissantes"""
+    inst = DispatchInstance(GROUPES, CHAUFFEURS)
+    x = {(2, "c"): 1, (3, "b"): 1, (4, "d"): 1}
+    y = {(0, 1, "c"): 1}
+    assert order_start(x, y, inst, [[0, 1, 2]]) == ({(2, "a"): 1, (3, "b"): 1, (4, "d"): 1}, {(0, 1, "a"): 1})
+
+
+@pytest.mark.parametrize("builder", ["pulp", "matrix", "flow", "lazy"])
+def test_meme_optimum_missions_ordonnees(monkeypatch, builder):
+    """Même coût optimal avec et sans brisure de symétrie, missions ordonnées dans la classe"""
+    # geocoding recharge app.core.config : on modifie les réglages vus par dispatch_solver
+    settings = dispatch_solver.settings
+    monkeypatch.setattr(settings, "MILP_BUILDER", builder)
+    inst = DispatchInstance(GROUPES, CHAUFFEURS)
+    couts = []
+    for actif in (False, True):
+        monkeypatch.setattr(settings, "MILP_SYMMETRY_BREAKING", actif)
+        prob, status, x, y = dispatch_solver.solve_MILP(GROUPES, CHAUFFEURS, SOLO, COMBO, 30, inst, get_backend("highs", threads=1))
+        assert status == pulp.LpStatusOptimal
+        valeur = lambda v: float(pulp.value(v) if isinstance(v, pulp.LpVariable) else v)
+        couts.append(sum(SOLO[k] * valeur(v) for k, v in x.items()) + sum(COMBO[k] * valeur(v) for k, v in y.items()))
+        missions = {c: sum(valeur(v) for k, v in list(x.items()) + list(y.items()) if k[-1] == c) for c in "abc"}
+    assert couts[0] == pytest.approx(couts[1])
+    assert missions["a"] >= missions["b"] >= missions["c"]